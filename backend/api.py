@@ -1,24 +1,231 @@
-from fastapi import FastAPI, Query, HTTPException
-from backend.core.gatherer import run_osint_analysis
-from backend.core.models import DigitalFootprintReport
+import asyncio
+import json
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Query, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from backend.core.gatherer import REFRESHER, SOURCE_REGISTRY, new_deadline, prewarm_loop, run_osint_analysis, stream_osint_analysis
+from backend.core.history import HISTORY
+from backend.core.http_client import close_http_clients
+from backend.core.batch import BATCH_MAX_TARGETS, dedupe_targets, run_batch
+from backend.core.jobs import JOBS
+from backend.core.metrics import HTTP_DURATION, HTTP_REQUESTS, REGISTRY
+from backend.core.models import BatchAnalysisRequest, DigitalFootprintReport
+from backend.core.network_utils import close_redis
+from backend.core.targets import classify_target
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Import the non-lazy sources up front so the first request does not pay for it.
+    SOURCE_REGISTRY.load_eager()
+    prewarm = asyncio.create_task(prewarm_loop())
+    # Pooled upstream HTTP clients and the Redis pool live as long as the app; close them on shutdown.
+    yield
+    prewarm.cancel()
+    await REFRESHER.aclose()
+    await JOBS.aclose()
+    # Writes queued for the scan history are flushed before exit.
+    await HISTORY.aclose()
+    await close_http_clients()
+    await close_redis()
 
 app = FastAPI(
     title="OSINT-PRO Python Core Engine",
-    description="Exposes the asynchronous OSINT gatherer logic. Designed to be proxied by the Go Gateway on port 8080."
+    description="Exposes the asynchronous OSINT gatherer logic. Designed to be proxied by the Go Gateway on port 8080.",
+    lifespan=lifespan
 )
 
+@app.middleware("http")
+async def observe_requests(request: Request, call_next):
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    # Path templates, not raw paths, keep the label set bounded.
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    HTTP_REQUESTS.inc(route=route, method=request.method, code=str(response.status_code))
+    HTTP_DURATION.observe(elapsed, route=route)
+    # Streaming responses are measured up to their headers.
+    timing = f"app;dur={elapsed * 1000:.1f}"
+    existing = response.headers.get("Server-Timing")
+    response.headers["Server-Timing"] = f"{existing}, {timing}" if existing else timing
+    return response
+
+def _server_timing(report: DigitalFootprintReport) -> str:
+    """One Server-Timing entry per source, named after its module."""
+    entries = []
+    for status in report.sources:
+        entry = f'{status.source.rsplit(".", 1)[-1]};desc="{status.status}"'
+        if status.duration_ms is not None:
+            entry += f";dur={status.duration_ms}"
+        entries.append(entry)
+    return ", ".join(entries)
+
 @app.get("/analyze", response_model=DigitalFootprintReport)
-async def analyze_target(target: str = Query(..., description="The domain or username to analyze.")):
+async def analyze_target(response: Response,
+                         target: str = Query(..., description="The domain, IP, email, username or URL to analyze."),
+                         timeout: Optional[float] = Query(None, gt=0, le=120, description="Deadline in seconds; slower sources are cut off and reported as timed out."),
+                         enqueue: bool = Query(False, description="Queue the analysis for the worker pool and return a job id (202) instead of waiting for the report."),
+                         incremental: bool = Query(False, description="Re-scan against the previous scan: conditional provider requests, unchanged results reused.")):
     """
     Triggers the multi-source OSINT analysis for a given target.
     """
     if not target or len(target) < 3:
         raise HTTPException(status_code=400, detail="Target must be at least 3 characters long.")
-    
+
+    if enqueue:
+        return JSONResponse(_job_links(await JOBS.submit(target, timeout, incremental)), status_code=202)
+
     try:
-        report = await run_osint_analysis(target)
-        return report
-    except Exception as e:
-        
-        print(f"Internal Python Engine Error: {e}")
-        raise HTTPException(status_code=500, detail="Internal analysis engine error.")
\ No newline at end of file
+        report = await run_osint_analysis(target, deadline=new_deadline(timeout), incremental=incremental)
+    except Exception:
+        logger.exception("Analysis failed for %s", target)
+        raise HTTPException(status_code=500, detail="Internal analysis engine error.")
+    if report.sources:
+        response.headers["Server-Timing"] = _server_timing(report)
+    return report
+
+@app.get("/analyze/stream")
+async def analyze_target_stream(target: str = Query(..., description="The domain, IP, email, username or URL to analyze."),
+                                timeout: Optional[float] = Query(None, gt=0, le=120, description="Deadline in seconds."),
+                                incremental: bool = Query(False, description="Re-scan against the previous scan.")):
+    """
+    Streams the analysis as NDJSON: one "source" line per source as soon as it finishes,
+    then a final "report" line carrying the full DigitalFootprintReport.
+    """
+    if not target or len(target) < 3:
+        raise HTTPException(status_code=400, detail="Target must be at least 3 characters long.")
+
+    async def events():
+        try:
+            async for event in stream_osint_analysis(target, deadline=new_deadline(timeout), incremental=incremental):
+                yield json.dumps(event) + "\n"
+        except Exception:
+            logger.exception("Streaming analysis failed for %s", target)
+            yield json.dumps({"event": "error", "detail": "Internal analysis engine error."}) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/analyze/batch")
+async def analyze_batch(request: BatchAnalysisRequest):
+    """
+    Analyzes many targets under a bounded concurrency budget. Streams NDJSON: one
+    "result"/"error" line per unique target as it completes, then a "summary" line.
+    """
+    if not request.targets:
+        raise HTTPException(status_code=400, detail="At least one target is required.")
+    if len(request.targets) > BATCH_MAX_TARGETS:
+        raise HTTPException(status_code=413, detail=f"Batches are limited to {BATCH_MAX_TARGETS} targets.")
+
+    async def events():
+        async for event in run_batch(request.targets, request.concurrency, request.incremental):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/history")
+async def scan_history(target: str = Query(..., description="The target whose past scans to list."),
+                       limit: int = Query(20, ge=1, le=500)):
+    """
+    Lists past scans of a target, newest first, with the number of hits each one found.
+    """
+    resolved = classify_target(target)
+    return {"target": resolved.value, "scans": await HISTORY.scans(resolved.value, limit)}
+
+@app.get("/history/diff")
+async def scan_diff(target: str = Query(..., description="The target whose scans to compare."),
+                    from_scan: Optional[int] = Query(None, description="Older scan id; defaults to the second most recent scan."),
+                    to_scan: Optional[int] = Query(None, description="Newer scan id; defaults to the most recent scan.")):
+    """
+    Hits added and removed between two scans of the same target.
+    """
+    diff = await HISTORY.diff(classify_target(target).value, from_scan, to_scan)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="At least two scans are needed to compute a diff.")
+    return diff
+
+@app.get("/history/hits")
+async def history_hits(target: Optional[str] = Query(None),
+                       source: Optional[str] = Query(None, description="Source module, e.g. sources.social_media."),
+                       platform: Optional[str] = Query(None),
+                       cve_id: Optional[str] = Query(None),
+                       url: Optional[str] = Query(None),
+                       limit: int = Query(100, ge=1, le=1000)):
+    """
+    Searches every stored scan for hits matching all given filters, newest first.
+    """
+    if not any((target, source, platform, cve_id, url)):
+        raise HTTPException(status_code=400, detail="At least one of target, source, platform, cve_id or url is required.")
+    hits = await HISTORY.hits(
+        limit,
+        target=classify_target(target).value if target else None,
+        module=source,
+        platform=platform,
+        cve_id=cve_id,
+        url=url,
+    )
+    return {"hits": hits}
+
+def _job_links(job):
+    return {**job, "status_url": f"/jobs/{job['job_id']}", "stream_url": f"/jobs/{job['job_id']}/stream"}
+
+@app.post("/jobs", status_code=202)
+async def submit_jobs(request: BatchAnalysisRequest,
+                      timeout: Optional[float] = Query(None, gt=0, le=120, description="Deadline in seconds for each analysis.")):
+    """
+    Queues one job per unique target for the worker pool and returns their ids right away.
+    """
+    if not request.targets:
+        raise HTTPException(status_code=400, detail="At least one target is required.")
+    if len(request.targets) > BATCH_MAX_TARGETS:
+        raise HTTPException(status_code=413, detail=f"Batches are limited to {BATCH_MAX_TARGETS} targets.")
+    targets = [t for t in dedupe_targets(request.targets) if len(t) >= 3]
+    jobs = await asyncio.gather(*(JOBS.submit(target, timeout, request.incremental) for target in targets))
+    return {"jobs": [_job_links(job) for job in jobs]}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Status of a queued analysis: queued, running, done (with the report) or failed.
+    """
+    job = await JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job.")
+    return job
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str):
+    """
+    Follows a queued analysis as NDJSON, in the same format as /analyze/stream.
+    Events already emitted are replayed first.
+    """
+    if await JOBS.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job.")
+
+    async def events():
+        async for event in JOBS.events(job_id):
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus text exposition of this process's metrics.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
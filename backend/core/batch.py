@@ -0,0 +1,115 @@
+"""
+Batch analysis: runs run_osint_analysis over many targets under a bounded
+concurrency budget and yields results as they complete.
+Duplicate targets (after normalization) are collapsed before scheduling, and fully cached targets are
+answered straight from the cache without taking a concurrency slot. Batch analyses run in the
+scheduler's bulk class, so they yield source slots to interactive requests.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+from . import gatherer
+from .scheduler import BULK
+from .targets import classify_target
+
+logger = logging.getLogger(__name__)
+
+# Analyses running at once across every batch in this worker.
+BATCH_GLOBAL_CONCURRENCY = int(os.getenv("BATCH_GLOBAL_CONCURRENCY", "32"))
+BATCH_DEFAULT_CONCURRENCY = int(os.getenv("BATCH_DEFAULT_CONCURRENCY", "16"))
+BATCH_MAX_TARGETS = int(os.getenv("BATCH_MAX_TARGETS", "100000"))
+
+_GLOBAL_SLOTS: Optional[asyncio.Semaphore] = None
+_GLOBAL_SLOTS_LOOP: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _global_slots() -> asyncio.Semaphore:
+    global _GLOBAL_SLOTS, _GLOBAL_SLOTS_LOOP
+    loop = asyncio.get_running_loop()
+    if _GLOBAL_SLOTS is None or _GLOBAL_SLOTS_LOOP is not loop:
+        _GLOBAL_SLOTS = asyncio.Semaphore(BATCH_GLOBAL_CONCURRENCY)
+        _GLOBAL_SLOTS_LOOP = loop
+    return _GLOBAL_SLOTS
+
+
+def dedupe_targets(targets: List[str]) -> List[str]:
+    """Normalizes targets and drops repeats, keeping first-seen order."""
+    seen = set()
+    unique: List[str] = []
+    for raw in targets:
+        target = classify_target(raw).value
+        if target in seen:
+            continue
+        seen.add(target)
+        unique.append(target)
+    return unique
+
+
+async def _analyze_one(target: str, incremental: bool = False) -> Dict[str, Any]:
+    if len(target) < 3:
+        return {"event": "error", "target": target, "detail": "Target must be at least 3 characters long."}
+    try:
+        report = await gatherer.get_cached_report(target)
+        if report is None:
+            async with _global_slots():
+                report = await gatherer.run_osint_analysis(target, priority=BULK, incremental=incremental)
+        return {"event": "result", "target": target, "report": report.model_dump(mode="json")}
+    except Exception as e:
+        logger.error("Batch analysis failed for %s: %s", target, e)
+        return {"event": "error", "target": target, "detail": "Internal analysis engine error."}
+
+
+async def run_batch(targets: List[str], concurrency: Optional[int] = None,
+                    incremental: bool = False) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yields one "result" (or "error") event per unique target in completion order,
+    followed by a "summary" event with counts and throughput.
+    With `incremental`, targets that need a run are re-scanned incrementally (see gatherer.run_osint_analysis).
+    """
+    started = time.perf_counter()
+    unique = dedupe_targets(targets)
+    concurrency = max(1, min(concurrency or BATCH_DEFAULT_CONCURRENCY, BATCH_GLOBAL_CONCURRENCY))
+
+    queue: "asyncio.Queue[str]" = asyncio.Queue()
+    for target in unique:
+        queue.put_nowait(target)
+    results: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=concurrency * 2)
+
+    async def worker():
+        while True:
+            try:
+                target = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            await results.put(await _analyze_one(target, incremental))
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(unique)))]
+    completed = failed = cache_hits = 0
+    try:
+        for _ in range(len(unique)):
+            event = await results.get()
+            if event["event"] == "result":
+                completed += 1
+                if event["report"].get("is_cached"):
+                    cache_hits += 1
+            else:
+                failed += 1
+            yield event
+    finally:
+        for task in workers:
+            task.cancel()
+
+    elapsed = time.perf_counter() - started
+    yield {
+        "event": "summary",
+        "submitted": len(targets),
+        "unique": len(unique),
+        "duplicates": len(targets) - len(unique),
+        "completed": completed,
+        "failed": failed,
+        "cache_hits": cache_hits,
+        "elapsed_seconds": round(elapsed, 3),
+        "targets_per_second": round(len(unique) / elapsed, 2) if elapsed > 0 else None,
+    }
@@ -0,0 +1,233 @@
+"""
+Circuit breakers and hedged requests for upstream search providers.
+Each provider (bing, github_users, github_code) has a breaker. Calls are counted in
+tumbling BREAKER_WINDOW_SECONDS windows. A call is bad when it raises, gets a 5xx, or
+takes longer than BREAKER_SLOW_SECONDS. Once a window holds at least BREAKER_MIN_CALLS
+calls and BREAKER_FAILURE_RATE of them are bad, the breaker opens: calls fail fast for
+BREAKER_OPEN_SECONDS instead of waiting out the provider's timeout. After that the
+breaker is half-open. One probe call at a time is let through; a good probe closes the
+breaker and a bad one opens it again. State lives in Redis when it is reachable, so
+every worker sees a breaker open at once. Otherwise each process keeps its own.
+
+Hedging (PROVIDER_HEDGING=1) is for idempotent search GETs. When a call has not
+answered within the provider's recent HEDGE_PERCENTILE latency, a second identical
+call is started and whichever answers first wins. Hedges need at least
+HEDGE_MIN_SAMPLES latencies and an immediately available rate-limit token.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, TypeVar
+from . import network_utils
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+BREAKER_WINDOW_SECONDS = float(os.getenv("BREAKER_WINDOW_SECONDS", "30"))
+BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", "10"))
+BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_SLOW_SECONDS = float(os.getenv("BREAKER_SLOW_SECONDS", "5"))
+BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", "30"))
+# A probe that never reports back (its worker died) frees the half-open slot after this long.
+BREAKER_PROBE_TIMEOUT_SECONDS = float(os.getenv("BREAKER_PROBE_TIMEOUT_SECONDS", "15"))
+PROVIDER_HEDGING = os.getenv("PROVIDER_HEDGING", "0") == "1"
+HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_LATENCY_SAMPLES = 200
+
+BREAKER_REJECTIONS = REGISTRY.counter(
+    "osint_breaker_rejections_total", "Provider calls failed fast by an open circuit breaker.", ("provider",))
+BREAKER_TRANSITIONS = REGISTRY.counter(
+    "osint_breaker_transitions_total", "Circuit breaker state changes seen by this process.", ("provider", "state"))
+HEDGED_REQUESTS = REGISTRY.counter(
+    "osint_hedged_requests_total", "Hedged provider calls, by which attempt answered first.", ("provider", "winner"))
+
+T = TypeVar("T")
+
+
+class _LocalBreaker:
+    def __init__(self):
+        self.window = -1
+        self.calls = 0
+        self.bad = 0
+        self.open_until = 0.0
+        self.probe_until = 0.0
+
+
+class CircuitBreakers:
+    def __init__(self, window_seconds: float = BREAKER_WINDOW_SECONDS, min_calls: int = BREAKER_MIN_CALLS,
+                 failure_rate: float = BREAKER_FAILURE_RATE, slow_seconds: float = BREAKER_SLOW_SECONDS,
+                 open_seconds: float = BREAKER_OPEN_SECONDS, probe_timeout: float = BREAKER_PROBE_TIMEOUT_SECONDS,
+                 hedging: bool = PROVIDER_HEDGING, namespace: str = "osint:breaker"):
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_seconds = slow_seconds
+        self.open_seconds = open_seconds
+        self.probe_timeout = probe_timeout
+        self.hedging = hedging
+        self.namespace = namespace
+        self._local: Dict[str, _LocalBreaker] = {}
+        self._latencies: Dict[str, Deque[float]] = {}
+
+    def _key(self, provider: str) -> str:
+        return f"{self.namespace}:{provider}"
+
+    def _breaker(self, provider: str) -> _LocalBreaker:
+        breaker = self._local.get(provider)
+        if breaker is None:
+            breaker = self._local[provider] = _LocalBreaker()
+        return breaker
+
+    def _trips(self, calls: int, bad: int) -> bool:
+        return calls >= self.min_calls and bad >= calls * self.failure_rate
+
+    async def allow(self, provider: str) -> bool:
+        """False while the breaker is open, or half-open with its probe already out."""
+        now = time.time()
+        client = network_utils.get_redis()
+        if client is not None:
+            try:
+                open_until = float(await client.hget(self._key(provider), "open_until") or 0)
+                if not open_until:
+                    return True
+                if now >= open_until and await client.set(f"{self._key(provider)}:probe", "1", nx=True,
+                                                          px=int(self.probe_timeout * 1000)):
+                    return True
+                BREAKER_REJECTIONS.inc(provider=provider)
+                return False
+            except Exception as e:
+                network_utils.REDIS.mark_failed(e)
+
+        breaker = self._breaker(provider)
+        if not breaker.open_until:
+            return True
+        if now >= breaker.open_until and now >= breaker.probe_until:
+            breaker.probe_until = now + self.probe_timeout
+            return True
+        BREAKER_REJECTIONS.inc(provider=provider)
+        return False
+
+    async def release(self, provider: str):
+        """Frees the half-open probe slot for a call that allow() let through but was never sent."""
+        now = time.time()
+        client = network_utils.get_redis()
+        if client is not None:
+            try:
+                open_until = float(await client.hget(self._key(provider), "open_until") or 0)
+                if open_until and now >= open_until:
+                    await client.delete(f"{self._key(provider)}:probe")
+                return
+            except Exception as e:
+                network_utils.REDIS.mark_failed(e)
+
+        breaker = self._breaker(provider)
+        if breaker.open_until and now >= breaker.open_until:
+            breaker.probe_until = 0.0
+
+    async def record(self, provider: str, ok: bool, seconds: float):
+        """Reports the outcome of a call that allow() let through."""
+        if ok:
+            samples = self._latencies.get(provider)
+            if samples is None:
+                samples = self._latencies[provider] = deque(maxlen=HEDGE_LATENCY_SAMPLES)
+            samples.append(seconds)
+        bad = not ok or seconds >= self.slow_seconds
+        now = time.time()
+        window = int(now // self.window_seconds)
+        client = network_utils.get_redis()
+        if client is not None:
+            key = self._key(provider)
+            window_key = f"{key}:w{window}"
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.hget(key, "open_until")
+                    pipe.hincrby(window_key, "calls", 1)
+                    pipe.hincrby(window_key, "bad", int(bad))
+                    pipe.expire(window_key, int(self.window_seconds * 2) + 1)
+                    open_until, calls, bad_calls, _ = await pipe.execute()
+                open_until = float(open_until or 0)
+                if open_until and now >= open_until:
+                    # The half-open probe decides.
+                    async with client.pipeline(transaction=False) as pipe:
+                        if bad:
+                            pipe.hset(key, "open_until", str(now + self.open_seconds))
+                        else:
+                            pipe.hdel(key, "open_until")
+                            pipe.delete(window_key)
+                        pipe.delete(f"{key}:probe")
+                        await pipe.execute()
+                    self._transition(provider, "open" if bad else "closed")
+                elif not open_until and self._trips(int(calls), int(bad_calls)):
+                    await client.hset(key, "open_until", str(now + self.open_seconds))
+                    self._transition(provider, "open", int(calls), int(bad_calls))
+                return
+            except Exception as e:
+                network_utils.REDIS.mark_failed(e)
+
+        breaker = self._breaker(provider)
+        if breaker.window != window:
+            breaker.window, breaker.calls, breaker.bad = window, 0, 0
+        breaker.calls += 1
+        breaker.bad += int(bad)
+        if breaker.open_until and now >= breaker.open_until:
+            breaker.probe_until = 0.0
+            if bad:
+                breaker.open_until = now + self.open_seconds
+            else:
+                breaker.open_until, breaker.calls, breaker.bad = 0.0, 0, 0
+            self._transition(provider, "open" if bad else "closed")
+        elif not breaker.open_until and self._trips(breaker.calls, breaker.bad):
+            breaker.open_until = now + self.open_seconds
+            self._transition(provider, "open", breaker.calls, breaker.bad)
+
+    def _transition(self, provider: str, state: str, calls: int = 0, bad: int = 0):
+        BREAKER_TRANSITIONS.inc(provider=provider, state=state)
+        if state == "open":
+            logger.warning("Circuit breaker for %s opened for %.0fs (%d/%d bad calls)", provider, self.open_seconds, bad, calls)
+        else:
+            logger.info("Circuit breaker for %s closed", provider)
+
+    def hedge_delay(self, provider: str) -> Optional[float]:
+        """The provider's HEDGE_PERCENTILE latency, or None while there are too few samples."""
+        samples = self._latencies.get(provider)
+        if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * HEDGE_PERCENTILE / 100.0))]
+
+    async def hedged(self, provider: str, call: Callable[[], Awaitable[T]],
+                     can_hedge: Optional[Callable[[], Awaitable[bool]]] = None) -> T:
+        """
+        Runs `call`, and a second copy of it if the first is slower than the provider's
+        hedge delay. Returns the first successful result; the other attempt is cancelled.
+        """
+        delay = self.hedge_delay(provider) if self.hedging else None
+        first = asyncio.ensure_future(call())
+        attempts = {first}
+        try:
+            if delay is None:
+                return await first
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if done or (can_hedge is not None and not await can_hedge()):
+                return await first
+            attempts.add(asyncio.ensure_future(call()))
+            error: Optional[BaseException] = None
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        HEDGED_REQUESTS.inc(provider=provider, winner="primary" if task is first else "hedge")
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in attempts:
+                if not task.done():
+                    task.cancel()
+
+
+PROVIDER_BREAKERS = CircuitBreakers()
@@ -0,0 +1,185 @@
+"""
+Two-tier cache for per-source results.
+Tier 1 is a bounded in-process LRU with per-entry TTL and a total-size budget;
+tier 2 is the shared Redis cache from network_utils. Entries are keyed per source
+module and target so every source can keep its own TTL. Redis holds payloads encoded
+by backend.core.codec; the local tier holds the decoded models, so a local hit costs
+neither deserialization nor validation.
+"""
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple, Type
+from pydantic import BaseModel
+from . import network_utils
+from .codec import CACHE_CODEC, CacheCodec
+
+logger = logging.getLogger(__name__)
+
+
+CACHE_LOCAL_MAX_ENTRIES = int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", "2048"))
+CACHE_LOCAL_MAX_BYTES = int(os.getenv("CACHE_LOCAL_MAX_BYTES", str(32 * 1024 * 1024)))
+# Entries pulled from Redis are kept locally for at most this long, since Redis
+# does not tell us how much of their TTL is left.
+CACHE_LOCAL_BACKFILL_TTL_SECONDS = int(os.getenv("CACHE_LOCAL_BACKFILL_TTL_SECONDS", "60"))
+CACHE_DEFAULT_TTL_SECONDS = int(os.getenv("CACHE_DEFAULT_TTL_SECONDS", "3600"))
+# How long an entry is kept (and served as stale while it is refreshed) after its TTL.
+CACHE_STALE_TTL_SECONDS = int(os.getenv("CACHE_STALE_TTL_SECONDS", "3600"))
+
+DEFAULT_SOURCE_TTLS: Dict[str, int] = {
+    "sources.deep_search": 24 * 3600,
+    "sources.domain_checker": 12 * 3600,
+    "sources.vulnerability_db": 6 * 3600,
+    "sources.social_media": 3600,
+    "sources.search_engine": 300,
+}
+
+
+def parse_source_overrides(raw: str, cast: Callable[[str], float] = int) -> Dict[str, float]:
+    """Parses per-source integer settings such as SOURCE_CACHE_TTLS, e.g. "deep_search=86400,sources.search_engine=120"."""
+    values: Dict[str, float] = {}
+    for part in raw.split(","):
+        if "=" not in part:
+            continue
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if not name:
+            continue
+        if "." not in name:
+            name = f"sources.{name}"
+        try:
+            values[name] = cast(value.strip())
+        except ValueError:
+            continue
+    return values
+
+
+SOURCE_TTLS: Dict[str, int] = {**DEFAULT_SOURCE_TTLS, **parse_source_overrides(os.getenv("SOURCE_CACHE_TTLS", ""))}
+
+
+def source_ttl(module_path: str) -> int:
+    return SOURCE_TTLS.get(module_path, CACHE_DEFAULT_TTL_SECONDS)
+
+
+def source_cache_key(module_path: str, target: str) -> str:
+    return f"source:{module_path}:{target}"
+
+
+def _size_of(value) -> int:
+    if isinstance(value, bytes):
+        return len(value)
+    return len(str(value).encode("utf-8"))
+
+
+class LocalTTLCache:
+    """In-process LRU bounded by entry count and approximate payload bytes."""
+
+    def __init__(self, max_entries: int = CACHE_LOCAL_MAX_ENTRIES, max_bytes: int = CACHE_LOCAL_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries: "OrderedDict[str, Tuple[float, int, object]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, size, value = entry
+        if expires_at <= time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value, ttl_seconds: int, size: Optional[int] = None):
+        if ttl_seconds <= 0:
+            return
+        size = size if size is not None else _size_of(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (time.monotonic() + ttl_seconds, size, value)
+        self.total_bytes += size
+        while self._entries and (len(self._entries) > self.max_entries or self.total_bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+
+    def delete(self, key: str):
+        if key in self._entries:
+            self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def _drop(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.total_bytes -= size
+
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fresh_until: float  # epoch seconds
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() >= self.fresh_until
+
+
+class TieredCache:
+    """
+    Local LRU of decoded models in front of Redis. Misses in tier 1 are fetched from
+    Redis in one MGET. Entries that are corrupt or were written under another schema
+    version count as misses. Entries outlive their TTL by CACHE_STALE_TTL_SECONDS and
+    come back with is_stale set during that window.
+    """
+
+    def __init__(self, local: Optional[LocalTTLCache] = None, codec: Optional[CacheCodec] = None):
+        self.local = local if local is not None else LocalTTLCache()
+        self.codec = codec if codec is not None else CACHE_CODEC
+
+    async def get_many(self, keys: Sequence[str], model: Type[BaseModel], ttls: Optional[Dict[str, int]] = None) -> Dict[str, Optional[CacheEntry]]:
+        found: Dict[str, Optional[CacheEntry]] = {}
+        remote_keys = []
+        for key in keys:
+            value = self.local.get(key)
+            found[key] = value
+            if value is None:
+                remote_keys.append(key)
+        if remote_keys:
+            payloads = await network_utils.get_many_from_cache(remote_keys)
+            for key, payload in zip(remote_keys, payloads):
+                if payload is None:
+                    continue
+                try:
+                    value = self.codec.decode(payload, model)
+                except Exception:
+                    logger.warning("Corrupt cache entry for %s, regenerating.", key)
+                    continue
+                if value is None:
+                    continue
+                entry = found[key] = CacheEntry(value, self.codec.fresh_until(payload))
+                ttl = (ttls or {}).get(key, CACHE_DEFAULT_TTL_SECONDS)
+                self.local.set(key, entry, min(ttl, CACHE_LOCAL_BACKFILL_TTL_SECONDS), size=self.codec.raw_size(payload))
+        return found
+
+    async def set_many(self, items: Dict[str, BaseModel], ttls: Dict[str, int]):
+        now = time.time()
+        payloads: Dict[str, bytes] = {}
+        retention: Dict[str, int] = {}
+        for key, value in items.items():
+            ttl = ttls.get(key, CACHE_DEFAULT_TTL_SECONDS)
+            retention[key] = ttl + CACHE_STALE_TTL_SECONDS
+            payload = payloads[key] = self.codec.encode(value, fresh_until=now + ttl)
+            self.local.set(key, CacheEntry(value, now + ttl), retention[key], size=self.codec.raw_size(payload))
+        await network_utils.set_many_to_cache(payloads, ttl_seconds=CACHE_DEFAULT_TTL_SECONDS, ttls=retention)
+
+
+SOURCE_CACHE = TieredCache()
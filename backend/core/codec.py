@@ -0,0 +1,112 @@
+"""
+Binary cache codec.
+Every cached payload starts with a 13-byte header: magic b"OC", schema version, serializer
+id, flags and the epoch time until which the entry counts as fresh. The body is JSON
+written and parsed by pydantic-core (as fast as orjson, without the extra dict round
+trip) or msgpack, and is zstd-compressed above CACHE_COMPRESS_MIN_BYTES when
+`zstandard` is available.
+A payload with a different magic or schema version decodes as a miss, so bumping
+CACHE_SCHEMA_VERSION invalidates old entries cleanly.
+Decoding validates with pydantic-core. That is faster than rebuilding the models in
+Python with model_construct. Hot entries skip decoding altogether: the in-process
+cache tier keeps the decoded models (see backend.core.cache).
+"""
+import logging
+import os
+import struct
+from typing import Callable, Dict, Optional, Tuple, Type, TypeVar, Union
+from pydantic import BaseModel
+
+try:
+    import msgpack
+except Exception:
+    msgpack = None
+
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a cached model changes shape.
+CACHE_SCHEMA_VERSION = 2
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "1024"))
+CACHE_COMPRESS_LEVEL = int(os.getenv("CACHE_COMPRESS_LEVEL", "3"))
+
+MAGIC = b"OC"
+_HEADER = struct.Struct("!2sBBBd")
+FLAG_ZSTD = 0x01
+
+M = TypeVar("M", bound=BaseModel)
+
+
+# name -> (id stored in the header, encode(model) -> bytes, decode(bytes, model class) -> model)
+SERIALIZERS: Dict[str, Tuple[int, Callable[[BaseModel], bytes], Callable[[bytes, Type[BaseModel]], BaseModel]]] = {
+    "json": (1, lambda model: model.__pydantic_serializer__.to_json(model), lambda raw, model: model.model_validate_json(raw)),
+}
+if msgpack is not None:
+    SERIALIZERS["msgpack"] = (
+        2,
+        lambda model: msgpack.packb(model.model_dump(mode="json"), use_bin_type=True),
+        lambda raw, model: model.model_validate(msgpack.unpackb(raw, raw=False)),
+    )
+_DECODERS_BY_ID = {sid: decode for sid, _, decode in SERIALIZERS.values()}
+
+
+def _default_serializer() -> str:
+    name = os.getenv("CACHE_CODEC", "")
+    if name in SERIALIZERS:
+        return name
+    if name:
+        logger.warning("Cache codec %s is not available; using the default.", name)
+    return "json"
+
+
+class CacheCodec:
+    def __init__(self, serializer: Optional[str] = None, compress_min_bytes: Optional[int] = CACHE_COMPRESS_MIN_BYTES,
+                 schema_version: int = CACHE_SCHEMA_VERSION):
+        self.serializer = serializer or _default_serializer()
+        self.serializer_id, self._encode, _ = SERIALIZERS[self.serializer]
+        # None disables compression.
+        self.compress_min_bytes = compress_min_bytes if zstandard is not None else None
+        self.schema_version = schema_version
+        self._compressor = zstandard.ZstdCompressor(level=CACHE_COMPRESS_LEVEL) if zstandard is not None else None
+        self._decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    def encode(self, model: BaseModel, fresh_until: float = 0.0) -> bytes:
+        body = self._encode(model)
+        flags = 0
+        if self.compress_min_bytes is not None and len(body) >= self.compress_min_bytes:
+            body = self._compressor.compress(body)
+            flags |= FLAG_ZSTD
+        return _HEADER.pack(MAGIC, self.schema_version, self.serializer_id, flags, fresh_until) + body
+
+    def fresh_until(self, payload: bytes) -> float:
+        return _HEADER.unpack_from(payload)[4]
+
+    def raw_size(self, payload: bytes) -> int:
+        """Uncompressed body size of an encoded payload; used to budget the in-process tier."""
+        body = payload[_HEADER.size:]
+        if payload[4] & FLAG_ZSTD and zstandard is not None:
+            size = zstandard.frame_content_size(body)
+            if size >= 0:
+                return size
+        return len(body)
+
+    def decode(self, payload: Union[bytes, str, None], model: Type[M]) -> Optional[M]:
+        """Returns the model, or None for a miss, an unknown format or a stale schema version."""
+        if not payload or not isinstance(payload, bytes) or len(payload) < _HEADER.size:
+            return None
+        magic, version, serializer_id, flags, _ = _HEADER.unpack_from(payload)
+        if magic != MAGIC or version != self.schema_version or serializer_id not in _DECODERS_BY_ID:
+            return None
+        body = payload[_HEADER.size:]
+        if flags & FLAG_ZSTD:
+            if self._decompressor is None:
+                return None
+            body = self._decompressor.decompress(body)
+        return _DECODERS_BY_ID[serializer_id](body, model)
+
+
+CACHE_CODEC = CacheCodec()
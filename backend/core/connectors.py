@@ -2,28 +2,102 @@
 Safe wrappers for external API connectors.
 Use environment variables to provide credentials (BING_API_KEY, GITHUB_TOKEN).
 These functions return normalized Pydantic-model compatible objects and are intended
-to be used by sources (e.g. deep_search).
+to be used by sources (e.g. deep_search). Requests go through the shared, pooled
+client registry in backend.core.http_client unless a registry is passed in.
+Every provider call passes through provider_get. It applies the provider's circuit
+breaker (backend.core.breaker), rate limiter and optional hedging. It also records
+ETag/Last-Modified validators, so an incremental re-scan can send conditional requests.
 """
 import os
-from typing import List
+import time
+from typing import Any, Dict, List, Optional
 import httpx
+from backend.core.breaker import PROVIDER_BREAKERS
+from backend.core.incremental import INCREMENTAL, request_key
+from backend.core.metrics import REGISTRY
 from backend.core.models import WebSearchHit, SocialMediaHits
+from backend.core.http_client import HttpClientRegistry, deadline_timeout, get_http_client
+from backend.core.rate_limit import PROVIDER_LIMITER
 
 BING_API_KEY = os.getenv("BING_API_KEY")
 BING_ENDPOINT = os.getenv("BING_ENDPOINT", "https://api.bing.microsoft.com/v7.0/search")
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
 
+NOT_MODIFIED = REGISTRY.counter(
+    "osint_provider_not_modified_total", "Conditional provider requests answered with 304 Not Modified.", ("provider",))
 
-async def bing_search(query: str, limit: int = 5, timeout_seconds: float = 12.0) -> List[WebSearchHit]:
+
+async def provider_get(provider: str, url: str, headers: Dict[str, str], params: Dict[str, Any],
+                       timeout: httpx.Timeout, http: Optional[HttpClientRegistry] = None,
+                       deadline: Optional[float] = None, conditional: bool = False) -> Optional[httpx.Response]:
+    """
+    GETs `url` for `provider`. Returns None without sending anything when the provider's
+    breaker is open or its rate limiter sheds the call. Responses and errors feed the breaker.
+    With `conditional`, the request carries the validators of the last conditional 200 response,
+    and a 200 response's validators are stored for the next one. A 304 comes back as the stored
+    body with status 200 and extensions["not_modified"] set.
+    """
+    if not await PROVIDER_BREAKERS.allow(provider):
+        return None
+    recorded = False
+    try:
+        if not await PROVIDER_LIMITER.acquire(provider, deadline):
+            return None
+        client = get_http_client(url, http)
+        key = request_key(provider, url, params)
+        stored = await INCREMENTAL.validators(key) if conditional else None
+        if stored:
+            headers = dict(headers)
+            if stored.get("etag"):
+                headers["If-None-Match"] = stored["etag"]
+            if stored.get("last_modified"):
+                headers["If-Modified-Since"] = stored["last_modified"]
+
+        async def attempt() -> httpx.Response:
+            return await client.get(url, headers=headers, params=params, timeout=timeout)
+
+        async def hedge_token() -> bool:
+            # A hedge never waits for quota.
+            return await PROVIDER_LIMITER.acquire(provider, time.monotonic())
+
+        started = time.perf_counter()
+        try:
+            resp = await PROVIDER_BREAKERS.hedged(provider, attempt, hedge_token)
+        except httpx.HTTPError:
+            recorded = True
+            await PROVIDER_BREAKERS.record(provider, False, time.perf_counter() - started)
+            raise
+        recorded = True
+        await PROVIDER_BREAKERS.record(provider, resp.status_code < 500, time.perf_counter() - started)
+    finally:
+        # A call shed, cancelled or failed before it reported must not hold a half-open probe
+        # slot until it times out.
+        if not recorded:
+            await PROVIDER_BREAKERS.release(provider)
+    await PROVIDER_LIMITER.observe(provider, resp.headers, resp.status_code)
+    if resp.status_code == 304 and stored:
+        NOT_MODIFIED.inc(provider=provider)
+        return httpx.Response(200, headers={"Content-Type": "application/json"}, content=stored["body"].encode("utf-8"),
+                              request=resp.request, extensions={"not_modified": True})
+    if resp.status_code == 200 and conditional:
+        await INCREMENTAL.save_validators(key, resp.headers.get("etag"), resp.headers.get("last-modified"), resp.text)
+    return resp
+
+
+async def bing_search(query: str, limit: int = 5, timeout_seconds: float = 12.0,
+                      http: Optional[HttpClientRegistry] = None,
+                      deadline: Optional[float] = None, conditional: bool = False) -> List[WebSearchHit]:
     if not BING_API_KEY:
         return []
     headers = {"Ocp-Apim-Subscription-Key": BING_API_KEY, "Accept": "application/json"}
     params = {"q": query, "count": str(limit), "textDecorations": "false", "textFormat": "Raw"}
-    timeout = httpx.Timeout(timeout_seconds, connect=6.0)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        resp = await client.get(BING_ENDPOINT, headers=headers, params=params)
-        resp.raise_for_status()
-        data = resp.json()
+    timeout = deadline_timeout(deadline, timeout_seconds, connect=6.0)
+    resp = await provider_get("bing", BING_ENDPOINT, headers, params, timeout, http, deadline, conditional)
+    if resp is None:
+        return []
+    resp.raise_for_status()
+    data = resp.json()
     results: List[WebSearchHit] = []
     for item in data.get("webPages", {}).get("value", [])[:limit]:
         results.append(WebSearchHit(
@@ -34,17 +108,20 @@ async def bing_search(query: str, limit: int = 5, timeout_seconds: float = 12.0)
     return results
 
 
-async def github_user_search(query: str, per_page: int = 5, timeout_seconds: float = 10.0) -> List[SocialMediaHits]:
+async def github_user_search(query: str, per_page: int = 5, timeout_seconds: float = 10.0,
+                             http: Optional[HttpClientRegistry] = None,
+                             deadline: Optional[float] = None, conditional: bool = False) -> List[SocialMediaHits]:
     if not GITHUB_TOKEN:
         return []
     headers = {"Authorization": f"token {GITHUB_TOKEN}", "Accept": "application/vnd.github+json"}
     params = {"q": f"{query} in:login", "per_page": str(per_page)}
-    url = "https://api.github.com/search/users"
-    timeout = httpx.Timeout(timeout_seconds, connect=6.0)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        resp = await client.get(url, headers=headers, params=params)
-        resp.raise_for_status()
-        data = resp.json()
+    url = f"{GITHUB_API_URL}/search/users"
+    timeout = deadline_timeout(deadline, timeout_seconds, connect=6.0)
+    resp = await provider_get("github_users", url, headers, params, timeout, http, deadline, conditional)
+    if resp is None:
+        return []
+    resp.raise_for_status()
+    data = resp.json()
     results: List[SocialMediaHits] = []
     for u in data.get("items", [])[:per_page]:
         results.append(SocialMediaHits(platform="GitHub", url_found=u.get("html_url"), status="FOUND"))
@@ -1,135 +1,382 @@
 import asyncio
-import importlib
-import json
 import logging
-from typing import Dict, Any, List
+import os
+import time
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from datetime import datetime
-from .models import DigitalFootprintReport, DomainInfo, SocialMediaHits, VulnerabilityHit, WebSearchHit
-from .network_utils import get_from_cache, set_to_cache
+from . import network_utils
+from .models import DigitalFootprintReport, SourceResult, SourceStatus
+from .normalize import normalize_result
+from .history import HISTORY, HISTORY_ENABLED
+from .metrics import ANALYSES_IN_FLIGHT, ANALYSIS_DURATION, CACHE_LOOKUPS, REGISTRY, SOURCE_DURATION, SOURCE_RESULTS
+from .cache import SOURCE_CACHE, CacheEntry, source_cache_key, source_ttl, parse_source_overrides
+from .http_client import HTTP_CLIENTS
+from .incremental import INCREMENTAL, changed_sections, fingerprint
+from .refresh import BackgroundRefresher, HotTargetTracker
+from .registry import SourceRegistry, SourceSpec
+from .scheduler import BULK, INTERACTIVE, FairScheduler
+from .singleflight import SingleFlight
+from .targets import Target, classify_target
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-SOURCE_MODULES = [
-    'sources.domain_checker',
-    'sources.social_media',
-    'sources.vulnerability_db',
-    'sources.search_engine',
-    'sources.deep_search',   
-]
+# Discovered once per process; metadata is read without importing the sources.
+SOURCE_REGISTRY = SourceRegistry.discover()
+
+# Upper bound on simultaneous calls into one source (and thus its upstream provider) per worker.
+SOURCE_DEFAULT_CONCURRENCY = int(os.getenv("SOURCE_DEFAULT_CONCURRENCY", "64"))
+SOURCE_CONCURRENCY: Dict[str, int] = {
+    'sources.deep_search': 8,
+    **parse_source_overrides(os.getenv("SOURCE_CONCURRENCY_LIMITS", "")),
+}
+# Whole-analysis deadline; kept below the gateway's 40s upstream timeout.
+ANALYSIS_DEADLINE_SECONDS = float(os.getenv("ANALYSIS_DEADLINE_SECONDS", "30"))
+# Per-source time budgets come from each source's SOURCE_META; a source gets
+# min(its budget, time left before the deadline). SOURCE_TIMEOUTS overrides them.
+SOURCE_TIMEOUTS: Dict[str, float] = parse_source_overrides(os.getenv("SOURCE_TIMEOUTS", ""), cast=float)
+# Admits source calls once their source has a free slot, interactive before bulk (see scheduler.py).
+SCHEDULER = FairScheduler(lambda module_path: SOURCE_CONCURRENCY.get(module_path, SOURCE_DEFAULT_CONCURRENCY))
+
+# Concurrent analyses of the same target share one execution (per worker and across workers).
+ANALYSIS_FLIGHTS = SingleFlight(namespace="osint:analysis")
+
+# Stale entries are served immediately and refreshed here, off the request path.
+REFRESHER = BackgroundRefresher()
+HOT_TARGETS = HotTargetTracker()
+REGISTRY.gauge("osint_background_refreshes", "Cache refreshes queued or running in this process.", fn=lambda: REFRESHER.in_flight())
+PREWARM_INTERVAL_SECONDS = float(os.getenv("PREWARM_INTERVAL_SECONDS", "60"))
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", "50"))
+# Hot targets whose entries expire within this window are refreshed ahead of time.
+PREWARM_AHEAD_SECONDS = float(os.getenv("PREWARM_AHEAD_SECONDS", "120"))
 
 async def _maybe_awaitable(obj):
     if asyncio.iscoroutine(obj):
         return await obj
     return obj
 
-async def run_osint_analysis(target: str) -> DigitalFootprintReport:
+def _source_kwargs(spec: SourceSpec, deadline: Optional[float] = None, incremental: bool = False) -> Dict[str, Any]:
+    """Shared resources (and the request deadline and mode) injected into sources whose collect_data accepts them."""
+    kwargs: Dict[str, Any] = {}
+    if "http" in spec.accepts:
+        kwargs["http"] = HTTP_CLIENTS
+    if "deadline" in spec.accepts:
+        kwargs["deadline"] = deadline
+    if "incremental" in spec.accepts:
+        kwargs["incremental"] = incremental
+    return kwargs
+
+def new_deadline(timeout_seconds: Optional[float] = None) -> float:
+    """Absolute time.monotonic() deadline for an analysis starting now."""
+    return time.monotonic() + (timeout_seconds or ANALYSIS_DEADLINE_SECONDS)
+
+async def run_osint_analysis(target: str, deadline: Optional[float] = None, priority: str = INTERACTIVE,
+                             incremental: bool = False) -> DigitalFootprintReport:
     """
-    Executes the OSINT analysis with caching and concurrent source execution.
-    Normalizes results coming from each module (either a single model or a list).
+    Entry point for an analysis. Identical concurrent requests are coalesced so the
+    sources run once and every caller receives the same report.
+    Sources still running at `deadline` (a time.monotonic() value) are cancelled and
+    the report is returned with whatever finished in time.
+    `priority` is the scheduler class its source calls queue in (interactive or bulk).
+    `incremental` re-scans against the previous scan: providers are asked conditionally and
+    sources whose output has the same fingerprint reuse their prior result.
+    A caller that joins a running analysis gets it with the priority and mode it was started with.
     """
-    cache_key = f"report:{target}"
+    deadline = deadline if deadline is not None else new_deadline()
+    resolved = classify_target(target)
+    HOT_TARGETS.touch(resolved.value)
+    return await ANALYSIS_FLIGHTS.do(
+        resolved.value,
+        lambda: _run_osint_analysis(resolved, deadline, priority, incremental),
+        encode=lambda report: report.model_dump_json(),
+        decode=DigitalFootprintReport.model_validate_json,
+    )
+
+async def stream_osint_analysis(target: str, deadline: Optional[float] = None, priority: str = INTERACTIVE,
+                                incremental: bool = False) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming variant of run_osint_analysis: yields a "source" event for each source
+    the moment its result is available (cached ones first), then a final "report" event.
+    """
+    deadline = deadline if deadline is not None else new_deadline()
+    resolved = classify_target(target)
+    HOT_TARGETS.touch(resolved.value)
+    parts: Dict[str, SourceResult] = {}
+    statuses: List[SourceStatus] = []
+    started = time.perf_counter()
+    ANALYSES_IN_FLIGHT.inc()
+    try:
+        async for module_path, part, status in _iter_source_results(resolved, deadline, priority, incremental):
+            statuses.append(status)
+            if part is not None:
+                parts[module_path] = part
+            yield {
+                "event": "source",
+                "source": module_path,
+                "status": status.status,
+                "cached": status.status in ("cached", "stale"),
+                "unchanged": status.unchanged,
+                "duration_ms": status.duration_ms,
+                "result": part.model_dump(mode="json") if part is not None else None,
+            }
+    finally:
+        ANALYSES_IN_FLIGHT.dec()
+        ANALYSIS_DURATION.observe(time.perf_counter() - started)
+    report = _build_report(resolved, parts, statuses, incremental)
+    _record_history(report, parts)
+    yield {"event": "report", "report": report.model_dump(mode="json")}
+
+async def _run_osint_analysis(target: Target, deadline: float, priority: str, incremental: bool) -> DigitalFootprintReport:
+    parts: Dict[str, SourceResult] = {}
+    statuses: List[SourceStatus] = []
+    started = time.perf_counter()
+    ANALYSES_IN_FLIGHT.inc()
+    try:
+        async for module_path, part, status in _iter_source_results(target, deadline, priority, incremental):
+            statuses.append(status)
+            if part is not None:
+                parts[module_path] = part
+    finally:
+        ANALYSES_IN_FLIGHT.dec()
+        ANALYSIS_DURATION.observe(time.perf_counter() - started)
+    report = _build_report(target, parts, statuses, incremental)
+    _record_history(report, parts)
+    return report
+
+def _record_history(report: DigitalFootprintReport, parts: Dict[str, SourceResult]):
+    # A fully cached report adds nothing the history does not already hold.
+    if HISTORY_ENABLED and not report.is_cached:
+        HISTORY.record(report, parts)
 
-    cached_report_json = get_from_cache(cache_key)
-    if cached_report_json:
+async def get_cached_report(target: str) -> Optional[DigitalFootprintReport]:
+    """
+    Returns the report if every applicable source is cached (stale entries included),
+    without running or queueing any source. Stale sources are refreshed in the background.
+    """
+    resolved = classify_target(target)
+    specs = SOURCE_REGISTRY.for_target_type(resolved.kind)
+    _, _, entries = await _load_cached_parts(resolved, specs)
+    if not specs or len(entries) < len(specs):
+        return None
+    HOT_TARGETS.touch(resolved.value)
+    _refresh_stale(resolved, specs, entries)
+    parts = {m: entry.value for m, entry in entries.items()}
+    return _build_report(resolved, parts, [SourceStatus(source=m, status="stale" if e.is_stale else "cached") for m, e in entries.items()])
+
+async def _load_cached_parts(target: Target, specs: List[SourceSpec]) -> Tuple[Dict[str, str], Dict[str, int], Dict[str, CacheEntry]]:
+    cache_keys = {spec.name: source_cache_key(spec.name, target.value) for spec in specs}
+    ttls = {key: source_ttl(module_path) for module_path, key in cache_keys.items()}
+    cached = await SOURCE_CACHE.get_many(list(cache_keys.values()), SourceResult, ttls)
+    entries = {module_path: cached[key] for module_path, key in cache_keys.items() if cached.get(key) is not None}
+    return cache_keys, ttls, entries
+
+def _refresh_stale(target: Target, specs: List[SourceSpec], entries: Dict[str, CacheEntry]):
+    stale = [spec for spec in specs if spec.name in entries and entries[spec.name].is_stale]
+    if stale:
+        REFRESHER.schedule(target.value, lambda: refresh_sources(target, stale))
+
+async def refresh_sources(target: Target, specs: List[SourceSpec]):
+    """
+    Re-runs `specs` for `target` under a fresh deadline and rewrites their cache entries.
+    Refreshes are incremental, so unchanged provider responses cost a 304 rather than a full query.
+    """
+    deadline = new_deadline()
+    cache_keys = {spec.name: source_cache_key(spec.name, target.value) for spec in specs}
+    ttls = {key: source_ttl(module_path) for module_path, key in cache_keys.items()}
+    for spec in specs:
+        spec.load()
+    results = await asyncio.gather(*(_run_source(spec, target, deadline, BULK, incremental=True) for spec in specs))
+    fresh = {cache_keys[status.source]: part for part, status in results if part is not None}
+    if fresh:
+        await SOURCE_CACHE.set_many(fresh, ttls)
+    logger.info("Refreshed %d/%d sources of target: %s", len(fresh), len(specs), target.value)
+
+async def prewarm_hot_targets(limit: int = PREWARM_TOP_N, ahead_seconds: float = PREWARM_AHEAD_SECONDS) -> int:
+    """
+    Schedules refreshes for the hottest targets whose entries are missing, stale or
+    about to expire. Returns the number of targets queued.
+    """
+    scheduled = 0
+    cutoff = time.time() + ahead_seconds
+    for value in await HOT_TARGETS.top(limit):
+        target = classify_target(value)
+        specs = SOURCE_REGISTRY.for_target_type(target.kind)
+        _, _, entries = await _load_cached_parts(target, specs)
+        due = [spec for spec in specs if spec.name not in entries or entries[spec.name].fresh_until <= cutoff]
+        if due and REFRESHER.schedule(target.value, lambda t=target, d=due: refresh_sources(t, d)):
+            scheduled += 1
+    return scheduled
+
+async def prewarm_loop(interval_seconds: float = PREWARM_INTERVAL_SECONDS):
+    """
+    Runs for the life of the app. Every worker flushes its access counts each interval;
+    one worker at a time (Redis lock) runs the pre-warm pass.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
         try:
-            report_data = json.loads(cached_report_json)
-            report_data['is_cached'] = True
-            report_data['timestamp'] = datetime.utcnow().isoformat() + "Z (Cached)"
-            logger.info("Cache hit for target: %s", target)
-            return DigitalFootprintReport(**report_data)
-        except Exception:
-            logger.warning("Corrupt cache entry for %s, regenerating.", target)
-
-    tasks = []
-    for module_path in SOURCE_MODULES:
+            client = network_utils.get_redis()
+            if client is not None:
+                await HOT_TARGETS.flush()
+                if not await client.set("osint:prewarm:lock", "1", nx=True, px=int(interval_seconds * 1000)):
+                    continue
+            queued = await prewarm_hot_targets()
+            if queued:
+                logger.info("Pre-warming %d hot target(s)", queued)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Pre-warm pass failed: %s", e)
+
+async def _run_source(spec: SourceSpec, target: Target, deadline: float, priority: str = INTERACTIVE,
+                      incremental: bool = False) -> Tuple[Optional[SourceResult], SourceStatus]:
+    """
+    Runs one source within min(its own timeout, time left until the deadline), queueing included.
+    In incremental mode, a result with the same fingerprint as the previous incremental scan's
+    is replaced by that scan's normalized result; a changed result is remembered for the next
+    one. Full scans leave the incremental state alone.
+    """
+    module_path = spec.name
+    started = time.perf_counter()
+    budget = min(SOURCE_TIMEOUTS.get(module_path, spec.timeout), deadline - time.monotonic())
+
+    async def guarded():
+        async with SCHEDULER.slot(module_path, priority, spec.cost):
+            return await _maybe_awaitable(spec.collect(target.value, **_source_kwargs(spec, deadline, incremental)))
+
+    part: Optional[SourceResult] = None
+    error: Optional[str] = None
+    unchanged = False
+    refreshed: List[str] = []
+    try:
+        if budget <= 0:
+            raise asyncio.TimeoutError()
+        raw = await asyncio.wait_for(guarded(), timeout=budget)
+        digest = fingerprint(raw) if incremental else None
+        prior = await INCREMENTAL.prior(module_path, target.value) if incremental else None
+        if prior is not None and prior[0] == digest:
+            part, unchanged = prior[1], True
+        else:
+            part = normalize_result(raw)
+            refreshed = changed_sections(prior[1] if prior else None, part)
+            if incremental:
+                await INCREMENTAL.remember(module_path, target.value, digest, part)
+        state = "completed"
+    except asyncio.TimeoutError:
+        logger.warning("Source %s timed out after %.2fs for %s", module_path, max(budget, 0), target.value)
+        state = "timeout"
+    except Exception as e:
+        logger.error("Source task error in %s: %s", module_path, e)
+        state = "failed"
+        error = type(e).__name__
+    elapsed = time.perf_counter() - started
+    SOURCE_DURATION.observe(elapsed, source=module_path, status=state)
+    duration_ms = round(elapsed * 1000, 1)
+    return part, SourceStatus(source=module_path, status=state, duration_ms=duration_ms, error=error,
+                              unchanged=unchanged, refreshed=refreshed)
+
+async def _iter_source_results(target: Target, deadline: float, priority: str = INTERACTIVE,
+                               incremental: bool = False) -> AsyncIterator[Tuple[str, Optional[SourceResult], SourceStatus]]:
+    """
+    Executes the OSINT analysis with per-source caching and concurrent source execution.
+    Each source's normalized result is cached under its own key and TTL, so a partial
+    cache hit only re-runs the sources whose entries are missing or expired.
+    Only sources that support the target's type are run.
+    Yields (module_path, result, status) as each source finishes; result is None when
+    the source failed or missed its time budget.
+    """
+    specs = SOURCE_REGISTRY.for_target_type(target.kind)
+    cache_keys, ttls, entries = await _load_cached_parts(target, specs)
+    parts = {module_path: entry.value for module_path, entry in entries.items()}
+    for spec in specs:
+        entry = entries.get(spec.name)
+        CACHE_LOOKUPS.inc(source=spec.name, result="miss" if entry is None else "stale" if entry.is_stale else "hit")
+
+    tasks: Dict[asyncio.Task, str] = {}
+    for spec in specs:
+        if spec.name in parts:
+            continue
         try:
-            module = importlib.import_module(module_path)
-            collect = getattr(module, "collect_data", None)
-            if collect is None:
-                logger.warning("Module %s has no collect_data function, skipping.", module_path)
-                continue
-            tasks.append(asyncio.create_task(_maybe_awaitable(collect(target))))
+            spec.load()
         except Exception as e:
-            logger.error("Could not load module %s: %s", module_path, e)
+            logger.error("Could not load module %s: %s", spec.name, e)
+            continue
+        tasks[asyncio.create_task(_run_source(spec, target, deadline, priority, incremental))] = spec.name
+
+    if not tasks and not parts:
+        raise RuntimeError(f"No data sources available for {target.kind} targets.")
 
-    if not tasks:
-        raise RuntimeError("No data sources available to perform analysis.")
+    if parts:
+        logger.info("Cache hit for %d/%d sources of target: %s", len(parts), len(specs), target.value)
 
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    # Expired entries still inside the stale window are served now and refreshed in the background.
+    _refresh_stale(target, specs, entries)
+    for module_path, entry in entries.items():
+        status = SourceStatus(source=module_path, status="stale" if entry.is_stale else "cached")
+        SOURCE_RESULTS.inc(source=module_path, status=status.status)
+        yield module_path, entry.value, status
 
+    fresh: Dict[str, SourceResult] = {}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                module_path = tasks[task]
+                part, status = task.result()
+                SOURCE_RESULTS.inc(source=module_path, status=status.status)
+                if part is not None:
+                    fresh[cache_keys[module_path]] = part
+                yield module_path, part, status
+    finally:
+        # A streaming client that disconnects early must not leave sources running.
+        for task in pending:
+            task.cancel()
+        if fresh:
+            try:
+                await SOURCE_CACHE.set_many(fresh, ttls)
+            except Exception:
+                logger.debug("Failed to cache source results for %s", target.value)
+
+def _build_report(target: Target, parts: Dict[str, SourceResult], statuses: List[SourceStatus],
+                  incremental: bool = False) -> DigitalFootprintReport:
     final_report_data: Dict[str, Any] = {
         "domain_results": None,
         "social_media_hits": [],
         "vulnerability_hits": [],
         "web_search_data": [],
     }
-
-    for result in results:
-        if isinstance(result, Exception):
-            logger.error("Source task error: %s", result)
+    for module_path in SOURCE_REGISTRY.names():
+        part = parts.get(module_path)
+        if part is None:
             continue
-
-        if isinstance(result, DomainInfo):
-            final_report_data['domain_results'] = result
-            continue
-
-        if isinstance(result, list):
-            if len(result) > 0 and (isinstance(result[0], SocialMediaHits) or (isinstance(result[0], dict) and 'platform' in result[0])):
-                parsed = []
-                for item in result:
-                    if isinstance(item, SocialMediaHits):
-                        parsed.append(item)
-                    else:
-                        try:
-                            parsed.append(SocialMediaHits.parse_obj(item))
-                        except Exception:
-                            logger.debug("Skipping invalid social media item: %s", item)
-                final_report_data['social_media_hits'].extend(parsed)
-                continue
-
-            if len(result) > 0 and (isinstance(result[0], VulnerabilityHit) or (isinstance(result[0], dict) and 'source' in result[0] and 'severity' in result[0])):
-                parsed = []
-                for item in result:
-                    if isinstance(item, VulnerabilityHit):
-                        parsed.append(item)
-                    else:
-                        try:
-                            parsed.append(VulnerabilityHit.parse_obj(item))
-                        except Exception:
-                            logger.debug("Skipping invalid vulnerability item: %s", item)
-                final_report_data['vulnerability_hits'].extend(parsed)
-                continue
-
-            if len(result) > 0 and (isinstance(result[0], WebSearchHit) or (isinstance(result[0], dict) and 'source' in result[0] and 'result_type' in result[0])):
-                parsed = []
-                for item in result:
-                    if isinstance(item, WebSearchHit):
-                        parsed.append(item)
-                    else:
-                        try:
-                            parsed.append(WebSearchHit.parse_obj(item))
-                        except Exception:
-                            logger.debug("Skipping invalid web search item: %s", item)
-                final_report_data['web_search_data'].extend(parsed)
-                continue
+        if part.domain_results is not None:
+            final_report_data['domain_results'] = part.domain_results
+        final_report_data['social_media_hits'].extend(part.social_media_hits)
+        final_report_data['vulnerability_hits'].extend(part.vulnerability_hits)
+        final_report_data['web_search_data'].extend(part.web_search_data)
 
     found_profiles = len([h for h in final_report_data['social_media_hits'] if getattr(h, "status", "") == "FOUND"])
     vulns_found = len(final_report_data['vulnerability_hits'])
 
     summary = f"Analysis complete. Found {found_profiles} social profiles and {vulns_found} potential vulnerabilities."
+    missing = [s.source for s in statuses if s.status in ("timeout", "failed")]
+    if missing:
+        summary += f" Partial result: {len(missing)} source(s) timed out or failed."
 
-    report = DigitalFootprintReport(
-        target=target,
-        timestamp=datetime.utcnow().isoformat() + "Z (Live)",
+    order = {module_path: i for i, module_path in enumerate(SOURCE_REGISTRY.names())}
+    is_cached = all(s.status in ("cached", "stale") for s in statuses)
+    refreshed = {section for s in statuses for section in s.refreshed}
+    return DigitalFootprintReport(
+        target=target.value,
+        target_type=target.kind,
+        timestamp=datetime.utcnow().isoformat() + ("Z (Cached)" if is_cached else "Z (Live)"),
         summary=summary,
-        is_cached=False,
+        is_cached=is_cached,
+        is_partial=bool(missing),
+        is_stale=any(s.status == "stale" for s in statuses),
+        sources=sorted(statuses, key=lambda s: order.get(s.source, len(order))),
+        is_incremental=incremental,
+        refreshed_sections=[section for section in final_report_data if section in refreshed],
         **final_report_data
     )
-
-    try:
-        set_to_cache(cache_key, report.model_dump_json(), ttl_seconds=3600)
-    except Exception:
-        logger.debug("Failed to set cache for %s", cache_key)
-
-    return report
\ No newline at end of file
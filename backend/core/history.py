@@ -0,0 +1,253 @@
+"""
+Persistent scan history.
+Every analysis that ran at least one source live is recorded in a local SQLite
+database (WAL mode). The database has one row per scan and one row per hit, and
+hits are indexed by target, source module, platform, CVE id and URL.
+Writes never happen on the request path: scans are queued, with their hits in the
+compact form of backend.core.hits, and a single writer task commits them in batches
+from a worker thread. Readers use their own connections,
+which WAL lets run alongside the writer.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from .hits import Hit, compact_result
+from .models import DigitalFootprintReport, SourceResult
+
+logger = logging.getLogger(__name__)
+
+HISTORY_ENABLED = os.getenv("HISTORY_ENABLED", "1") == "1"
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", os.path.join("data", "osint_history.sqlite3"))
+HISTORY_BATCH_SIZE = int(os.getenv("HISTORY_BATCH_SIZE", "200"))
+HISTORY_FLUSH_SECONDS = float(os.getenv("HISTORY_FLUSH_SECONDS", "1.0"))
+HISTORY_QUEUE_MAX = int(os.getenv("HISTORY_QUEUE_MAX", "10000"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    target TEXT NOT NULL,
+    target_type TEXT,
+    scanned_at REAL NOT NULL,
+    is_partial INTEGER NOT NULL DEFAULT 0,
+    summary TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_scans_target ON scans (target, scanned_at);
+CREATE TABLE IF NOT EXISTS hits (
+    scan_id INTEGER NOT NULL REFERENCES scans (id),
+    target TEXT NOT NULL,
+    module TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    provider TEXT,
+    platform TEXT,
+    cve_id TEXT,
+    url TEXT,
+    fingerprint TEXT NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_hits_scan ON hits (scan_id);
+CREATE INDEX IF NOT EXISTS idx_hits_target ON hits (target, scan_id);
+CREATE INDEX IF NOT EXISTS idx_hits_module ON hits (module, scan_id);
+CREATE INDEX IF NOT EXISTS idx_hits_platform ON hits (platform, scan_id) WHERE platform IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_hits_cve ON hits (cve_id, scan_id) WHERE cve_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_hits_url ON hits (url, scan_id) WHERE url IS NOT NULL;
+"""
+
+_HIT_FILTERS = ("target", "module", "platform", "cve_id", "url")
+
+
+def _fingerprint(kind: str, data: Dict[str, Any]) -> str:
+    canonical = json.dumps([kind, data], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+# (scanned_at, target, target_type, is_partial, summary, {module: hits})
+QueuedScan = Tuple[float, str, str, bool, Optional[str], Dict[str, List[Hit]]]
+
+
+def queued_scan(scanned_at: float, report: DigitalFootprintReport, parts: Dict[str, SourceResult]) -> QueuedScan:
+    """What the writer needs from a scan. Hits are kept in compact form; the report itself is not kept."""
+    return (scanned_at, report.target, report.target_type, report.is_partial, report.summary,
+            {module: list(compact_result(part)) for module, part in parts.items()})
+
+
+class HistoryStore:
+    def __init__(self, path: str = HISTORY_DB_PATH, batch_size: int = HISTORY_BATCH_SIZE,
+                 flush_seconds: float = HISTORY_FLUSH_SECONDS, queue_max: int = HISTORY_QUEUE_MAX):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.queue_max = queue_max
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _writer_connection(self) -> sqlite3.Connection:
+        if self._writer_conn is None:
+            self._writer_conn = self._connect()
+            self._writer_conn.executescript(_SCHEMA)
+        return self._writer_conn
+
+    def record(self, report: DigitalFootprintReport, parts: Dict[str, SourceResult]):
+        """Queues a scan for the background writer. Never blocks; drops the scan if the queue is full."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._queue = asyncio.Queue(maxsize=self.queue_max)
+            self._writer = None
+            self._loop = loop
+        if self._writer is None or self._writer.done():
+            self._writer = loop.create_task(self._write_loop())
+        try:
+            self._queue.put_nowait(queued_scan(time.time(), report, parts))
+        except asyncio.QueueFull:
+            logger.warning("History queue full; dropping scan of %s", report.target)
+
+    async def _write_loop(self):
+        queue = self._queue
+        while True:
+            batch = [await queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.flush_seconds
+            while len(batch) < self.batch_size:
+                remaining = deadline - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await asyncio.to_thread(self.write_batch, batch)
+            except Exception as e:
+                logger.error("Failed to write %d scan(s) to history: %s", len(batch), e)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def write_batch(self, batch: List[QueuedScan]):
+        """Writes scans in one transaction. Runs in a worker thread."""
+        conn = self._writer_connection()
+        with conn:
+            for scanned_at, target, target_type, is_partial, summary, hits in batch:
+                scan_id = conn.execute(
+                    "INSERT INTO scans (target, target_type, scanned_at, is_partial, summary) VALUES (?, ?, ?, ?, ?)",
+                    (target, target_type, scanned_at, int(is_partial), summary),
+                ).lastrowid
+                rows = []
+                for module, module_hits in hits.items():
+                    for kind, provider, platform, cve_id, url, data in (hit.row() for hit in module_hits):
+                        rows.append((scan_id, target, module, kind, provider, platform, cve_id, url,
+                                     _fingerprint(kind, data), json.dumps(data, default=str)))
+                conn.executemany(
+                    "INSERT INTO hits (scan_id, target, module, kind, provider, platform, cve_id, url, fingerprint, payload)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+
+    async def flush(self):
+        """Waits until every queued scan is written."""
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    async def aclose(self):
+        await self.flush()
+        if self._writer is not None:
+            self._writer.cancel()
+            self._writer = None
+        if self._writer_conn is not None:
+            self._writer_conn.close()
+            self._writer_conn = None
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[sqlite3.Row]:
+        if not os.path.exists(self.path):
+            return []
+        conn = self._connect()
+        try:
+            return conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            if "no such table" in str(e):
+                return []
+            raise
+        finally:
+            conn.close()
+
+    async def scans(self, target: str, limit: int = 20) -> List[Dict[str, Any]]:
+        rows = await asyncio.to_thread(
+            self._query,
+            "SELECT s.id, s.target, s.target_type, s.scanned_at, s.is_partial, s.summary,"
+            " (SELECT COUNT(*) FROM hits h WHERE h.scan_id = s.id) AS hit_count"
+            " FROM scans s WHERE s.target = ? ORDER BY s.scanned_at DESC, s.id DESC LIMIT ?",
+            (target, limit),
+        )
+        return [
+            {"scan_id": r["id"], "target": r["target"], "target_type": r["target_type"], "scanned_at": r["scanned_at"],
+             "is_partial": bool(r["is_partial"]), "summary": r["summary"], "hit_count": r["hit_count"]}
+            for r in rows
+        ]
+
+    async def hits(self, limit: int = 100, **filters: Optional[str]) -> List[Dict[str, Any]]:
+        """Most recent hits matching every given filter (target, module, platform, cve_id, url)."""
+        clauses = [f"h.{name} = ?" for name in _HIT_FILTERS if filters.get(name)]
+        params = [filters[name] for name in _HIT_FILTERS if filters.get(name)]
+        if not clauses:
+            raise ValueError(f"At least one filter is required: {', '.join(_HIT_FILTERS)}")
+        rows = await asyncio.to_thread(
+            self._query,
+            "SELECT h.scan_id, h.target, h.module, h.kind, h.payload, s.scanned_at FROM hits h"
+            f" JOIN scans s ON s.id = h.scan_id WHERE {' AND '.join(clauses)} ORDER BY h.scan_id DESC LIMIT ?",
+            (*params, limit),
+        )
+        return [
+            {"scan_id": r["scan_id"], "target": r["target"], "source": r["module"], "kind": r["kind"],
+             "scanned_at": r["scanned_at"], "hit": json.loads(r["payload"])}
+            for r in rows
+        ]
+
+    async def diff(self, target: str, from_scan: Optional[int] = None, to_scan: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Hits added and removed between two scans of `target`; defaults to the two most
+        recent scans. Returns None when there are not two scans to compare.
+        """
+        if from_scan is None or to_scan is None:
+            recent = [s["scan_id"] for s in await self.scans(target, limit=2)]
+            if len(recent) < 2:
+                return None
+            to_scan = to_scan if to_scan is not None else recent[0]
+            from_scan = from_scan if from_scan is not None else recent[1]
+
+        rows = await asyncio.to_thread(
+            self._query,
+            "SELECT scan_id, module, kind, fingerprint, payload FROM hits WHERE target = ? AND scan_id IN (?, ?)",
+            (target, from_scan, to_scan),
+        )
+        before = {r["fingerprint"]: r for r in rows if r["scan_id"] == from_scan}
+        after = {r["fingerprint"]: r for r in rows if r["scan_id"] == to_scan}
+
+        def render(row):
+            return {"source": row["module"], "kind": row["kind"], "hit": json.loads(row["payload"])}
+
+        return {
+            "target": target,
+            "from_scan": from_scan,
+            "to_scan": to_scan,
+            "added": [render(r) for fp, r in after.items() if fp not in before],
+            "removed": [render(r) for fp, r in before.items() if fp not in after],
+            "unchanged": len(before.keys() & after.keys()),
+        }
+
+
+HISTORY = HistoryStore()
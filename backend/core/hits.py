@@ -0,0 +1,111 @@
+"""
+Compact in-memory hits for the history writer's queue.
+A pydantic hit model instance carries a __dict__ and three bookkeeping slots, and every
+instance holds its own copy of strings like "GitHub" or "FOUND". The slotted dataclasses
+here carry none of that. Low-cardinality strings (platforms, sources, statuses, result
+types, severities and web-data keys) are interned, so a large backlog shares one copy of
+each. The history writer queues scans in this form (backend.core.history): a scan waiting
+for its batch holds compact hits instead of the report and its pydantic results, and the
+writer thread builds rows from them without going back through pydantic. Source-level
+dedup (deep_search) sees one scan's hits at a time and stays on the pydantic models.
+"""
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+from pydantic_core import to_jsonable_python
+from .models import DomainInfo, SocialMediaHits, SourceResult, VulnerabilityHit, WebSearchHit
+
+_intern = sys.intern
+
+# (kind, provider, platform, cve_id, url, data), as stored in the history's hits table.
+Row = Tuple[str, Optional[str], Optional[str], Optional[str], Optional[str], Dict[str, Any]]
+
+
+def _compact_data(data: Any) -> Any:
+    if isinstance(data, dict):
+        return {_intern(k) if isinstance(k, str) else k: v for k, v in data.items()}
+    return data
+
+
+@dataclass(slots=True)
+class SocialHit:
+    platform: str
+    status: str
+    url_found: Optional[str] = None
+
+    @classmethod
+    def from_fields(cls, platform: str, status: str, url_found: Optional[str] = None) -> "SocialHit":
+        return cls(_intern(platform), _intern(status), url_found)
+
+    def row(self) -> Row:
+        data = {"platform": self.platform, "url_found": self.url_found, "status": self.status}
+        return "social", None, self.platform, None, self.url_found, data
+
+
+@dataclass(slots=True)
+class VulnHit:
+    source: str
+    severity: str
+    description: str
+    cve_id: Optional[str] = None
+
+    @classmethod
+    def from_fields(cls, source: str, severity: str, description: str, cve_id: Optional[str] = None) -> "VulnHit":
+        return cls(_intern(source), _intern(severity), description, cve_id)
+
+    def row(self) -> Row:
+        data = {"source": self.source, "cve_id": self.cve_id, "severity": self.severity, "description": self.description}
+        return "vulnerability", self.source, None, self.cve_id, None, data
+
+
+@dataclass(slots=True)
+class WebHit:
+    source: str
+    result_type: str
+    data: Any = None
+
+    @classmethod
+    def from_fields(cls, source: str, result_type: str, data: Any = None) -> "WebHit":
+        return cls(_intern(source), _intern(result_type), _compact_data(data))
+
+    def row(self) -> Row:
+        url = (self.data.get("url") or self.data.get("html_url")) if isinstance(self.data, dict) else None
+        # Same payload as WebSearchHit.model_dump(mode="json"), so history fingerprints do not change.
+        data = to_jsonable_python(self.data, fallback=str)
+        return "web", self.source, None, None, url, {"source": self.source, "result_type": self.result_type, "data": data}
+
+
+@dataclass(slots=True)
+class DomainHit:
+    # Already JSON-ready; a source returns at most one.
+    data: Dict[str, Any]
+
+    def row(self) -> Row:
+        return "domain", None, None, None, None, self.data
+
+
+Hit = Union[SocialHit, VulnHit, WebHit, DomainHit]
+
+
+def compact(item: Any) -> Optional[Hit]:
+    """The compact form of a hit model, or None for anything else."""
+    if isinstance(item, SocialMediaHits):
+        return SocialHit.from_fields(item.platform, item.status, item.url_found)
+    if isinstance(item, VulnerabilityHit):
+        return VulnHit.from_fields(item.source, item.severity, item.description, item.cve_id)
+    if isinstance(item, WebSearchHit):
+        return WebHit.from_fields(item.source, item.result_type, item.data)
+    if isinstance(item, DomainInfo):
+        return DomainHit(item.model_dump(mode="json"))
+    return None
+
+
+def compact_result(part: SourceResult) -> Iterator[Hit]:
+    """Every hit of one source's result, domain info first, then in section order."""
+    if part.domain_results is not None:
+        yield compact(part.domain_results)
+    for section in (part.social_media_hits, part.vulnerability_hits, part.web_search_data):
+        for item in section:
+            hit = compact(item)
+            if hit is not None:
+                yield hit
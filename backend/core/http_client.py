@@ -0,0 +1,105 @@
+"""
+Process-wide registry of pooled httpx.AsyncClient instances.
+One client is kept per upstream host so each provider gets its own connection
+limits and keep-alive pool. HTTP/2 is enabled when the optional `h2` package is installed.
+The FastAPI lifespan in backend/api.py opens and closes the shared registry.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional
+import httpx
+from .metrics import UPSTREAM_DURATION, UPSTREAM_RESPONSES
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except Exception:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "20"))
+HTTP_MAX_KEEPALIVE_PER_HOST = int(os.getenv("HTTP_MAX_KEEPALIVE_PER_HOST", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))
+HTTP_DEFAULT_TIMEOUT = httpx.Timeout(15.0, connect=10.0)
+
+
+class HttpClientRegistry:
+    """
+    Hands out one shared AsyncClient per host. Clients are created lazily, so the
+    registry also works outside the FastAPI app (tests, scripts).
+    """
+
+    def __init__(self, http2: bool = HTTP2_AVAILABLE):
+        self.http2 = http2
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Loading the CA bundle costs tens of ms; one context is shared by every host's client.
+        self._ssl_context = None
+
+    def _new_client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS_PER_HOST,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_PER_HOST,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+        if self._ssl_context is None:
+            self._ssl_context = httpx.create_ssl_context()
+        return httpx.AsyncClient(limits=limits, timeout=HTTP_DEFAULT_TIMEOUT, http2=self.http2, verify=self._ssl_context,
+                                 event_hooks={"request": [_mark_sent], "response": [_record_response]})
+
+    def client_for(self, url: str) -> httpx.AsyncClient:
+        """Returns the pooled client serving the host of `url`."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Pooled connections are bound to the loop that opened them.
+            self._clients = {}
+            self._loop = loop
+        host = httpx.URL(url).host
+        client = self._clients.get(host)
+        if client is None or client.is_closed:
+            client = self._new_client()
+            self._clients[host] = client
+        return client
+
+    async def aclose(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.debug("Failed to close HTTP client: %s", e)
+
+
+async def _mark_sent(request: httpx.Request):
+    request.extensions["osint_sent_at"] = time.perf_counter()
+
+
+async def _record_response(response: httpx.Response):
+    host = response.request.url.host
+    UPSTREAM_RESPONSES.inc(host=host, code=str(response.status_code))
+    sent_at = response.request.extensions.get("osint_sent_at")
+    if sent_at is not None:
+        UPSTREAM_DURATION.observe(time.perf_counter() - sent_at, host=host)
+
+
+HTTP_CLIENTS = HttpClientRegistry()
+
+
+def get_http_client(url: str, registry: Optional[HttpClientRegistry] = None) -> httpx.AsyncClient:
+    """Shortcut used by sources and connectors; falls back to the process-wide registry."""
+    return (registry or HTTP_CLIENTS).client_for(url)
+
+
+def deadline_timeout(deadline: Optional[float], total: float, connect: float) -> httpx.Timeout:
+    """httpx timeout clamped to the time left before a time.monotonic() deadline."""
+    if deadline is None:
+        return httpx.Timeout(total, connect=connect)
+    remaining = max(0.05, deadline - time.monotonic())
+    return httpx.Timeout(min(total, remaining), connect=min(connect, remaining))
+
+
+async def close_http_clients():
+    await HTTP_CLIENTS.aclose()
@@ -0,0 +1,105 @@
+"""
+State for incremental re-scans, kept much longer than the result cache.
+- HTTP validators: for each provider request (provider, URL and query), the ETag and
+  Last-Modified of the last 200 response, plus its body. An incremental scan sends them
+  as If-None-Match / If-Modified-Since. On a 304 the stored body is replayed, so the
+  source parses it exactly as before. GitHub does not count 304s against the search quota.
+- Result fingerprints: for each source and target, a hash of the source's raw output and
+  the normalized SourceResult built from it. When a re-scan produces the same
+  fingerprint, the prior result is reused and the source is reported as unchanged.
+Only incremental scans read or write this state. Full scans, which are most of the traffic
+and all of a plain batch run, add nothing to it. Entries live in Redis
+(INCREMENTAL_TTL_SECONDS) with an in-process LRU in front, which is also all there is when
+Redis is down.
+"""
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, Mapping, Optional, Tuple
+from pydantic_core import to_jsonable_python
+from . import network_utils
+from .cache import LocalTTLCache
+from .models import SourceResult
+from .normalize import SECTION_MODELS
+
+logger = logging.getLogger(__name__)
+
+INCREMENTAL_TTL_SECONDS = int(os.getenv("INCREMENTAL_TTL_SECONDS", str(30 * 24 * 3600)))
+INCREMENTAL_LOCAL_MAX_ENTRIES = int(os.getenv("INCREMENTAL_LOCAL_MAX_ENTRIES", "4096"))
+INCREMENTAL_LOCAL_MAX_BYTES = int(os.getenv("INCREMENTAL_LOCAL_MAX_BYTES", str(32 * 1024 * 1024)))
+# Bodies larger than this are not kept, so their requests are never sent conditionally.
+INCREMENTAL_MAX_BODY_BYTES = int(os.getenv("INCREMENTAL_MAX_BODY_BYTES", str(512 * 1024)))
+
+
+def fingerprint(value: Any) -> str:
+    """Stable hash of a source's raw output (models, dicts and lists of them)."""
+    canonical = json.dumps(to_jsonable_python(value, fallback=str), sort_keys=True, separators=(",", ":"))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def changed_sections(before: Optional[SourceResult], after: SourceResult) -> list:
+    """Report sections whose content differs between two results of the same source."""
+    changed = []
+    for section in SECTION_MODELS:
+        value = getattr(after, section)
+        if (before is None and value) or (before is not None and value != getattr(before, section)):
+            changed.append(section)
+    return changed
+
+
+def request_key(provider: str, url: str, params: Optional[Mapping[str, Any]] = None) -> str:
+    query = "&".join(f"{k}={v}" for k, v in sorted((params or {}).items()))
+    return hashlib.blake2b(f"{provider} {url}?{query}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+class IncrementalStore:
+    def __init__(self, namespace: str = "osint:incr", ttl_seconds: int = INCREMENTAL_TTL_SECONDS,
+                 local: Optional[LocalTTLCache] = None):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+        self.local = local if local is not None else LocalTTLCache(INCREMENTAL_LOCAL_MAX_ENTRIES, INCREMENTAL_LOCAL_MAX_BYTES)
+
+    async def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        raw = self.local.get(key)
+        if raw is None:
+            raw = await network_utils.get_from_cache(key)
+            if raw is None:
+                return None
+            self.local.set(key, raw, self.ttl_seconds)
+        try:
+            return json.loads(raw)
+        except ValueError:
+            logger.warning("Corrupt incremental entry %s; ignoring it.", key)
+            return None
+
+    async def _set(self, key: str, value: Dict[str, Any]):
+        raw = json.dumps(value, separators=(",", ":"))
+        self.local.set(key, raw, self.ttl_seconds)
+        await network_utils.set_to_cache(key, raw, ttl_seconds=self.ttl_seconds)
+
+    async def validators(self, key: str) -> Optional[Dict[str, Any]]:
+        """{"etag", "last_modified", "body"} of the last 200 response to this request."""
+        return await self._get(f"{self.namespace}:http:{key}")
+
+    async def save_validators(self, key: str, etag: Optional[str], last_modified: Optional[str], body: str):
+        if not (etag or last_modified) or len(body) > INCREMENTAL_MAX_BODY_BYTES:
+            return
+        await self._set(f"{self.namespace}:http:{key}", {"etag": etag, "last_modified": last_modified, "body": body})
+
+    async def prior(self, module_path: str, target: str) -> Optional[Tuple[str, SourceResult]]:
+        """(fingerprint, normalized result) recorded by the last scan of `target` with this source."""
+        entry = await self._get(f"{self.namespace}:result:{module_path}:{target}")
+        if entry is None:
+            return None
+        try:
+            return entry["fingerprint"], SourceResult.model_validate(entry["result"])
+        except Exception:
+            return None
+
+    async def remember(self, module_path: str, target: str, digest: str, result: SourceResult):
+        await self._set(f"{self.namespace}:result:{module_path}:{target}",
+                        {"fingerprint": digest, "result": result.model_dump(mode="json")})
+
+
+INCREMENTAL = IncrementalStore()
@@ -0,0 +1,299 @@
+"""
+Job queue for analyses that should not run inside the request handler.
+Jobs are appended to a Redis stream and consumed by a consumer group of worker
+processes (`python -m backend.worker`), which scales across cores and across nodes that
+share Redis. Each job keeps a status hash (`osint:job:<id>`) holding the final report
+and an event stream (`osint:job:<id>:events`) carrying the same "source"/"report"
+events as /analyze/stream, so clients can poll a job or follow it live.
+A job left pending by a worker that died is reclaimed by another worker once it has been
+idle for JOB_CLAIM_IDLE_SECONDS. A worker re-claims the jobs it is running every third of
+that, so a slow job is never taken over while it is still running. When Redis is
+unavailable, jobs run in this process instead.
+Jobs run in the scheduler's bulk class, behind interactive /analyze calls.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from . import network_utils
+from .gatherer import new_deadline, stream_osint_analysis
+from .scheduler import BULK
+
+logger = logging.getLogger(__name__)
+
+JOB_STREAM = os.getenv("JOB_STREAM", "osint:jobs")
+JOB_GROUP = os.getenv("JOB_GROUP", "osint-workers")
+JOB_TTL_SECONDS = int(os.getenv("JOB_TTL_SECONDS", "3600"))
+JOB_STREAM_MAXLEN = int(os.getenv("JOB_STREAM_MAXLEN", "100000"))
+# Running jobs heartbeat (XCLAIM) every third of this, so it only bounds how long a dead worker's job waits.
+JOB_CLAIM_IDLE_SECONDS = float(os.getenv("JOB_CLAIM_IDLE_SECONDS", "120"))
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "16"))
+JOB_LOCAL_CONCURRENCY = int(os.getenv("JOB_LOCAL_CONCURRENCY", "8"))
+# Blocking reads stay below the Redis socket timeout so they never trip it.
+JOB_BLOCK_MS = max(10, int(min(1.0, network_utils.REDIS_SOCKET_TIMEOUT * 0.8) * 1000))
+
+_FINAL_EVENTS = ("report", "error")
+
+
+class _LocalJob:
+    def __init__(self, record: Dict[str, Any]):
+        self.record = record
+        self.events: List[Dict[str, Any]] = []
+        self.changed = asyncio.Event()
+
+    def publish(self, event: Dict[str, Any]):
+        self.events.append(event)
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+
+class JobQueue:
+    def __init__(self, stream: str = JOB_STREAM, group: str = JOB_GROUP, namespace: str = "osint:job"):
+        self.stream = stream
+        self.group = group
+        self.namespace = namespace
+        self._local: Dict[str, _LocalJob] = {}
+        self._local_tasks: Dict[str, asyncio.Task] = {}
+        self._local_slots: Optional[asyncio.Semaphore] = None
+        self._local_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _key(self, job_id: str) -> str:
+        return f"{self.namespace}:{job_id}"
+
+    def _events_key(self, job_id: str) -> str:
+        return f"{self.namespace}:{job_id}:events"
+
+    async def submit(self, target: str, timeout: Optional[float] = None, incremental: bool = False) -> Dict[str, Any]:
+        """Queues an analysis of `target` and returns the new job's record."""
+        job_id = uuid.uuid4().hex
+        record = {"job_id": job_id, "target": target, "status": "queued", "created_at": time.time(),
+                  "incremental": incremental}
+        if timeout is not None:
+            record["timeout"] = timeout
+        client = network_utils.get_redis()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.hset(self._key(job_id), mapping={k: str(v) for k, v in record.items()})
+                    pipe.expire(self._key(job_id), JOB_TTL_SECONDS)
+                    pipe.xadd(self.stream, {"job_id": job_id, "target": target, "timeout": str(timeout or ""),
+                                            "incremental": "1" if incremental else ""},
+                              maxlen=JOB_STREAM_MAXLEN, approximate=True)
+                    await pipe.execute()
+                network_utils.REDIS.mark_ok()
+                return record
+            except Exception as e:
+                network_utils.REDIS.mark_failed(e)
+        self._submit_local(job_id, record)
+        return record
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job's record, including the report once it is done; None for an unknown or expired job."""
+        local = self._local.get(job_id)
+        if local is not None:
+            return dict(local.record)
+        client = network_utils.get_redis()
+        if client is None:
+            return None
+        try:
+            fields = await client.hgetall(self._key(job_id))
+            network_utils.REDIS.mark_ok()
+        except Exception as e:
+            network_utils.REDIS.mark_failed(e)
+            return None
+        if not fields:
+            return None
+        record: Dict[str, Any] = dict(fields)
+        for name in ("created_at", "started_at", "finished_at", "timeout"):
+            if name in record:
+                record[name] = float(record[name])
+        if "incremental" in record:
+            record["incremental"] = record["incremental"] == "True"
+        if "report" in record:
+            record["report"] = json.loads(record["report"])
+        return record
+
+    async def events(self, job_id: str, wait_seconds: float = 60.0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields the job's events from the start, waiting for new ones, until its final
+        "report" or "error" event. Gives up after `wait_seconds` without a new event.
+        """
+        local = self._local.get(job_id)
+        if local is not None:
+            index = 0
+            while True:
+                while index < len(local.events):
+                    event = local.events[index]
+                    index += 1
+                    yield event
+                    if event["event"] in _FINAL_EVENTS:
+                        return
+                try:
+                    await asyncio.wait_for(local.changed.wait(), timeout=wait_seconds)
+                except asyncio.TimeoutError:
+                    return
+
+        last_id = "0-0"
+        idle_since = time.monotonic()
+        while time.monotonic() - idle_since < wait_seconds:
+            client = network_utils.get_redis()
+            if client is None:
+                await asyncio.sleep(JOB_BLOCK_MS / 1000)
+                continue
+            try:
+                reply = await client.xread({self._events_key(job_id): last_id}, count=100, block=JOB_BLOCK_MS)
+            except Exception as e:
+                network_utils.REDIS.mark_failed(e)
+                continue
+            for _, entries in reply or []:
+                for entry_id, fields in entries:
+                    last_id = entry_id
+                    idle_since = time.monotonic()
+                    event = json.loads(fields["data"])
+                    yield event
+                    if event["event"] in _FINAL_EVENTS:
+                        return
+
+    def _submit_local(self, job_id: str, record: Dict[str, Any]):
+        loop = asyncio.get_running_loop()
+        if self._local_slots is None or self._local_loop is not loop:
+            self._local_slots = asyncio.Semaphore(JOB_LOCAL_CONCURRENCY)
+            self._local_loop = loop
+        now = time.time()
+        for old_id in [j for j, job in self._local.items() if now - job.record["created_at"] > JOB_TTL_SECONDS]:
+            self._local.pop(old_id, None)
+        self._local[job_id] = _LocalJob(record)
+        task = asyncio.ensure_future(self._run_local(job_id, record["target"], record.get("timeout"), record["incremental"]))
+        self._local_tasks[job_id] = task
+        task.add_done_callback(lambda t, j=job_id: self._local_tasks.pop(j, None))
+
+    async def _run_local(self, job_id: str, target: str, timeout: Optional[float], incremental: bool):
+        async with self._local_slots:
+            job = self._local[job_id]
+
+            async def publish(event):
+                job.publish(event)
+
+            async def update(values):
+                job.record.update(values)
+
+            await self.run_job(job_id, target, timeout, publish, update, incremental)
+
+    async def run_job(self, job_id: str, target: str, timeout: Optional[float],
+                      publish: Callable[[Dict[str, Any]], Awaitable[None]],
+                      update: Callable[[Dict[str, Any]], Awaitable[None]], incremental: bool = False):
+        """Runs one analysis, handing each event to `publish` and status changes to `update`."""
+        await update({"status": "running", "started_at": time.time()})
+        try:
+            async for event in stream_osint_analysis(target, deadline=new_deadline(timeout), priority=BULK,
+                                                     incremental=incremental):
+                await publish(event)
+                if event["event"] == "report":
+                    await update({"status": "done", "finished_at": time.time(), "report": event["report"]})
+        except Exception as e:
+            logger.error("Job %s (%s) failed: %s", job_id, target, e)
+            await publish({"event": "error", "detail": "Internal analysis engine error."})
+            await update({"status": "failed", "finished_at": time.time(), "error": "Internal analysis engine error."})
+
+    async def _ensure_group(self, client):
+        try:
+            await client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _heartbeat(self, client, consumer: str, entry_id: str):
+        # Resets the entry's idle time so XAUTOCLAIM in other workers leaves it alone.
+        while True:
+            await asyncio.sleep(JOB_CLAIM_IDLE_SECONDS / 3)
+            try:
+                await client.xclaim(self.stream, self.group, consumer, min_idle_time=0,
+                                    message_ids=[entry_id], justid=True)
+            except Exception as e:
+                network_utils.REDIS.mark_failed(e)
+
+    async def _process(self, client, consumer: str, entry_id: str, fields: Dict[str, str]):
+        job_id = fields["job_id"]
+        key, events_key = self._key(job_id), self._events_key(job_id)
+
+        async def publish(event):
+            async with client.pipeline(transaction=False) as pipe:
+                pipe.xadd(events_key, {"data": json.dumps(event)})
+                pipe.expire(events_key, JOB_TTL_SECONDS)
+                await pipe.execute()
+
+        async def update(values):
+            mapping = {k: json.dumps(v) if k == "report" else str(v) for k, v in values.items()}
+            await client.hset(key, mapping=mapping)
+
+        heartbeat = asyncio.ensure_future(self._heartbeat(client, consumer, entry_id))
+        try:
+            timeout = float(fields["timeout"]) if fields.get("timeout") else None
+            await self.run_job(job_id, fields["target"], timeout, publish, update, fields.get("incremental") == "1")
+            await client.xack(self.stream, self.group, entry_id)
+        except Exception as e:
+            # Left pending; another worker reclaims it after JOB_CLAIM_IDLE_SECONDS.
+            network_utils.REDIS.mark_failed(e)
+        finally:
+            heartbeat.cancel()
+
+    async def work(self, consumer: str, concurrency: int = JOB_WORKER_CONCURRENCY, stop: Optional[asyncio.Event] = None):
+        """
+        Consumes jobs as `consumer` until `stop` is set, running up to `concurrency`
+        at once. Jobs still running when it stops are finished first.
+        """
+        stop = stop or asyncio.Event()
+        running: set = set()
+        group_ready = False
+        next_claim = 0.0
+        while not stop.is_set():
+            client = network_utils.get_redis()
+            if client is None:
+                await asyncio.sleep(1.0)
+                continue
+            free = concurrency - len(running)
+            if free <= 0:
+                await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                continue
+            try:
+                if not group_ready:
+                    await self._ensure_group(client)
+                    group_ready = True
+                entries = []
+                if time.monotonic() >= next_claim:
+                    # Jobs left pending by a worker that died.
+                    claimed = await client.xautoclaim(self.stream, self.group, consumer,
+                                                      min_idle_time=int(JOB_CLAIM_IDLE_SECONDS * 1000), count=free)
+                    entries.extend(claimed[1])
+                    next_claim = time.monotonic() + JOB_CLAIM_IDLE_SECONDS / 4
+                if not entries:
+                    reply = await client.xreadgroup(self.group, consumer, {self.stream: ">"}, count=free, block=JOB_BLOCK_MS)
+                    for _, stream_entries in reply or []:
+                        entries.extend(stream_entries)
+                network_utils.REDIS.mark_ok()
+            except Exception as e:
+                network_utils.REDIS.mark_failed(e)
+                group_ready = False
+                continue
+            for entry_id, fields in entries:
+                if not fields:
+                    # Trimmed from the stream before anyone read it.
+                    await client.xack(self.stream, self.group, entry_id)
+                    continue
+                task = asyncio.ensure_future(self._process(client, consumer, entry_id, fields))
+                running.add(task)
+                task.add_done_callback(running.discard)
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+
+    async def aclose(self):
+        tasks = list(self._local_tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+JOBS = JobQueue()
@@ -22,13 +22,39 @@ class WebSearchHit(BaseModel):
     result_type: str
     data: Any 
 
+class SourceStatus(BaseModel):
+    source: str
+    status: str = Field(..., description="completed, cached, stale, timeout or failed.")
+    duration_ms: Optional[float] = None
+    error: Optional[str] = None
+    unchanged: bool = Field(False, description="Ran, but produced the same result as the previous scan, which was reused.")
+    refreshed: List[str] = Field(default_factory=list, description="Report sections whose content this run changed.")
+
 class DigitalFootprintReport(BaseModel):
     target: str = Field(..., description="The entity (domain/username) analyzed.")
+    target_type: Optional[str] = Field(None, description="domain, ip, email, username or url.")
     timestamp: str
     summary: str
     is_cached: bool = False
+    is_partial: bool = Field(False, description="True when at least one source timed out or failed.")
+    is_stale: bool = Field(False, description="True when expired cache entries were served while they refresh in the background.")
+    sources: List[SourceStatus] = Field(default_factory=list, description="Outcome and duration of every source.")
+    is_incremental: bool = Field(False, description="True for an incremental re-scan (conditional requests, fingerprint reuse).")
+    refreshed_sections: List[str] = Field(default_factory=list, description="Sections whose content changed in this run; the rest are cached or unchanged.")
     
     domain_results: Optional[DomainInfo] = None
     social_media_hits: List[SocialMediaHits] = Field(default_factory=list)
     vulnerability_hits: List[VulnerabilityHit] = Field(default_factory=list)
-    web_search_data: List[WebSearchHit] = Field(default_factory=list)
\ No newline at end of file
+    web_search_data: List[WebSearchHit] = Field(default_factory=list)
+
+class SourceResult(BaseModel):
+    """Normalized output of a single source, grouped by report section. Cached per source."""
+    domain_results: Optional[DomainInfo] = None
+    social_media_hits: List[SocialMediaHits] = Field(default_factory=list)
+    vulnerability_hits: List[VulnerabilityHit] = Field(default_factory=list)
+    web_search_data: List[WebSearchHit] = Field(default_factory=list)
+
+class BatchAnalysisRequest(BaseModel):
+    targets: List[str] = Field(..., description="Domains/usernames to analyze. Duplicates are analyzed once.")
+    concurrency: Optional[int] = Field(None, ge=1, description="Analyses to run at once for this batch.")
+    incremental: bool = Field(False, description="Re-scan incrementally, reusing unchanged results from the previous scan.")
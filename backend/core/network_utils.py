@@ -1,21 +1,97 @@
+import asyncio
+import logging
+import os
 import random
-from typing import Optional, List
+import time
+from typing import Optional, List, Dict, Sequence
 
 try:
-    import redis
+    import redis.asyncio as aioredis
     REDIS_AVAILABLE = True
 except Exception:
-    redis = None
+    aioredis = None
     REDIS_AVAILABLE = False
 
-REDIS_CLIENT = None
-if REDIS_AVAILABLE:
-    try:
-        REDIS_CLIENT = redis.Redis(host='localhost', port=6379, db=0, decode_responses=True)
-        # quick ping to validate
-        REDIS_CLIENT.ping()
-    except Exception:
-        REDIS_CLIENT = None
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+REDIS_RETRY_BASE_SECONDS = float(os.getenv("REDIS_RETRY_BASE_SECONDS", "0.5"))
+REDIS_RETRY_MAX_SECONDS = float(os.getenv("REDIS_RETRY_MAX_SECONDS", "30"))
+
+
+class RedisConnector:
+    """
+    Lazily-built asyncio Redis clients backed by shared connection pools: a text client
+    (decoded str replies) and a binary one for cache payloads written by the cache codec.
+    A failed command does not disable Redis for good: the connector skips Redis for an
+    exponentially growing backoff window and then tries again.
+    """
+
+    def __init__(self, url: str = REDIS_URL):
+        self.url = url
+        self._clients: Dict[bool, object] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def client(self, binary: bool = False):
+        """Returns the pooled client, or None while Redis is unavailable or backing off."""
+        if not REDIS_AVAILABLE or time.monotonic() < self._retry_at:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Pooled connections are bound to the loop that opened them.
+            self._clients = {}
+            self._loop = loop
+        client = self._clients.get(binary)
+        if client is None:
+            pool = aioredis.ConnectionPool.from_url(
+                self.url,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_SOCKET_TIMEOUT,
+                decode_responses=not binary,
+            )
+            client = self._clients[binary] = aioredis.Redis(connection_pool=pool)
+        return client
+
+    def mark_ok(self):
+        self._failures = 0
+        self._retry_at = 0.0
+
+    def mark_failed(self, exc: Exception):
+        self._failures += 1
+        delay = min(REDIS_RETRY_MAX_SECONDS, REDIS_RETRY_BASE_SECONDS * (2 ** (self._failures - 1)))
+        self._retry_at = time.monotonic() + delay
+        logger.warning("Redis unavailable (%s); retrying in %.1fs.", exc, delay)
+
+    async def aclose(self):
+        clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.debug("Failed to close Redis client: %s", e)
+
+
+REDIS = RedisConnector()
+
+
+def get_redis():
+    """Shared asyncio Redis client, or None when Redis is unavailable."""
+    return REDIS.client()
+
+
+def get_redis_bytes():
+    """Binary-safe variant of get_redis (replies are not decoded), used for cache payloads."""
+    return REDIS.client(binary=True)
+
+
+async def close_redis():
+    await REDIS.aclose()
+
 
 USER_AGENTS_KEY = "osint:user_agents"
 
@@ -27,51 +103,75 @@ FALLBACK_USER_AGENTS: List[str] = [
     "Mozilla/5.0 (compatible; OSINT-PRO/1.0)",
 ]
 
-def _seed_redis_user_agents():
-    if not REDIS_CLIENT:
-        return
-    try:
-        if not REDIS_CLIENT.exists(USER_AGENTS_KEY):
-            REDIS_CLIENT.sadd(USER_AGENTS_KEY, *FALLBACK_USER_AGENTS)
-            REDIS_CLIENT.expire(USER_AGENTS_KEY, 3600)
-    except Exception:
-
-        pass
+async def _seed_redis_user_agents(client):
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.sadd(USER_AGENTS_KEY, *FALLBACK_USER_AGENTS)
+        pipe.expire(USER_AGENTS_KEY, 3600)
+        await pipe.execute()
 
-def get_random_user_agent() -> str:
+async def get_random_user_agent() -> str:
     """
     Retrieves a random User-Agent from Redis pool or uses a local fallback pool.
     """
-    try:
+    client = get_redis()
+    if client:
+        try:
+            agent = await client.srandmember(USER_AGENTS_KEY)
+            REDIS.mark_ok()
+            if agent:
+                return agent
+            await _seed_redis_user_agents(client)
+        except Exception as e:
+            REDIS.mark_failed(e)
+    return random.choice(FALLBACK_USER_AGENTS)
 
-        if REDIS_CLIENT:
-            _seed_redis_user_agents()
-            try:
-                agent = REDIS_CLIENT.srandmember(USER_AGENTS_KEY)
-                if agent:
-                    return agent
-            except Exception:
-
-                pass
-    
-        return random.choice(FALLBACK_USER_AGENTS)
-    except Exception:
-        return "Mozilla/5.0 (compatible; OSINT-PRO/1.0)"
-
-def get_from_cache(key: str) -> Optional[str]:
+async def get_from_cache(key: str) -> Optional[str]:
     """Retrieves a value from the Redis cache. Returns None on any failure or miss."""
-    if not REDIS_CLIENT:
+    client = get_redis()
+    if not client:
         return None
     try:
-        return REDIS_CLIENT.get(key)
-    except Exception:
+        value = await client.get(key)
+        REDIS.mark_ok()
+        return value
+    except Exception as e:
+        REDIS.mark_failed(e)
         return None
 
-def set_to_cache(key: str, value: str, ttl_seconds: int = 3600):
+async def set_to_cache(key: str, value: str, ttl_seconds: int = 3600):
     """Saves a value to the Redis cache with a Time-To-Live. Silently no-ops on failure."""
-    if not REDIS_CLIENT:
+    client = get_redis()
+    if not client:
+        return
+    try:
+        await client.set(key, value, ex=ttl_seconds)
+        REDIS.mark_ok()
+    except Exception as e:
+        REDIS.mark_failed(e)
+
+async def get_many_from_cache(keys: Sequence[str]) -> List[Optional[bytes]]:
+    """Fetches several raw payloads in one round trip. Missing keys (or a Redis failure) yield None."""
+    client = get_redis_bytes()
+    if not client or not keys:
+        return [None] * len(keys)
+    try:
+        values = await client.mget(list(keys))
+        REDIS.mark_ok()
+        return values
+    except Exception as e:
+        REDIS.mark_failed(e)
+        return [None] * len(keys)
+
+async def set_many_to_cache(items: Dict[str, bytes], ttl_seconds: int = 3600, ttls: Optional[Dict[str, int]] = None):
+    """Writes several raw payloads in one pipelined round trip. `ttls` overrides the TTL per key."""
+    client = get_redis_bytes()
+    if not client or not items:
         return
     try:
-        REDIS_CLIENT.setex(key, ttl_seconds, value)
-    except Exception:
-        pass
\ No newline at end of file
+        async with client.pipeline(transaction=False) as pipe:
+            for key, value in items.items():
+                pipe.set(key, value, ex=(ttls or {}).get(key, ttl_seconds))
+            await pipe.execute()
+        REDIS.mark_ok()
+    except Exception as e:
+        REDIS.mark_failed(e)
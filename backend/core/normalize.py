@@ -0,0 +1,81 @@
+"""
+Result normalization.
+Sources return a SourceResult envelope. Older sources and connectors may still return
+a bare model or a list of models or dicts, which are routed item by item through a
+dispatch table: models by their type and dicts by a distinguishing key. Dicts are then
+validated one section at a time with a pydantic TypeAdapter, so a mixed list cannot be
+misfiled and validation runs once per section instead of once per item.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+from pydantic import TypeAdapter, ValidationError
+from .models import DomainInfo, SocialMediaHits, SourceResult, VulnerabilityHit, WebSearchHit
+
+logger = logging.getLogger(__name__)
+
+SECTION_MODELS: Dict[str, type] = {
+    "domain_results": DomainInfo,
+    "social_media_hits": SocialMediaHits,
+    "vulnerability_hits": VulnerabilityHit,
+    "web_search_data": WebSearchHit,
+}
+_SECTION_BY_TYPE: Dict[type, str] = {model: section for section, model in SECTION_MODELS.items()}
+# First matching key wins; each is required by exactly one hit model.
+_SECTION_BY_KEY = (
+    ("platform", "social_media_hits"),
+    ("severity", "vulnerability_hits"),
+    ("result_type", "web_search_data"),
+    ("is_registered", "domain_results"),
+)
+_LIST_ADAPTERS: Dict[str, TypeAdapter] = {section: TypeAdapter(List[model]) for section, model in SECTION_MODELS.items()}
+
+
+def _section_for_dict(item: Dict[str, Any]) -> Optional[str]:
+    for key, section in _SECTION_BY_KEY:
+        if key in item:
+            return section
+    return None
+
+
+def _validate_many(section: str, items: List[Dict[str, Any]]) -> list:
+    try:
+        return _LIST_ADAPTERS[section].validate_python(items)
+    except ValidationError:
+        # Keep the valid items; only the failing batch pays for per-item validation.
+        model = SECTION_MODELS[section]
+        valid = []
+        for item in items:
+            try:
+                valid.append(model.model_validate(item))
+            except ValidationError:
+                logger.debug("Skipping invalid %s item: %s", section, item)
+        return valid
+
+
+def normalize_result(result: Any) -> SourceResult:
+    """Turns whatever a source returned into a SourceResult envelope."""
+    if isinstance(result, SourceResult):
+        return result
+    if result is None:
+        return SourceResult()
+
+    items = result if isinstance(result, (list, tuple)) else [result]
+    sections: Dict[str, list] = {section: [] for section in SECTION_MODELS}
+    raw: Dict[str, List[Dict[str, Any]]] = {}
+    for item in items:
+        section = _SECTION_BY_TYPE.get(type(item))
+        if section is not None:
+            sections[section].append(item)
+            continue
+        if isinstance(item, dict):
+            section = _section_for_dict(item)
+            if section is not None:
+                raw.setdefault(section, []).append(item)
+                continue
+        logger.debug("Skipping unrecognized result item: %r", item)
+
+    for section, dicts in raw.items():
+        sections[section].extend(_validate_many(section, dicts))
+
+    domains = sections.pop("domain_results")
+    return SourceResult(domain_results=domains[-1] if domains else None, **sections)
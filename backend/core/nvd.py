@@ -0,0 +1,339 @@
+"""
+Offline CVE store built from the NVD JSON feeds.
+Feeds (JSON 2.0 `nvdcve-2.0-*.json[.gz]`, or the legacy 1.1 `nvdcve-1.1-*`) are
+imported into a local SQLite database in WAL mode:
+    cves      one row per CVE (id, dates, CVSS score and severity, English description)
+    cve_keys  (key, score, cve) for every vendor and product named in the CVE's CPEs,
+              clustered so the worst CVEs for a vendor are an index range scan
+    cve_text  FTS5 index over descriptions, kept in sync by triggers
+    feeds     sha256 of every imported feed file
+Imports are incremental. A feed file whose hash was imported before is skipped,
+and a CVE is only rewritten when its lastModified is newer than the stored one.
+Applying the `modified` feed on a schedule therefore keeps the store current
+without a rebuild. Rejected CVEs are removed. Lookups share one read-only connection
+per process, serialized by a lock. With warm pages they take tens of microseconds
+(benchmarks/bench_nvd.py), but a cold page is a disk read, so callers on the event
+loop run them in a thread.
+
+Import with `python -m backend.nvd_import feeds/nvdcve-2.0-*.json.gz`.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+NVD_DB_PATH = os.getenv("NVD_DB_PATH", os.path.join("data", "nvd.sqlite3"))
+NVD_IMPORT_BATCH_SIZE = int(os.getenv("NVD_IMPORT_BATCH_SIZE", "2000"))
+NVD_MMAP_BYTES = int(os.getenv("NVD_MMAP_BYTES", str(256 * 1024 * 1024)))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cves (
+    id INTEGER PRIMARY KEY,
+    cve_id TEXT NOT NULL UNIQUE,
+    published TEXT,
+    last_modified TEXT NOT NULL,
+    severity TEXT,
+    score REAL,
+    description TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS cve_keys (
+    key TEXT NOT NULL,
+    score REAL NOT NULL,
+    cve INTEGER NOT NULL,
+    PRIMARY KEY (key, score, cve)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_cve_keys_cve ON cve_keys (cve);
+CREATE VIRTUAL TABLE IF NOT EXISTS cve_text USING fts5(description, content='cves', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS cves_ai AFTER INSERT ON cves BEGIN
+    INSERT INTO cve_text (rowid, description) VALUES (new.id, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS cves_ad AFTER DELETE ON cves BEGIN
+    INSERT INTO cve_text (cve_text, rowid, description) VALUES ('delete', old.id, old.description);
+END;
+CREATE TRIGGER IF NOT EXISTS cves_au AFTER UPDATE OF description ON cves BEGIN
+    INSERT INTO cve_text (cve_text, rowid, description) VALUES ('delete', old.id, old.description);
+    INSERT INTO cve_text (rowid, description) VALUES (new.id, new.description);
+END;
+CREATE TABLE IF NOT EXISTS feeds (
+    name TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    imported_at REAL NOT NULL,
+    cves INTEGER NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class CveRecord:
+    cve_id: str
+    published: Optional[str]
+    last_modified: str
+    severity: Optional[str]
+    score: Optional[float]
+    description: str
+    keys: Tuple[str, ...]
+    rejected: bool = False
+
+
+def _cpe_keys(criteria: Iterable[str]) -> Tuple[str, ...]:
+    """Vendor and product names from `cpe:2.3:part:vendor:product:...` strings."""
+    keys = set()
+    for cpe in criteria:
+        fields = cpe.split(":")
+        if len(fields) > 4:
+            for name in (fields[3], fields[4]):
+                if name not in ("*", "-", ""):
+                    keys.add(name.lower())
+    return tuple(sorted(keys))
+
+
+def _english(descriptions: List[Dict[str, Any]]) -> str:
+    for item in descriptions or []:
+        if item.get("lang") == "en":
+            return item.get("value", "")
+    return (descriptions or [{}])[0].get("value", "")
+
+
+def _parse_v2(item: Dict[str, Any]) -> CveRecord:
+    cve = item["cve"]
+    metrics = cve.get("metrics", {})
+    score = severity = None
+    for name in ("cvssMetricV40", "cvssMetricV31", "cvssMetricV30", "cvssMetricV2"):
+        if metrics.get(name):
+            metric = metrics[name][0]
+            data = metric.get("cvssData", {})
+            score = data.get("baseScore")
+            severity = data.get("baseSeverity") or metric.get("baseSeverity")
+            break
+
+    def criteria():
+        for config in cve.get("configurations", []):
+            for node in config.get("nodes", []):
+                for match in node.get("cpeMatch", []):
+                    if match.get("vulnerable", True):
+                        yield match.get("criteria", "")
+
+    return CveRecord(
+        cve_id=cve["id"],
+        published=cve.get("published"),
+        last_modified=cve.get("lastModified") or cve.get("published") or "",
+        severity=severity,
+        score=score,
+        description=_english(cve.get("descriptions")),
+        keys=_cpe_keys(criteria()),
+        rejected=cve.get("vulnStatus") == "Rejected",
+    )
+
+
+def _parse_v1(item: Dict[str, Any]) -> CveRecord:
+    impact = item.get("impact", {})
+    score = severity = None
+    if "baseMetricV3" in impact:
+        data = impact["baseMetricV3"].get("cvssV3", {})
+        score, severity = data.get("baseScore"), data.get("baseSeverity")
+    elif "baseMetricV2" in impact:
+        score = impact["baseMetricV2"].get("cvssV2", {}).get("baseScore")
+        severity = impact["baseMetricV2"].get("severity")
+
+    def walk(nodes):
+        for node in nodes:
+            for match in node.get("cpe_match", []):
+                if match.get("vulnerable", True):
+                    yield match.get("cpe23Uri", "")
+            yield from walk(node.get("children", []))
+
+    description = _english(item["cve"].get("description", {}).get("description_data"))
+    return CveRecord(
+        cve_id=item["cve"]["CVE_data_meta"]["ID"],
+        published=item.get("publishedDate"),
+        last_modified=item.get("lastModifiedDate") or item.get("publishedDate") or "",
+        severity=severity,
+        score=score,
+        description=description,
+        keys=_cpe_keys(walk(item.get("configurations", {}).get("nodes", []))),
+        rejected=description.startswith("** REJECT **"),
+    )
+
+
+def parse_feed(data: Dict[str, Any]) -> Iterator[CveRecord]:
+    """Records from a decoded NVD feed, in either the 2.0 or the legacy 1.1 format."""
+    if "vulnerabilities" in data:
+        return (_parse_v2(item) for item in data["vulnerabilities"])
+    if "CVE_Items" in data:
+        return (_parse_v1(item) for item in data["CVE_Items"])
+    raise ValueError("Not an NVD JSON feed (no 'vulnerabilities' or 'CVE_Items').")
+
+
+def _chunks(records: Iterable[CveRecord], size: int) -> Iterator[List[CveRecord]]:
+    chunk: List[CveRecord] = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class NvdStore:
+    """Writer (import_feed / import_records) and thread-safe reader (for_keys / search) over one database file."""
+
+    def __init__(self, path: str = NVD_DB_PATH):
+        self.path = path
+        self._reader: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        return conn
+
+    def import_records(self, records: Iterable[CveRecord], conn: Optional[sqlite3.Connection] = None) -> Dict[str, int]:
+        """Upserts records whose lastModified is newer than the stored copy; returns counts."""
+        own = conn is None
+        conn = conn or self._connect()
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        try:
+            for chunk in _chunks(records, NVD_IMPORT_BATCH_SIZE):
+                with conn:
+                    self._apply(conn, chunk, stats)
+        finally:
+            if own:
+                conn.close()
+        return stats
+
+    def _apply(self, conn: sqlite3.Connection, chunk: List[CveRecord], stats: Dict[str, int]):
+        marks = ",".join("?" * len(chunk))
+        stored = {cve_id: (row_id, modified) for cve_id, row_id, modified in conn.execute(
+            f"SELECT cve_id, id, last_modified FROM cves WHERE cve_id IN ({marks})", [r.cve_id for r in chunk])}
+
+        removed = [stored[r.cve_id][0] for r in chunk if r.rejected and r.cve_id in stored]
+        changed = [r for r in chunk if not r.rejected and (r.cve_id not in stored or r.last_modified > stored[r.cve_id][1])]
+        stats["removed"] += len(removed)
+        stats["unchanged"] += len(chunk) - len(changed) - len(removed)
+        stats["updated"] += sum(r.cve_id in stored for r in changed)
+        stats["inserted"] += sum(r.cve_id not in stored for r in changed)
+        if removed:
+            conn.executemany("DELETE FROM cve_keys WHERE cve = ?", [(i,) for i in removed])
+            conn.executemany("DELETE FROM cves WHERE id = ?", [(i,) for i in removed])
+        if not changed:
+            return
+
+        conn.executemany("DELETE FROM cve_keys WHERE cve = ?", [(stored[r.cve_id][0],) for r in changed if r.cve_id in stored])
+        conn.executemany(
+            "INSERT INTO cves (cve_id, published, last_modified, severity, score, description) VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (cve_id) DO UPDATE SET published = excluded.published, last_modified = excluded.last_modified, "
+            "severity = excluded.severity, score = excluded.score, description = excluded.description",
+            [(r.cve_id, r.published, r.last_modified, r.severity, r.score, r.description) for r in changed],
+        )
+        marks = ",".join("?" * len(changed))
+        ids = dict(conn.execute(f"SELECT cve_id, id FROM cves WHERE cve_id IN ({marks})", [r.cve_id for r in changed]))
+        conn.executemany(
+            "INSERT OR IGNORE INTO cve_keys (key, score, cve) VALUES (?, ?, ?)",
+            [(key, r.score or 0.0, ids[r.cve_id]) for r in changed for key in r.keys],
+        )
+
+    def import_feed(self, path: str, force: bool = False) -> Dict[str, Any]:
+        """Imports one feed file (.json or .json.gz). Files imported before are skipped unless `force`."""
+        started = time.perf_counter()
+        with open(path, "rb") as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw).hexdigest()
+        name = os.path.basename(path)
+        conn = self._connect()
+        try:
+            previous = conn.execute("SELECT sha256 FROM feeds WHERE name = ?", (name,)).fetchone()
+            if previous and previous[0] == digest and not force:
+                return {"feed": name, "skipped": True}
+            data = json.loads(gzip.decompress(raw) if raw[:2] == b"\x1f\x8b" else raw)
+            stats = self.import_records(parse_feed(data), conn)
+            with conn:
+                conn.execute(
+                    "INSERT INTO feeds (name, sha256, imported_at, cves) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (name) DO UPDATE SET sha256 = excluded.sha256, imported_at = excluded.imported_at, cves = excluded.cves",
+                    (name, digest, time.time(), sum(stats.values())),
+                )
+        finally:
+            conn.close()
+        logger.info("Imported NVD feed %s: %s", name, stats)
+        return {"feed": name, "skipped": False, "seconds": round(time.perf_counter() - started, 3), **stats}
+
+    def _read(self) -> Optional[sqlite3.Connection]:
+        if self._reader is None:
+            if not os.path.exists(self.path):
+                return None
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size={NVD_MMAP_BYTES}")
+            try:
+                conn.execute("SELECT 1 FROM cves LIMIT 1")
+            except sqlite3.OperationalError:
+                conn.close()
+                return None
+            self._reader = conn
+        return self._reader
+
+    def available(self) -> bool:
+        with self._lock:
+            return self._read() is not None
+
+    def for_keys(self, keys: Iterable[str], limit: int = 10) -> List[Dict[str, Any]]:
+        """Highest-scored CVEs naming any of `keys` (vendor or product) in their CPEs."""
+        keys = list(dict.fromkeys(k.lower() for k in keys if k))
+        with self._lock:
+            conn = self._read()
+            if conn is None or not keys:
+                return []
+            ids: Dict[int, float] = {}
+            for key in keys:
+                for score, cve in conn.execute(
+                        "SELECT score, cve FROM cve_keys WHERE key = ? ORDER BY score DESC LIMIT ?", (key, limit)):
+                    ids[cve] = score
+            best = sorted(ids, key=ids.get, reverse=True)[:limit]
+            return self._rows(conn, best)
+
+    def search(self, text: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Full-text search over descriptions, most recently imported first; `text` is matched as a phrase."""
+        if not text.strip():
+            return []
+        phrase = '"' + text.replace('"', '""') + '"'
+        with self._lock:
+            conn = self._read()
+            if conn is None:
+                return []
+            ids = [row[0] for row in conn.execute(
+                "SELECT rowid FROM cve_text WHERE cve_text MATCH ? ORDER BY rowid DESC LIMIT ?", (phrase, limit))]
+            return self._rows(conn, ids)
+
+    @staticmethod
+    def _rows(conn: sqlite3.Connection, ids: List[int]) -> List[Dict[str, Any]]:
+        if not ids:
+            return []
+        marks = ",".join("?" * len(ids))
+        rows = {row[0]: row for row in conn.execute(
+            f"SELECT id, cve_id, severity, score, description, published FROM cves WHERE id IN ({marks})", ids)}
+        return [
+            {"cve_id": r[1], "severity": r[2], "score": r[3], "description": r[4], "published": r[5]}
+            for r in (rows.get(i) for i in ids) if r is not None
+        ]
+
+    def close(self):
+        with self._lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+
+NVD = NvdStore()
@@ -0,0 +1,314 @@
+"""
+Variant generation for usernames and domains, and a bloom filter of
+(candidate, platform) pairs that were already checked.
+
+Usernames get separator, suffix/prefix and leetspeak variants; domains get
+typosquats (omission, repetition, transposition, adjacent keys, homoglyphs,
+hyphenation, TLD swaps). Generators are lazy and may repeat a candidate:
+callers pull them through `unchecked_batches`, which dedupes each batch and
+drops pairs the filter has seen, so memory stays bounded by the batch size and
+the filter, however many variants are explored.
+
+The filter is a plain bitmap in Redis (BITFIELD), shared by all workers, with an
+in-process bitmap of the same size as fallback. Keys rotate every
+PERMUTATION_FILTER_PERIOD_SECONDS so variants are eventually checked again.
+Whatever a check found is stored next to the bitmap for the same period (a Redis
+hash of JSON lists), so a scan that skips a checked variant can still report it.
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import time
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+from . import network_utils
+from .targets import DOMAIN, EMAIL, USERNAME, classify_target
+
+PERMUTATION_FILTER_CAPACITY = int(os.getenv("PERMUTATION_FILTER_CAPACITY", "1000000"))
+PERMUTATION_FILTER_ERROR_RATE = float(os.getenv("PERMUTATION_FILTER_ERROR_RATE", "0.01"))
+PERMUTATION_FILTER_PERIOD_SECONDS = int(os.getenv("PERMUTATION_FILTER_PERIOD_SECONDS", str(7 * 86400)))
+PERMUTATION_BATCH_SIZE = int(os.getenv("PERMUTATION_BATCH_SIZE", "32"))
+
+LEET = {"a": "4", "b": "8", "e": "3", "g": "9", "i": "1", "l": "1", "o": "0", "s": "5", "t": "7", "z": "2"}
+SEPARATORS = ("", ".", "_", "-")
+USERNAME_SUFFIXES = ("1", "01", "123", "x", "_", "dev", "_dev", "_admin", "official", "_official", "real", "hq", "app")
+USERNAME_PREFIXES = ("real", "the", "its", "official", "iam", "mr")
+TLD_SWAPS = ("com", "net", "org", "io", "co", "info", "biz", "app", "dev", "xyz", "site", "online")
+HOMOGLYPHS = {"o": ("0",), "0": ("o",), "l": ("1", "i"), "i": ("1", "l"), "1": ("l", "i"), "m": ("rn", "nn"), "w": ("vv",), "e": ("3",), "a": ("4",), "s": ("5",)}
+_QWERTY = ("1234567890", "qwertyuiop", "asdfghjkl", "zxcvbnm")
+# (candidate, platform)
+Pair = Tuple[str, str]
+_DOMAIN_LABEL = re.compile(r"^(?!-)[a-z0-9-]{1,63}(?<!-)$")
+
+
+def _adjacent_keys() -> Dict[str, str]:
+    adjacent: Dict[str, str] = {}
+    for r, row in enumerate(_QWERTY):
+        for c, key in enumerate(row):
+            near = []
+            for rr in (r - 1, r, r + 1):
+                if 0 <= rr < len(_QWERTY):
+                    for cc in (c - 1, c, c + 1):
+                        if (rr, cc) != (r, c) and 0 <= cc < len(_QWERTY[rr]):
+                            near.append(_QWERTY[rr][cc])
+            adjacent[key] = "".join(near)
+    return adjacent
+
+
+ADJACENT_KEYS = _adjacent_keys()
+
+
+def _leet_singles(word: str) -> Iterator[str]:
+    for i, ch in enumerate(word):
+        sub = LEET.get(ch)
+        if sub:
+            yield word[:i] + sub + word[i + 1:]
+
+
+def username_permutations(username: str) -> Iterator[str]:
+    """Lazily yields username variants, most likely first. The input itself is not yielded."""
+    base = username.lower()
+    parts = [p for p in re.split(r"[._\-]+", base) if p]
+    joined = [sep.join(parts) for sep in SEPARATORS] if len(parts) > 1 else [base]
+    full_leet = "".join(LEET.get(ch, ch) for ch in base)
+
+    for variant in joined:
+        if variant != base:
+            yield variant
+    for stem in joined:
+        for suffix in USERNAME_SUFFIXES:
+            yield stem + suffix
+    for prefix in USERNAME_PREFIXES:
+        yield prefix + base
+        yield prefix + "_" + base
+    yield from _leet_singles(base)
+    if full_leet != base:
+        yield full_leet
+    if len(parts) > 1:
+        yield "".join(reversed(parts))
+        yield "_".join(reversed(parts))
+    for variant in _leet_singles(base):
+        for suffix in USERNAME_SUFFIXES:
+            yield variant + suffix
+    for stem in joined:
+        for prefix in USERNAME_PREFIXES:
+            for suffix in USERNAME_SUFFIXES:
+                yield prefix + stem + suffix
+
+
+def _domain_labels(name: str) -> Iterator[str]:
+    for i in range(len(name)):
+        yield name[:i] + name[i + 1:]                                  # omission
+        yield name[:i] + name[i] + name[i:]                             # repetition
+        if i + 1 < len(name) and name[i] != name[i + 1]:
+            yield name[:i] + name[i + 1] + name[i] + name[i + 2:]       # transposition
+        for key in ADJACENT_KEYS.get(name[i], ""):
+            yield name[:i] + key + name[i + 1:]                         # adjacent key
+        for glyph in HOMOGLYPHS.get(name[i], ()):
+            yield name[:i] + glyph + name[i + 1:]                       # homoglyph
+        if 0 < i:
+            yield name[:i] + "-" + name[i:]                             # hyphenation
+    if name.startswith("www"):
+        yield name[3:]
+    else:
+        yield "www" + name
+
+
+def domain_typosquats(domain: str) -> Iterator[str]:
+    """Lazily yields typosquat domains for `domain` (its left-most label and TLD are varied)."""
+    labels = domain.lower().rstrip(".").split(".")
+    if len(labels) < 2:
+        return
+    name, suffix = labels[0], ".".join(labels[1:])
+    for tld in TLD_SWAPS:
+        if tld != suffix:
+            yield f"{name}.{tld}"
+    for label in _domain_labels(name):
+        if label != name and _DOMAIN_LABEL.match(label):
+            yield f"{label}.{suffix}"
+
+
+def candidates(target: str) -> Iterator[str]:
+    """Variants for a raw target: typosquats for domains, username variants for usernames and emails."""
+    parsed = classify_target(target)
+    if parsed.kind == DOMAIN:
+        return domain_typosquats(parsed.value)
+    if parsed.kind == EMAIL:
+        return username_permutations(parsed.value.split("@", 1)[0])
+    if parsed.kind == USERNAME:
+        return username_permutations(parsed.value)
+    return iter(())
+
+
+def batched(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch: List[str] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def bloom_size(capacity: int, error_rate: float) -> Tuple[int, int]:
+    """(bits, hash count) for a bloom filter holding `capacity` items at `error_rate`."""
+    bits = max(64, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+    hashes = max(1, int(round(bits / capacity * math.log(2))))
+    return bits, hashes
+
+
+class CheckedFilter:
+    """
+    Bloom filter of (candidate, platform) pairs. `seen` may report a false positive
+    at about `error_rate` once `capacity` pairs are in the current period; it never
+    reports a checked pair as unseen.
+    """
+
+    def __init__(self, namespace: str = "osint:checked", capacity: int = PERMUTATION_FILTER_CAPACITY,
+                 error_rate: float = PERMUTATION_FILTER_ERROR_RATE,
+                 period_seconds: int = PERMUTATION_FILTER_PERIOD_SECONDS):
+        self.namespace = namespace
+        self.period_seconds = period_seconds
+        self.capacity = capacity
+        self.bits, self.hashes = bloom_size(capacity, error_rate)
+        self._local: Dict[str, bytearray] = {}
+        self._local_found: Dict[str, str] = {}
+
+    def _key(self) -> str:
+        return f"{self.namespace}:{int(time.time() // self.period_seconds)}"
+
+    def _offsets(self, pair: Pair) -> List[int]:
+        candidate, platform = pair
+        digest = hashlib.blake2b(f"{platform}\x00{candidate}".encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def _local_bitmap(self, key: str) -> bytearray:
+        bitmap = self._local.get(key)
+        if bitmap is None:
+            # Only the current period is kept in process.
+            self._local = {key: bytearray((self.bits + 7) // 8)}
+            self._local_found = {}
+            bitmap = self._local[key]
+        return bitmap
+
+    @staticmethod
+    def _field(pair: Pair) -> str:
+        candidate, platform = pair
+        return f"{platform}\x00{candidate}"
+
+    async def seen(self, pairs: Sequence[Pair]) -> List[bool]:
+        key = self._key()
+        offsets = [self._offsets(pair) for pair in pairs]
+        client = network_utils.get_redis()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for item in offsets:
+                        pipe.execute_command("BITFIELD", key, *[arg for off in item for arg in ("GET", "u1", off)])
+                    replies = await pipe.execute()
+                network_utils.REDIS.mark_ok()
+                return [all(int(bit) for bit in reply) for reply in replies]
+            except Exception as e:
+                network_utils.REDIS.mark_failed(e)
+        bitmap = self._local_bitmap(key)
+        return [all(bitmap[off >> 3] & (1 << (off & 7)) for off in item) for item in offsets]
+
+    async def add(self, pairs: Sequence[Pair], found: Optional[Mapping[Pair, List[Any]]] = None):
+        """
+        Marks `pairs` checked. `found` maps checked pairs to what their check turned up
+        (JSON-able items); it is kept for the same period and read back with `found`.
+        """
+        if not pairs:
+            return
+        key = self._key()
+        offsets = [self._offsets(pair) for pair in pairs]
+        stored = {self._field(pair): json.dumps(items, separators=(",", ":"))
+                  for pair, items in (found or {}).items() if items}
+        client = network_utils.get_redis()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for item in offsets:
+                        pipe.execute_command("BITFIELD", key, *[arg for off in item for arg in ("SET", "u1", off, 1)])
+                    pipe.expire(key, self.period_seconds * 2)
+                    if stored:
+                        pipe.hset(f"{key}:found", mapping=stored)
+                        pipe.expire(f"{key}:found", self.period_seconds * 2)
+                    await pipe.execute()
+                network_utils.REDIS.mark_ok()
+                return
+            except Exception as e:
+                network_utils.REDIS.mark_failed(e)
+        bitmap = self._local_bitmap(key)
+        for item in offsets:
+            for off in item:
+                bitmap[off >> 3] |= 1 << (off & 7)
+        for field, value in stored.items():
+            if len(self._local_found) < self.capacity:
+                self._local_found[field] = value
+
+    async def found(self, pairs: Sequence[Pair]) -> List[Any]:
+        """Items stored by `add` for `pairs` in the current period, in pair order."""
+        if not pairs:
+            return []
+        fields = [self._field(pair) for pair in dict.fromkeys(pairs)]
+        key = self._key()
+        values: List[Optional[str]] = []
+        client = network_utils.get_redis()
+        if client is not None:
+            try:
+                values = await client.hmget(f"{key}:found", fields)
+                network_utils.REDIS.mark_ok()
+            except Exception as e:
+                network_utils.REDIS.mark_failed(e)
+                client = None
+        if client is None:
+            self._local_bitmap(key)
+            values = [self._local_found.get(field) for field in fields]
+        items: List[Any] = []
+        for value in values:
+            if value:
+                items.extend(json.loads(value))
+        return items
+
+    async def unseen(self, pairs: Sequence[Pair]) -> List[Pair]:
+        """`pairs` without duplicates and without the ones already in the filter, in order."""
+        unique = list(dict.fromkeys(pairs))
+        flags = await self.seen(unique) if unique else []
+        return [pair for pair, was_seen in zip(unique, flags) if not was_seen]
+
+
+CHECKED = CheckedFilter()
+
+
+async def unchecked_batches(variants: Iterable[str], platform: str, limit: int,
+                            batch_size: int = PERMUTATION_BATCH_SIZE,
+                            checked: Optional[CheckedFilter] = None,
+                            skipped: Optional[List[str]] = None) -> AsyncIterator[List[str]]:
+    """
+    Yields batches of variants not yet checked on `platform`, at most `limit` in
+    total. Callers `add` the pairs they checked before pulling the next batch.
+    At most `limit * 4` variants are pulled from the generator, so a target whose
+    variants were all checked before stops quickly. Variants passed over because
+    they were already checked are appended to `skipped`.
+    """
+    checked = checked or CHECKED
+    remaining, budget = limit, limit * 4
+    source = iter(variants)
+    while remaining > 0 and budget > 0:
+        pulled = list(islice(source, min(batch_size, budget)))
+        if not pulled:
+            return
+        budget -= len(pulled)
+        unseen = [c for c, _ in await checked.unseen([(c, platform) for c in pulled])]
+        if skipped is not None:
+            new = set(unseen)
+            skipped.extend(c for c in dict.fromkeys(pulled) if c not in new)
+        fresh = unseen[:remaining]
+        if fresh:
+            remaining -= len(fresh)
+            yield fresh
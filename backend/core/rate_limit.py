@@ -0,0 +1,221 @@
+"""
+Token-bucket scheduler for external provider APIs (Bing, GitHub search).
+Buckets live in Redis when it is reachable, so the limits hold across uvicorn
+workers, and fall back to in-process buckets otherwise. Providers' own
+X-RateLimit-* / Retry-After headers feed back into the buckets: an exhausted
+quota pauses the provider until its reset time, and a draining quota slows the
+refill rate so the remaining calls are spread over the rest of the window.
+Callers wait for a token up to their deadline; past that the call is shed.
+"""
+import asyncio
+import email.utils
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Tuple
+from . import network_utils
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "5"))
+
+
+@dataclass
+class BucketConfig:
+    rate: float      # tokens per second
+    capacity: float  # burst size
+
+
+# Defaults follow the documented quotas: GitHub search allows 30 req/min
+# (code search 10 req/min) per token; Bing's free tier allows 3 TPS.
+DEFAULT_PROVIDER_LIMITS: Dict[str, BucketConfig] = {
+    "bing": BucketConfig(rate=3.0, capacity=3),
+    "github_users": BucketConfig(rate=0.5, capacity=5),
+    "github_code": BucketConfig(rate=10 / 60.0, capacity=2),
+}
+
+
+def _parse_provider_limits(raw: str) -> Dict[str, BucketConfig]:
+    """Parses RATE_LIMITS, e.g. "bing=3:3,github_code=0.16:2" (rate per second : burst)."""
+    limits: Dict[str, BucketConfig] = {}
+    for part in raw.split(","):
+        name, _, spec = part.partition("=")
+        rate, _, capacity = spec.partition(":")
+        try:
+            limits[name.strip()] = BucketConfig(rate=float(rate), capacity=float(capacity) if capacity else max(1.0, float(rate)))
+        except ValueError:
+            continue
+    return limits
+
+
+PROVIDER_LIMITS: Dict[str, BucketConfig] = {**DEFAULT_PROVIDER_LIMITS, **_parse_provider_limits(os.getenv("RATE_LIMITS", ""))}
+
+# Returns {granted, wait_ms}. A token is reserved only when the wait fits in max_wait_ms.
+_TAKE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local max_wait = tonumber(ARGV[4])
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'blocked_until', 'adj_rate', 'adj_until')
+local tokens = tonumber(data[1]) or capacity
+local ts = tonumber(data[2]) or now
+local blocked_until = tonumber(data[3]) or 0
+local adj_rate = tonumber(data[4])
+local adj_until = tonumber(data[5]) or 0
+if adj_rate and adj_until > now and adj_rate < rate then rate = adj_rate end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if blocked_until > now then wait = blocked_until - now end
+if tokens < 1 then wait = math.max(wait, (1 - tokens) / rate) end
+local wait_ms = math.ceil(wait * 1000)
+if wait_ms > max_wait then
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], 3600000)
+    return {0, wait_ms}
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - 1), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], 3600000)
+return {1, wait_ms}
+"""
+
+
+class _LocalBucket:
+    def __init__(self, config: BucketConfig):
+        self.tokens = config.capacity
+        self.updated = time.time()
+        self.blocked_until = 0.0
+        self.adj_rate: Optional[float] = None
+        self.adj_until = 0.0
+
+    def take(self, config: BucketConfig, now: float, max_wait: float) -> Tuple[bool, float]:
+        rate = config.rate
+        if self.adj_rate is not None and self.adj_until > now:
+            rate = min(rate, self.adj_rate)
+        self.tokens = min(config.capacity, self.tokens + max(0.0, now - self.updated) * rate)
+        self.updated = now
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1:
+            wait = max(wait, (1 - self.tokens) / rate)
+        if wait > max_wait:
+            return False, wait
+        self.tokens -= 1
+        return True, wait
+
+
+class ProviderRateLimiter:
+    def __init__(self, limits: Optional[Dict[str, BucketConfig]] = None, namespace: str = "osint:ratelimit"):
+        self.limits = limits if limits is not None else PROVIDER_LIMITS
+        self.namespace = namespace
+        self._local: Dict[str, _LocalBucket] = {}
+
+    def _config(self, provider: str) -> BucketConfig:
+        return self.limits.get(provider) or BucketConfig(rate=1.0, capacity=1)
+
+    def _bucket(self, provider: str) -> _LocalBucket:
+        bucket = self._local.get(provider)
+        if bucket is None:
+            bucket = self._local[provider] = _LocalBucket(self._config(provider))
+        return bucket
+
+    async def _take(self, provider: str, max_wait: float) -> Tuple[bool, float]:
+        config = self._config(provider)
+        now = time.time()
+        client = network_utils.get_redis()
+        if client is not None:
+            try:
+                granted, wait_ms = await client.eval(
+                    _TAKE_SCRIPT, 1, f"{self.namespace}:{provider}",
+                    now, config.rate, config.capacity, int(max_wait * 1000),
+                )
+                network_utils.REDIS.mark_ok()
+                return bool(int(granted)), int(wait_ms) / 1000.0
+            except Exception as e:
+                # Backs off, so later calls use the local bucket without retrying Redis each time.
+                network_utils.REDIS.mark_failed(e)
+        return self._bucket(provider).take(config, now, max_wait)
+
+    async def acquire(self, provider: str, deadline: Optional[float] = None) -> bool:
+        """
+        Waits for a token for `provider`. Returns False (the call should be shed) when
+        the wait would exceed RATE_LIMIT_MAX_WAIT_SECONDS or the request deadline.
+        """
+        max_wait = RATE_LIMIT_MAX_WAIT_SECONDS
+        if deadline is not None:
+            max_wait = min(max_wait, deadline - time.monotonic())
+        granted, wait = await self._take(provider, max(0.0, max_wait))
+        if not granted:
+            logger.warning("Shedding %s call: rate limit wait %.2fs exceeds budget %.2fs", provider, wait, max_wait)
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    async def observe(self, provider: str, headers: Mapping[str, str], status_code: int):
+        """Adapts the bucket from the provider's rate-limit response headers."""
+        now = time.time()
+        blocked_until = 0.0
+        adj_rate: Optional[float] = None
+        adj_until = 0.0
+
+        retry_after = _parse_retry_after(headers.get("retry-after"), now)
+        remaining = _to_float(headers.get("x-ratelimit-remaining"))
+        reset_at = _to_float(headers.get("x-ratelimit-reset"))
+
+        if retry_after is not None and status_code in (403, 429, 503):
+            blocked_until = retry_after
+        elif remaining is not None and reset_at is not None and reset_at > now:
+            if remaining <= 0:
+                blocked_until = reset_at
+            else:
+                # Spread what is left of the quota across the rest of the window.
+                adj_rate = remaining / (reset_at - now)
+                adj_until = reset_at
+        elif status_code == 429:
+            blocked_until = now + 1.0
+
+        if not blocked_until and adj_rate is None:
+            return
+
+        bucket = self._bucket(provider)
+        if blocked_until:
+            bucket.blocked_until = max(bucket.blocked_until, blocked_until)
+            logger.warning("%s quota exhausted; pausing for %.1fs", provider, blocked_until - now)
+        if adj_rate is not None:
+            bucket.adj_rate, bucket.adj_until = adj_rate, adj_until
+
+        client = network_utils.get_redis()
+        if client is None:
+            return
+        fields: Dict[str, str] = {}
+        if blocked_until:
+            fields["blocked_until"] = str(blocked_until)
+        if adj_rate is not None:
+            fields.update({"adj_rate": str(adj_rate), "adj_until": str(adj_until)})
+        try:
+            await client.hset(f"{self.namespace}:{provider}", mapping=fields)
+        except Exception as e:
+            network_utils.REDIS.mark_failed(e)
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def _parse_retry_after(value: Optional[str], now: float) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP date; returns an absolute epoch time."""
+    if not value:
+        return None
+    seconds = _to_float(value)
+    if seconds is not None:
+        return now + seconds
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except Exception:
+        return None
+
+
+PROVIDER_LIMITER = ProviderRateLimiter()
@@ -0,0 +1,126 @@
+"""
+Background refresh for stale-while-revalidate.
+BackgroundRefresher runs cache refreshes off the request path under a small
+concurrency cap, so refreshing can never take more than REFRESH_CONCURRENCY slots away
+from live requests. Past REFRESH_MAX_PENDING queued refreshes, new ones are dropped.
+A short Redis lock per key keeps several workers from refreshing the same target.
+HotTargetTracker counts analyses per target in-process and flushes the counts to a
+decaying Redis sorted set; the pre-warm pass in the gatherer refreshes the top entries
+before they expire.
+"""
+import asyncio
+import logging
+import os
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional
+from . import network_utils
+
+logger = logging.getLogger(__name__)
+
+REFRESH_CONCURRENCY = int(os.getenv("REFRESH_CONCURRENCY", "4"))
+REFRESH_MAX_PENDING = int(os.getenv("REFRESH_MAX_PENDING", "256"))
+REFRESH_LOCK_SECONDS = float(os.getenv("REFRESH_LOCK_SECONDS", "30"))
+HOT_TARGETS_MAX_TRACKED = int(os.getenv("HOT_TARGETS_MAX_TRACKED", "1000"))
+# Scores are multiplied by this on every pre-warm pass, so popularity fades over time.
+HOT_TARGETS_DECAY = float(os.getenv("HOT_TARGETS_DECAY", "0.5"))
+
+
+class BackgroundRefresher:
+    def __init__(self, concurrency: int = REFRESH_CONCURRENCY, max_pending: int = REFRESH_MAX_PENDING,
+                 namespace: str = "osint:refresh"):
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.namespace = namespace
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._loop is not loop:
+            self._slots = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._slots
+
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def schedule(self, key: str, fn: Callable[[], Awaitable[None]]) -> bool:
+        """Queues `fn` unless `key` is already refreshing or the queue is full. Returns True if queued."""
+        if key in self._tasks:
+            return False
+        if len(self._tasks) >= self.max_pending:
+            logger.warning("Refresh queue full (%d); dropping refresh of %s", self.max_pending, key)
+            return False
+        task = asyncio.ensure_future(self._run(key, fn))
+        self._tasks[key] = task
+        task.add_done_callback(lambda t, k=key: self._tasks.pop(k, None))
+        return True
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[None]]):
+        client = network_utils.get_redis()
+        if client is not None:
+            try:
+                if not await client.set(f"{self.namespace}:{key}", "1", nx=True, px=int(REFRESH_LOCK_SECONDS * 1000)):
+                    return
+            except Exception as e:
+                network_utils.REDIS.mark_failed(e)
+        try:
+            async with self._semaphore():
+                await fn()
+        except Exception as e:
+            logger.error("Background refresh failed for %s: %s", key, e)
+
+    async def aclose(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+class HotTargetTracker:
+    def __init__(self, key: str = "osint:hot", max_tracked: int = HOT_TARGETS_MAX_TRACKED, decay: float = HOT_TARGETS_DECAY):
+        self.key = key
+        self.max_tracked = max_tracked
+        self.decay = decay
+        self._pending: Counter = Counter()
+        # Used instead of Redis when it is unavailable.
+        self._local: Counter = Counter()
+
+    def touch(self, target: str):
+        self._pending[target] += 1
+
+    async def flush(self):
+        """Adds the counts gathered since the last flush to the shared sorted set."""
+        pending, self._pending = self._pending, Counter()
+        if not pending:
+            return
+        client = network_utils.get_redis()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for target, count in pending.items():
+                        pipe.zincrby(self.key, count, target)
+                    await pipe.execute()
+                return
+            except Exception as e:
+                network_utils.REDIS.mark_failed(e)
+        self._local.update(pending)
+
+    async def top(self, limit: int) -> List[str]:
+        """Decays every score, trims the set and returns the `limit` hottest targets."""
+        await self.flush()
+        client = network_utils.get_redis()
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    pipe.zrevrange(self.key, 0, max(0, limit - 1))
+                    pipe.zunionstore(self.key, {self.key: self.decay})
+                    pipe.zremrangebyrank(self.key, 0, -(self.max_tracked + 1))
+                    results = await pipe.execute()
+                return list(results[0])
+            except Exception as e:
+                network_utils.REDIS.mark_failed(e)
+        hottest = [target for target, _ in self._local.most_common(limit)]
+        self._local = Counter({t: c * self.decay for t, c in self._local.most_common(self.max_tracked) if c * self.decay >= 0.5})
+        return hottest
@@ -0,0 +1,162 @@
+"""
+Source registry.
+Sources are discovered once at startup: every module under `sources/` that defines
+`collect_data` is registered, plus any module exposed through the
+`osint_pro.sources` entry-point group. A module may declare a literal
+`SOURCE_META` dict (target_types, cost, timeout, lazy). It is read from the module's
+syntax tree, so a lazy source is not imported until its first use.
+The loaded `collect_data` callable and the keyword arguments it accepts are cached on the spec.
+"""
+import ast
+import importlib
+import importlib.util
+import inspect
+import logging
+import pkgutil
+from dataclasses import dataclass, field
+from importlib.metadata import entry_points
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "osint_pro.sources"
+ANY_TARGET = "any"
+
+
+@dataclass
+class SourceSpec:
+    name: str
+    target_types: Tuple[str, ...] = (ANY_TARGET,)
+    cost: float = 1.0
+    timeout: float = 10.0
+    lazy: bool = False
+    collect: Optional[Callable] = field(default=None, repr=False)
+    accepts: FrozenSet[str] = field(default_factory=frozenset, repr=False)
+
+    @classmethod
+    def from_meta(cls, name: str, meta: Dict[str, Any], collect: Optional[Callable] = None) -> "SourceSpec":
+        spec = cls(
+            name=name,
+            target_types=tuple(meta.get("target_types") or (ANY_TARGET,)),
+            cost=float(meta.get("cost", 1.0)),
+            timeout=float(meta.get("timeout", 10.0)),
+            lazy=bool(meta.get("lazy", False)),
+        )
+        if collect is not None:
+            spec.bind(collect)
+        return spec
+
+    @property
+    def loaded(self) -> bool:
+        return self.collect is not None
+
+    def bind(self, collect: Callable):
+        self.collect = collect
+        try:
+            self.accepts = frozenset(inspect.signature(collect).parameters)
+        except (TypeError, ValueError):
+            self.accepts = frozenset()
+
+    def load(self) -> Callable:
+        """Imports the module on first use and caches its collect_data."""
+        if self.collect is None:
+            module = importlib.import_module(self.name)
+            collect = getattr(module, "collect_data", None)
+            if collect is None:
+                raise AttributeError(f"Module {self.name} has no collect_data function")
+            self.bind(collect)
+        return self.collect
+
+
+def _read_static_meta(path: str) -> Optional[Dict[str, Any]]:
+    """Returns SOURCE_META ({} if absent) when the file defines collect_data, else None."""
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            tree = ast.parse(fh.read(), filename=path)
+    except (OSError, SyntaxError) as e:
+        logger.error("Could not parse source %s: %s", path, e)
+        return None
+
+    meta: Dict[str, Any] = {}
+    has_collect = False
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "collect_data":
+            has_collect = True
+        elif isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "SOURCE_META" for t in node.targets):
+            try:
+                meta = ast.literal_eval(node.value)
+            except ValueError:
+                logger.warning("SOURCE_META in %s is not a literal; using defaults.", path)
+    return meta if has_collect else None
+
+
+class SourceRegistry:
+    def __init__(self, specs: Iterable[SourceSpec] = ()):
+        self._specs: Dict[str, SourceSpec] = {}
+        for spec in specs:
+            self.register(spec)
+
+    @classmethod
+    def from_callables(cls, sources: Dict[str, Callable]) -> "SourceRegistry":
+        """Registry over already-loaded collect_data callables, keyed by module name."""
+        return cls(SourceSpec.from_meta(name, {}, collect) for name, collect in sources.items())
+
+    def register(self, spec: SourceSpec):
+        self._specs[spec.name] = spec
+
+    def get(self, name: str) -> Optional[SourceSpec]:
+        return self._specs.get(name)
+
+    def specs(self) -> List[SourceSpec]:
+        return list(self._specs.values())
+
+    def for_target_type(self, kind: str) -> List[SourceSpec]:
+        """Sources that declared support for `kind` (or for any target)."""
+        return [s for s in self._specs.values() if kind in s.target_types or ANY_TARGET in s.target_types]
+
+    def names(self) -> List[str]:
+        return list(self._specs)
+
+    def __len__(self) -> int:
+        return len(self._specs)
+
+    def load_eager(self):
+        """Imports every non-lazy source; failures are logged and the source is dropped."""
+        for spec in self.specs():
+            if spec.lazy or spec.loaded:
+                continue
+            try:
+                spec.load()
+            except Exception as e:
+                logger.error("Could not load module %s: %s", spec.name, e)
+                del self._specs[spec.name]
+
+    @classmethod
+    def discover(cls, package: str = "sources", entry_point_group: Optional[str] = ENTRY_POINT_GROUP) -> "SourceRegistry":
+        registry = cls()
+        try:
+            pkg_spec = importlib.util.find_spec(package)
+        except ModuleNotFoundError:
+            pkg_spec = None
+        if pkg_spec is not None and pkg_spec.submodule_search_locations:
+            for info in sorted(pkgutil.iter_modules(pkg_spec.submodule_search_locations), key=lambda m: m.name):
+                if info.ispkg or info.name.startswith("_"):
+                    continue
+                name = f"{package}.{info.name}"
+                mod_spec = importlib.util.find_spec(name)
+                if mod_spec is None or not mod_spec.origin:
+                    continue
+                meta = _read_static_meta(mod_spec.origin)
+                if meta is None:
+                    continue
+                registry.register(SourceSpec.from_meta(name, meta))
+
+        if entry_point_group:
+            for ep in entry_points(group=entry_point_group):
+                try:
+                    module = importlib.import_module(ep.value.split(":")[0])
+                    collect = getattr(module, "collect_data")
+                    registry.register(SourceSpec.from_meta(module.__name__, getattr(module, "SOURCE_META", {}), collect))
+                except Exception as e:
+                    logger.error("Could not load source entry point %s: %s", ep.name, e)
+        return registry
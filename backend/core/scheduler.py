@@ -0,0 +1,144 @@
+"""
+Cost-aware source scheduler.
+Every source call goes through one FairScheduler per worker. Each source has a lane whose
+size is the source's concurrency limit (its share of the upstream quota). When a lane is
+full, callers queue. They are admitted by self-clocked weighted fair queueing across
+priority classes, not in arrival order. A call is charged the source's SOURCE_META cost
+multiplied by its recent mean latency, divided by its class weight. The virtual clock is
+shared by all lanes, so a class that just used a lot of expensive capacity waits behind
+the others in the cheap lanes too. With the default weights, interactive /analyze calls
+overtake a queued bulk re-scan, while bulk work still gets one slot in every
+1 + SCHEDULER_WEIGHTS["interactive"] and uses whatever capacity interactive traffic leaves.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+from .metrics import REGISTRY
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+
+
+def parse_weights(raw: str) -> Dict[str, float]:
+    """Parses class weights such as SCHEDULER_WEIGHTS, e.g. "interactive=8,bulk=1"."""
+    weights: Dict[str, float] = {}
+    for part in raw.split(","):
+        name, _, value = part.partition("=")
+        try:
+            weight = float(value)
+        except ValueError:
+            continue
+        if name.strip() and weight > 0:
+            weights[name.strip()] = weight
+    return weights
+
+
+SCHEDULER_WEIGHTS: Dict[str, float] = {INTERACTIVE: 8.0, BULK: 1.0, **parse_weights(os.getenv("SCHEDULER_WEIGHTS", ""))}
+# Latency assumed for a source before any call to it has finished.
+SCHEDULER_DEFAULT_LATENCY = float(os.getenv("SCHEDULER_DEFAULT_LATENCY", "1.0"))
+# Weight of the newest sample in each source's latency average.
+SCHEDULER_LATENCY_ALPHA = float(os.getenv("SCHEDULER_LATENCY_ALPHA", "0.2"))
+
+QUEUE_WAIT = REGISTRY.histogram(
+    "osint_scheduler_wait_seconds", "Time a source call waited for a scheduler slot, by priority class.", ("priority",))
+QUEUE_DEPTH = REGISTRY.gauge(
+    "osint_scheduler_queued", "Source calls waiting for a scheduler slot, by priority class.", ("priority",))
+
+
+class _Lane:
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.running = 0
+        # (finish tag, sequence, start tag, priority, future)
+        self.waiting: List[Tuple[float, int, float, str, asyncio.Future]] = []
+
+
+class FairScheduler:
+    def __init__(self, limit_for: Callable[[str], int], weights: Optional[Dict[str, float]] = None,
+                 default_latency: float = SCHEDULER_DEFAULT_LATENCY, alpha: float = SCHEDULER_LATENCY_ALPHA):
+        self.limit_for = limit_for
+        self.weights = dict(weights if weights is not None else SCHEDULER_WEIGHTS)
+        self.default_latency = default_latency
+        self.alpha = alpha
+        self._latency: Dict[str, float] = {}
+        self._lanes: Dict[str, _Lane] = {}
+        self._virtual = 0.0
+        self._finish: Dict[str, float] = {}
+        self._seq = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _lane(self, source: str) -> _Lane:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Futures of another (closed) loop can never be resolved; start over.
+            self._lanes.clear()
+            self._finish.clear()
+            self._virtual = 0.0
+            self._loop = loop
+        lane = self._lanes.get(source)
+        if lane is None:
+            lane = self._lanes[source] = _Lane(max(1, self.limit_for(source)))
+        return lane
+
+    def latency(self, source: str) -> float:
+        return self._latency.get(source, self.default_latency)
+
+    def observe(self, source: str, seconds: float):
+        """Feeds a finished call's duration into the source's latency average."""
+        previous = self._latency.get(source)
+        self._latency[source] = seconds if previous is None else previous + self.alpha * (seconds - previous)
+
+    @asynccontextmanager
+    async def slot(self, source: str, priority: str = INTERACTIVE, cost: float = 1.0) -> AsyncIterator[None]:
+        """Holds one of `source`'s slots; the call's duration updates the source's latency."""
+        await self.acquire(source, priority, cost)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(source, time.perf_counter() - started)
+            self.release(source)
+
+    async def acquire(self, source: str, priority: str = INTERACTIVE, cost: float = 1.0):
+        lane = self._lane(source)
+        weight = self.weights.get(priority) or 1.0
+        start = max(self._virtual, self._finish.get(priority, 0.0))
+        finish = start + cost * self.latency(source) / weight
+        self._finish[priority] = finish
+        if lane.running < lane.limit and not lane.waiting:
+            lane.running += 1
+            self._virtual = max(self._virtual, start)
+            QUEUE_WAIT.observe(0.0, priority=priority)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(lane.waiting, (finish, next(self._seq), start, priority, future))
+        QUEUE_DEPTH.inc(priority=priority)
+        queued_at = time.perf_counter()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as the caller gave up: hand the slot on.
+                self.release(source)
+            raise
+        finally:
+            QUEUE_DEPTH.dec(priority=priority)
+            QUEUE_WAIT.observe(time.perf_counter() - queued_at, priority=priority)
+
+    def release(self, source: str):
+        lane = self._lanes.get(source)
+        if lane is None:
+            return
+        lane.running -= 1
+        while lane.waiting and lane.running < lane.limit:
+            _, _, start, _, future = heapq.heappop(lane.waiting)
+            if future.done():
+                continue
+            lane.running += 1
+            self._virtual = max(self._virtual, start)
+            future.set_result(None)
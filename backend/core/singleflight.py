@@ -0,0 +1,131 @@
+"""
+Request coalescing ("single-flight") for identical concurrent work.
+Within one worker, callers asking for the same key share one in-flight task.
+Across uvicorn workers, the first worker takes a short-lived Redis lock and
+publishes the encoded result when done; the other workers wait for that
+notification instead of repeating the work.
+"""
+import asyncio
+import logging
+import os
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional
+from . import network_utils
+
+logger = logging.getLogger(__name__)
+
+SINGLEFLIGHT_LOCK_TTL_SECONDS = float(os.getenv("SINGLEFLIGHT_LOCK_TTL_SECONDS", "60"))
+SINGLEFLIGHT_WAIT_SECONDS = float(os.getenv("SINGLEFLIGHT_WAIT_SECONDS", "40"))
+
+# Deletes the lock only if we still own it.
+_RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    def __init__(self, namespace: str = "osint:flight", redis_getter: Optional[Callable[[], Any]] = None):
+        self.namespace = namespace
+        self._redis_getter = redis_getter
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def _redis(self):
+        getter = self._redis_getter or network_utils.get_redis
+        return getter()
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]],
+                 encode: Optional[Callable[[Any], str]] = None,
+                 decode: Optional[Callable[[str], Any]] = None) -> Any:
+        """
+        Runs `fn` once per key at a time and hands its result to every concurrent caller.
+        Cross-worker coalescing is used when Redis is reachable and `encode`/`decode` are given.
+        A caller that gets cancelled does not cancel the shared execution.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            if encode is not None and decode is not None:
+                task = asyncio.ensure_future(self._coordinated(key, fn, encode, decode))
+            else:
+                task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away.
+            task.exception()
+
+    async def _coordinated(self, key: str, fn, encode, decode):
+        client = self._redis()
+        if client is None:
+            return await fn()
+
+        lock_key = f"{self.namespace}:lock:{key}"
+        channel = f"{self.namespace}:done:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await client.set(lock_key, token, nx=True, px=int(SINGLEFLIGHT_LOCK_TTL_SECONDS * 1000))
+        except Exception as e:
+            network_utils.REDIS.mark_failed(e)
+            return await fn()
+
+        if acquired:
+            try:
+                result = await fn()
+                try:
+                    await client.publish(channel, encode(result))
+                except Exception as e:
+                    logger.debug("Single-flight publish failed for %s: %s", key, e)
+                return result
+            finally:
+                try:
+                    await client.eval(_RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                except Exception as e:
+                    # The lock still expires on its own after SINGLEFLIGHT_LOCK_TTL_SECONDS.
+                    logger.debug("Single-flight unlock failed for %s: %s", key, e)
+
+        payload = await self._wait_for_peer(client, lock_key, channel)
+        if payload is not None:
+            try:
+                return decode(payload)
+            except Exception:
+                logger.warning("Undecodable single-flight result for %s, running locally.", key)
+        return await fn()
+
+    async def _wait_for_peer(self, client, lock_key: str, channel: str) -> Optional[str]:
+        """Waits for the worker holding the lock to publish its result. None means run it ourselves."""
+        pubsub = client.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            # The owner may have finished between our SET NX and SUBSCRIBE.
+            if not await client.exists(lock_key):
+                return None
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + SINGLEFLIGHT_WAIT_SECONDS
+            while True:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return None
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=min(remaining, 1.0))
+                if message and message.get("type") == "message":
+                    return message.get("data")
+                if message is None and not await client.exists(lock_key):
+                    # Owner died or released without publishing.
+                    return None
+        except Exception as e:
+            logger.debug("Single-flight wait failed on %s: %s", channel, e)
+            return None
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
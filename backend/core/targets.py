@@ -0,0 +1,100 @@
+"""
+Target classification and normalization.
+Every analysis target is typed (domain, ip, email, username or url) and reduced
+to a canonical form: trimmed, lowercased, and with host names IDNA-encoded.
+The gatherer uses the type to pick the sources that support it, and uses the canonical
+form for single-flight and cache keys, so `Example.COM` and `example.com` share one entry.
+"""
+import ipaddress
+import re
+from dataclasses import dataclass
+from urllib.parse import urlsplit, urlunsplit
+
+DOMAIN = "domain"
+IP = "ip"
+EMAIL = "email"
+USERNAME = "username"
+URL = "url"
+TARGET_TYPES = (DOMAIN, IP, EMAIL, USERNAME, URL)
+
+_LABEL = re.compile(r"^(?!-)[a-z0-9-]{1,63}(?<!-)$")
+_TLD = re.compile(r"^(?:[a-z]{2,63}|xn--[a-z0-9-]{1,59})$")
+
+
+@dataclass(frozen=True)
+class Target:
+    raw: str
+    value: str
+    kind: str
+
+
+def _normalize_host(host: str) -> str:
+    """Lowercased, IDNA-encoded host name without a trailing dot. Raises ValueError if invalid."""
+    host = host.strip().rstrip(".").lower()
+    try:
+        host = host.encode("idna").decode("ascii")
+    except UnicodeError as e:
+        raise ValueError(f"Invalid host name: {host!r}") from e
+    return host
+
+
+def _as_domain(text: str):
+    if "." not in text:
+        return None
+    try:
+        host = _normalize_host(text)
+    except ValueError:
+        return None
+    labels = host.split(".")
+    if len(host) > 253 or not all(_LABEL.match(label) for label in labels) or not _TLD.match(labels[-1]):
+        return None
+    return host
+
+
+def _as_ip(text: str):
+    try:
+        return str(ipaddress.ip_address(text.strip("[]")))
+    except ValueError:
+        return None
+
+
+def _normalize_url(text: str):
+    parts = urlsplit(text)
+    if not parts.scheme or not parts.hostname:
+        return None
+    host = _as_ip(parts.hostname) or _as_domain(parts.hostname)
+    if host is None:
+        return None
+    if ":" in host:
+        host = f"[{host}]"
+    netloc = f"{host}:{parts.port}" if parts.port else host
+    return urlunsplit((parts.scheme.lower(), netloc, parts.path or "/", parts.query, ""))
+
+
+def classify_target(raw: str) -> Target:
+    """Types and normalizes a target; anything that is not a URL, IP, email or domain is a username."""
+    text = (raw or "").strip()
+
+    if "://" in text:
+        try:
+            url = _normalize_url(text)
+        except ValueError:
+            url = None
+        if url is not None:
+            return Target(raw=raw, value=url, kind=URL)
+
+    ip = _as_ip(text)
+    if ip is not None:
+        return Target(raw=raw, value=ip, kind=IP)
+
+    local, at, host = text.rpartition("@")
+    if at and local and " " not in local:
+        domain = _as_domain(host)
+        if domain is not None:
+            return Target(raw=raw, value=f"{local.lower()}@{domain}", kind=EMAIL)
+
+    domain = _as_domain(text)
+    if domain is not None:
+        return Target(raw=raw, value=domain, kind=DOMAIN)
+
+    return Target(raw=raw, value=text.lstrip("@").lower(), kind=USERNAME)
@@ -0,0 +1,56 @@
+"""
+Imports NVD JSON feeds into the offline CVE store (backend/core/nvd.py, NVD_DB_PATH).
+Re-running is cheap: feed files imported before are skipped and only CVEs with a newer
+lastModified are rewritten, so a daily `--fetch modified` keeps the store current.
+
+Usage:
+    python -m backend.nvd_import feeds/nvdcve-2.0-*.json.gz
+    python -m backend.nvd_import --fetch 2002 2003 ... 2025 modified
+"""
+import argparse
+import json
+import logging
+import os
+import httpx
+from backend.core.nvd import NVD, NvdStore
+
+NVD_FEED_URL = os.getenv("NVD_FEED_URL", "https://nvd.nist.gov/feeds/json/cve/2.0/nvdcve-2.0-{name}.json.gz")
+
+
+def fetch(names, directory: str):
+    """Downloads the named 2.0 feeds (a year, `modified` or `recent`) into `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    with httpx.Client(timeout=httpx.Timeout(120.0, connect=10.0), follow_redirects=True) as client:
+        for name in names:
+            url = NVD_FEED_URL.format(name=name)
+            path = os.path.join(directory, os.path.basename(url))
+            with client.stream("GET", url) as resp:
+                resp.raise_for_status()
+                with open(path, "wb") as f:
+                    for chunk in resp.iter_bytes():
+                        f.write(chunk)
+            paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("feeds", nargs="*", help="Feed files (.json or .json.gz), or feed names with --fetch.")
+    parser.add_argument("--fetch", action="store_true", help="Download the named feeds from NVD first.")
+    parser.add_argument("--feed-dir", default=os.path.join("data", "nvd-feeds"))
+    parser.add_argument("--db", default=None, help="Database path (default NVD_DB_PATH).")
+    parser.add_argument("--force", action="store_true", help="Re-import files even if imported before.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if not args.feeds:
+        parser.error("no feeds given")
+
+    store = NvdStore(args.db) if args.db else NVD
+    paths = fetch(args.feeds, args.feed_dir) if args.fetch else args.feeds
+    for path in paths:
+        print(json.dumps(store.import_feed(path, force=args.force)))
+
+
+if __name__ == "__main__":
+    main()
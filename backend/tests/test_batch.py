@@ -0,0 +1,38 @@
+import asyncio
+import pytest
+from backend.core import batch, gatherer, network_utils
+from backend.core.cache import LocalTTLCache, TieredCache
+from backend.core.registry import SourceRegistry
+from backend.core.models import SocialMediaHits
+
+pytestmark = pytest.mark.asyncio
+
+async def test_batch_dedupes_and_serves_cache_hits(monkeypatch):
+    monkeypatch.setattr(network_utils, "get_redis", lambda: None)
+    monkeypatch.setattr(network_utils, "get_redis_bytes", lambda: None)
+    monkeypatch.setattr(gatherer, "SOURCE_CACHE", TieredCache(LocalTTLCache()))
+    monkeypatch.setattr(gatherer, "HISTORY_ENABLED", False)
+    calls = []
+    running = {"now": 0, "peak": 0}
+
+    async def collect(target):
+        calls.append(target)
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.01)
+        running["now"] -= 1
+        return [SocialMediaHits(platform="GitHub", status="FOUND")]
+
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables({'sources.social_media': collect}))
+
+    await gatherer.run_osint_analysis("warm.example")
+    targets = ["warm.example"] + [f"user{i % 20}" for i in range(60)] + ["ab"]
+    events = [e async for e in batch.run_batch(targets, concurrency=4)]
+
+    summary = events[-1]
+    assert summary["event"] == "summary"
+    assert summary["unique"] == 22 and summary["duplicates"] == 40
+    assert summary["completed"] == 21 and summary["failed"] == 1
+    assert summary["cache_hits"] == 1
+    assert sorted(calls) == sorted(["warm.example"] + [f"user{i}" for i in range(20)])
+    assert running["peak"] <= 4
@@ -0,0 +1,145 @@
+import asyncio
+import time
+import fakeredis.aioredis
+import httpx
+import pytest
+from backend.core import connectors, network_utils
+from backend.core.breaker import HEDGED_REQUESTS, CircuitBreakers
+from backend.core.http_client import HttpClientRegistry
+from backend.core.rate_limit import BucketConfig, ProviderRateLimiter
+from benchmarks.stub_providers import StubConfig, start_stub_server
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture
+def stub():
+    server = start_stub_server(StubConfig(latency_ms=5, error_rate=1.0))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def redis(monkeypatch):
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(network_utils, "get_redis", lambda: client)
+    return client
+
+def _users_calls(server) -> int:
+    return sum(count for key, count in server.stats.items() if key.startswith("/search/users"))
+
+@pytest.mark.parametrize("shared", [True, False])
+async def test_breaker_opens_fails_fast_and_closes_after_a_good_probe(monkeypatch, stub, shared):
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(network_utils, "get_redis", lambda: client if shared else None)
+    monkeypatch.setattr(connectors, "PROVIDER_LIMITER", ProviderRateLimiter({"github_users": BucketConfig(rate=1000.0, capacity=1000)}))
+    monkeypatch.setattr(connectors, "PROVIDER_BREAKERS", CircuitBreakers(min_calls=4, failure_rate=0.5, open_seconds=0.3))
+    http = HttpClientRegistry(http2=False)
+    url = f"{stub.base_url}/search/users"
+
+    async def call():
+        return await connectors.provider_get("github_users", url, {}, {"q": "x"}, httpx.Timeout(2.0), http)
+
+    statuses = [(await call()).status_code for _ in range(4)]
+    assert statuses == [500] * 4
+
+    # Open: nothing reaches the provider and callers get an answer at once.
+    started = time.monotonic()
+    assert [await call() for _ in range(20)] == [None] * 20
+    assert time.monotonic() - started < 0.2
+    assert _users_calls(stub) == 4
+
+    # Half-open after the open period: a failed probe re-opens it.
+    await asyncio.sleep(0.35)
+    assert (await call()).status_code == 500
+    assert await call() is None
+
+    # The provider recovers: one good probe closes the breaker.
+    stub.config.error_rate = 0.0
+    await asyncio.sleep(0.35)
+    probe, after = await asyncio.gather(call(), call())
+    assert probe.status_code == 200 and after is None
+    assert all(r.status_code == 200 for r in [await call() for _ in range(3)])
+    assert _users_calls(stub) == 9
+    await http.aclose()
+
+async def test_open_breaker_is_shared_across_workers(redis):
+    worker_a = CircuitBreakers(min_calls=2, open_seconds=30)
+    worker_b = CircuitBreakers(min_calls=2, open_seconds=30)
+    for _ in range(2):
+        assert await worker_a.allow("bing")
+        await worker_a.record("bing", False, 0.01)
+    assert not await worker_b.allow("bing")
+    # Slow successes count against the breaker too.
+    for _ in range(2):
+        await worker_b.record("github_code", True, worker_b.slow_seconds + 1)
+    assert not await worker_a.allow("github_code")
+
+@pytest.mark.parametrize("shared", [True, False])
+async def test_shed_probe_frees_the_half_open_slot(monkeypatch, stub, shared):
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(network_utils, "get_redis", lambda: client if shared else None)
+    limiter = ProviderRateLimiter({"github_users": BucketConfig(rate=0.001, capacity=1)})
+    breakers = CircuitBreakers(min_calls=1, open_seconds=0.1, probe_timeout=30)
+    monkeypatch.setattr(connectors, "PROVIDER_LIMITER", limiter)
+    monkeypatch.setattr(connectors, "PROVIDER_BREAKERS", breakers)
+    http = HttpClientRegistry(http2=False)
+    url = f"{stub.base_url}/search/users"
+
+    async def call():
+        return await connectors.provider_get("github_users", url, {}, {"q": "x"}, httpx.Timeout(2.0), http,
+                                             deadline=time.monotonic())
+
+    # The only token goes to a failing call, which opens the breaker.
+    assert (await call()).status_code == 500
+    await asyncio.sleep(0.15)
+    # Half-open: the probe is let through but the limiter sheds it.
+    assert await call() is None
+    assert _users_calls(stub) == 1
+    # The slot is free again for the next probe, long before probe_timeout.
+    assert await breakers.allow("github_users")
+    await http.aclose()
+
+@pytest.mark.parametrize("shared", [True, False])
+async def test_cancelled_probe_frees_the_half_open_slot(monkeypatch, stub, shared):
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(network_utils, "get_redis", lambda: client if shared else None)
+    breakers = CircuitBreakers(min_calls=1, open_seconds=0.1, probe_timeout=30)
+    monkeypatch.setattr(connectors, "PROVIDER_LIMITER", ProviderRateLimiter({"github_users": BucketConfig(rate=1000.0, capacity=1000)}))
+    monkeypatch.setattr(connectors, "PROVIDER_BREAKERS", breakers)
+    http = HttpClientRegistry(http2=False)
+    stub.config.latency_ms = 1000
+
+    await breakers.record("github_users", False, 0.01)
+    await asyncio.sleep(0.15)
+    # Half-open: the probe is sent, then its caller gives up on it (a source budget or deadline).
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(connectors.provider_get(
+            "github_users", f"{stub.base_url}/search/users", {}, {"q": "x"}, httpx.Timeout(2.0), http), timeout=0.1)
+    assert await breakers.allow("github_users")
+    await http.aclose()
+
+async def test_slow_call_is_hedged():
+    breakers = CircuitBreakers(hedging=True)
+    for _ in range(50):
+        await breakers.record("bing", True, 0.01)
+    started_calls = []
+
+    async def call():
+        started_calls.append(time.monotonic())
+        # The first attempt hangs, like a request stuck behind a stalled connection.
+        await asyncio.sleep(5 if len(started_calls) == 1 else 0.01)
+        return len(started_calls)
+
+    hedges = HEDGED_REQUESTS.value(provider="bing", winner="hedge")
+    started = time.monotonic()
+    assert await breakers.hedged("bing", call) == 2
+    assert time.monotonic() - started < 0.5
+    assert HEDGED_REQUESTS.value(provider="bing", winner="hedge") == hedges + 1
+
+    async def no_token():
+        return False
+
+    started_calls.clear()
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(breakers.hedged("bing", call, no_token), timeout=0.2)
+    assert len(started_calls) == 1
@@ -0,0 +1,17 @@
+from backend.core.cache import LocalTTLCache, parse_source_overrides
+
+def test_local_cache_evicts_by_size_and_ttl():
+    cache = LocalTTLCache(max_entries=10, max_bytes=10)
+    cache.set("a", "12345", ttl_seconds=60)
+    cache.set("b", "12345", ttl_seconds=60)
+    cache.get("a")
+    cache.set("c", "12345", ttl_seconds=60)
+    assert cache.get("b") is None and cache.get("a") == "12345"
+    assert cache.total_bytes == 10
+
+    cache.set("short", "x", ttl_seconds=0)
+    assert cache.get("short") is None
+
+def test_parse_source_overrides_accepts_short_names():
+    ttls = parse_source_overrides("deep_search=86400, sources.search_engine=120,bogus,social_media=x")
+    assert ttls == {"sources.deep_search": 86400, "sources.search_engine": 120}
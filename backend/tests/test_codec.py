@@ -0,0 +1,44 @@
+import pytest
+from backend.core import network_utils
+from backend.core.cache import LocalTTLCache, TieredCache
+from backend.core.codec import SERIALIZERS, CacheCodec
+from backend.core.models import DomainInfo, SocialMediaHits, SourceResult, WebSearchHit
+
+def _sample(hits: int = 50) -> SourceResult:
+    return SourceResult(
+        domain_results=DomainInfo(is_registered=True, owner_simulated="Acme"),
+        social_media_hits=[SocialMediaHits(platform=f"Site{i}", url_found=f"https://s{i}.example/u", status="FOUND") for i in range(hits)],
+        web_search_data=[WebSearchHit(source="Bing", result_type="WebPage", data={"url": "https://x", "rank": 1})],
+    )
+
+@pytest.mark.parametrize("serializer", sorted(SERIALIZERS))
+@pytest.mark.parametrize("compress_min_bytes", [None, 256])
+def test_round_trip(serializer, compress_min_bytes):
+    codec = CacheCodec(serializer=serializer, compress_min_bytes=compress_min_bytes)
+    original = _sample()
+    payload = codec.encode(original)
+    assert codec.decode(payload, SourceResult) == original
+    assert codec.raw_size(payload) >= len(payload) - 13
+
+def test_stale_schema_and_legacy_payloads_are_misses():
+    payload = CacheCodec(schema_version=1).encode(_sample(1))
+    assert CacheCodec(schema_version=2).decode(payload, SourceResult) is None
+    assert CacheCodec().decode(_sample(1).model_dump_json().encode(), SourceResult) is None
+    assert CacheCodec().decode(None, SourceResult) is None
+
+@pytest.mark.asyncio
+async def test_tiered_cache_round_trips_through_redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(network_utils, "get_redis_bytes", lambda: fakeredis.aioredis.FakeRedis(server=server))
+
+    writer = TieredCache(LocalTTLCache(), codec=CacheCodec(schema_version=1))
+    await writer.set_many({"k": _sample()}, ttls={"k": 60})
+
+    reader = TieredCache(LocalTTLCache(), codec=CacheCodec(schema_version=1))
+    entry = (await reader.get_many(["k"], SourceResult))["k"]
+    assert entry.value == _sample() and not entry.is_stale
+    assert reader.local.get("k") is not None
+
+    upgraded = TieredCache(LocalTTLCache(), codec=CacheCodec(schema_version=2))
+    assert (await upgraded.get_many(["k"], SourceResult))["k"] is None
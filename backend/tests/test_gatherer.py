@@ -1,13 +1,24 @@
 import asyncio
-import json
-import importlib
-import types
 import pytest
-from backend.core import gatherer
-from backend.core.models import DomainInfo
+from backend.core import gatherer, network_utils
+from backend.core.cache import LocalTTLCache, TieredCache, source_cache_key
+from backend.core.refresh import BackgroundRefresher, HotTargetTracker
+from backend.core.registry import SourceRegistry, SourceSpec
+from backend.core.models import DomainInfo, SourceResult, SocialMediaHits
 
 pytestmark = pytest.mark.asyncio
 
+@pytest.fixture(autouse=True)
+def isolated_cache(monkeypatch):
+    monkeypatch.setattr(network_utils, "get_redis", lambda: None)
+    monkeypatch.setattr(network_utils, "get_redis_bytes", lambda: None)
+    cache = TieredCache(LocalTTLCache())
+    monkeypatch.setattr(gatherer, "SOURCE_CACHE", cache)
+    monkeypatch.setattr(gatherer, "REFRESHER", BackgroundRefresher())
+    monkeypatch.setattr(gatherer, "HOT_TARGETS", HotTargetTracker())
+    monkeypatch.setattr(gatherer, "HISTORY_ENABLED", False)
+    return cache
+
 async def test_run_osint_normalization(monkeypatch):
     async def domain_collect(target):
         return DomainInfo(is_registered=True, owner_simulated="Acme Inc", expiration_date="2030-01-01")
@@ -22,21 +33,14 @@ async def test_run_osint_normalization(monkeypatch):
         return [{"source": "Bing", "result_type": "WebPage", "data": {"name": "X", "url": "http://x", "snippet": "s"}}]
 
     stub_map = {
-        'sources.domain_checker': types.SimpleNamespace(collect_data=domain_collect),
-        'sources.social_media': types.SimpleNamespace(collect_data=social_collect),
-        'sources.vulnerability_db': types.SimpleNamespace(collect_data=vuln_collect),
-        'sources.search_engine': types.SimpleNamespace(collect_data=web_collect),
-        'sources.deep_search': types.SimpleNamespace(collect_data=lambda t: []),
+        'sources.domain_checker': domain_collect,
+        'sources.social_media': social_collect,
+        'sources.vulnerability_db': vuln_collect,
+        'sources.search_engine': web_collect,
+        'sources.deep_search': lambda t: [],
     }
 
-    def fake_import(name):
-        return stub_map[name]
-
-    monkeypatch.setattr(gatherer, "get_from_cache", lambda k: None)
-    monkeypatch.setattr(gatherer, "set_to_cache", lambda k, v, ttl_seconds=3600: None)
-    monkeypatch.setattr(importlib, "import_module", fake_import)
-
-    monkeypatch.setattr(gatherer, "SOURCE_MODULES", list(stub_map.keys()))
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables(stub_map))
 
     report = await gatherer.run_osint_analysis("example")
 
@@ -46,21 +50,186 @@ async def test_run_osint_normalization(monkeypatch):
     assert len(report.vulnerability_hits) == 1
     assert len(report.web_search_data) == 1
 
-async def test_run_osint_cache_hit(monkeypatch):
-    sample = {
-        "target": "cached",
-        "timestamp": "2025-01-01T00:00:00Z",
-        "summary": "Cached report",
-        "is_cached": True,
-        "domain_results": None,
-        "social_media_hits": [],
-        "vulnerability_hits": [],
-        "web_search_data": [],
-    }
-    monkeypatch.setattr(gatherer, "get_from_cache", lambda k: json.dumps(sample))
-    monkeypatch.setattr(gatherer, "set_to_cache", lambda k, v, ttl_seconds=3600: None)
+async def test_run_osint_cache_hit(monkeypatch, isolated_cache):
+    async def never_called(target):
+        raise AssertionError("source should be served from cache")
+
+    modules = ['sources.domain_checker', 'sources.social_media']
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables({m: never_called for m in modules}))
+    await isolated_cache.set_many({
+        source_cache_key('sources.domain_checker', "cached"): SourceResult(domain_results=DomainInfo(is_registered=True)),
+        source_cache_key('sources.social_media', "cached"): SourceResult(social_media_hits=[SocialMediaHits(platform="GitHub", status="FOUND")]),
+    }, ttls={})
 
     report = await gatherer.run_osint_analysis("cached")
     assert report.is_cached is True
     assert report.target == "cached"
-    assert report.summary == "Cached report"
\ No newline at end of file
+    assert report.domain_results.is_registered is True
+    assert len(report.social_media_hits) == 1
+
+async def test_partial_cache_hit_reruns_only_stale_sources(monkeypatch, isolated_cache):
+    calls = {"domain": 0, "social": 0}
+
+    async def domain_collect(target):
+        calls["domain"] += 1
+        return DomainInfo(is_registered=True)
+
+    async def social_collect(target):
+        calls["social"] += 1
+        return [SocialMediaHits(platform="GitHub", status="FOUND")]
+
+    stub_map = {
+        'sources.domain_checker': domain_collect,
+        'sources.social_media': social_collect,
+    }
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables(stub_map))
+
+    first = await gatherer.run_osint_analysis("acme.com")
+    assert first.is_cached is False
+
+    isolated_cache.local.delete(source_cache_key('sources.social_media', "acme.com"))
+    second = await gatherer.run_osint_analysis("acme.com")
+
+    assert calls == {"domain": 1, "social": 2}
+    assert second.is_cached is False
+    assert second.domain_results is not None and len(second.social_media_hits) == 1
+
+async def test_concurrent_requests_share_one_execution(monkeypatch):
+    calls = {"count": 0}
+
+    async def slow_collect(target):
+        calls["count"] += 1
+        await asyncio.sleep(0.05)
+        return [SocialMediaHits(platform="GitHub", status="FOUND")]
+
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables({'sources.social_media': slow_collect}))
+
+    reports = await asyncio.gather(*(gatherer.run_osint_analysis("busy-target") for _ in range(25)))
+
+    assert calls["count"] == 1
+    assert all(len(r.social_media_hits) == 1 for r in reports)
+    assert gatherer.ANALYSIS_FLIGHTS.in_flight() == 0
+
+async def test_stream_emits_sources_as_they_finish(monkeypatch):
+    async def slow_collect(target):
+        await asyncio.sleep(0.1)
+        return DomainInfo(is_registered=True)
+
+    async def fast_collect(target):
+        return [SocialMediaHits(platform="GitHub", status="FOUND")]
+
+    stub_map = {
+        'sources.domain_checker': slow_collect,
+        'sources.social_media': fast_collect,
+    }
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables(stub_map))
+
+    events = [event async for event in gatherer.stream_osint_analysis("acme.com")]
+
+    assert [e.get("source") for e in events[:2]] == ['sources.social_media', 'sources.domain_checker']
+    assert events[-1]["event"] == "report"
+    assert events[-1]["report"]["domain_results"]["is_registered"] is True
+    assert len(events[-1]["report"]["social_media_hits"]) == 1
+
+async def test_deadline_cancels_slow_sources_and_reports_partial(monkeypatch):
+    cancelled = {"slow": False}
+
+    async def slow_collect(target):
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled["slow"] = True
+            raise
+
+    async def fast_collect(target, deadline=None):
+        assert deadline is not None
+        return [SocialMediaHits(platform="GitHub", status="FOUND")]
+
+    async def broken_collect(target):
+        raise RuntimeError("provider down")
+
+    stub_map = {
+        'sources.domain_checker': slow_collect,
+        'sources.social_media': fast_collect,
+        'sources.vulnerability_db': broken_collect,
+    }
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables(stub_map))
+
+    started = asyncio.get_running_loop().time()
+    report = await gatherer.run_osint_analysis("acme.com", deadline=gatherer.new_deadline(0.2))
+    elapsed = asyncio.get_running_loop().time() - started
+
+    statuses = {s.source: s.status for s in report.sources}
+    assert statuses == {
+        'sources.domain_checker': "timeout",
+        'sources.social_media': "completed",
+        'sources.vulnerability_db': "failed",
+    }
+    assert report.is_partial is True
+    assert len(report.social_media_hits) == 1
+    assert cancelled["slow"] is True
+    assert elapsed < 1.0
+
+async def test_dispatch_by_target_type_and_normalized_cache_key(monkeypatch):
+    calls = []
+
+    async def domain_collect(target):
+        calls.append(("domain", target))
+        return DomainInfo(is_registered=True)
+
+    async def social_collect(target):
+        calls.append(("social", target))
+        return [SocialMediaHits(platform="GitHub", status="FOUND")]
+
+    registry = SourceRegistry([
+        SourceSpec.from_meta('sources.domain_checker', {"target_types": ["domain"]}, domain_collect),
+        SourceSpec.from_meta('sources.social_media', {"target_types": ["username"]}, social_collect),
+    ])
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", registry)
+
+    first = await gatherer.run_osint_analysis("Example.COM")
+    second = await gatherer.run_osint_analysis(" example.com ")
+    user = await gatherer.run_osint_analysis("@SomeUser")
+
+    assert calls == [("domain", "example.com"), ("social", "someuser")]
+    assert first.target == "example.com" and first.target_type == "domain"
+    assert second.is_cached is True
+    assert [s.source for s in user.sources] == ['sources.social_media']
+
+async def test_stale_entry_is_served_then_refreshed_in_background(monkeypatch, isolated_cache):
+    calls = {"count": 0}
+
+    async def slow_collect(target):
+        calls["count"] += 1
+        await asyncio.sleep(0.2)
+        return [SocialMediaHits(platform="GitHub", status="FOUND")]
+
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables({'sources.social_media': slow_collect}))
+    key = source_cache_key('sources.social_media', "stale-user")
+    await isolated_cache.set_many({key: SourceResult()}, ttls={key: 0})
+
+    started = asyncio.get_running_loop().time()
+    report = await gatherer.run_osint_analysis("stale-user")
+    assert asyncio.get_running_loop().time() - started < 0.1
+    assert report.is_stale is True and report.is_cached is True
+    assert [s.status for s in report.sources] == ["stale"]
+
+    await asyncio.gather(*gatherer.REFRESHER._tasks.values())
+    refreshed = await gatherer.run_osint_analysis("stale-user")
+    assert calls["count"] == 1
+    assert refreshed.is_stale is False and len(refreshed.social_media_hits) == 1
+
+async def test_prewarm_refreshes_hot_targets(monkeypatch, isolated_cache):
+    async def collect(target):
+        return [SocialMediaHits(platform="GitHub", status="FOUND")]
+
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables({'sources.social_media': collect}))
+    for _ in range(3):
+        gatherer.HOT_TARGETS.touch("hot-user")
+    gatherer.HOT_TARGETS.touch("cold-user")
+
+    assert await gatherer.prewarm_hot_targets(limit=1) == 1
+    await asyncio.gather(*gatherer.REFRESHER._tasks.values())
+
+    assert isolated_cache.local.get(source_cache_key('sources.social_media', "hot-user")) is not None
+    assert isolated_cache.local.get(source_cache_key('sources.social_media', "cold-user")) is None
@@ -0,0 +1,78 @@
+import pytest
+from backend.core import gatherer, network_utils
+from backend.core.cache import LocalTTLCache, TieredCache
+from backend.core.history import HistoryStore
+from backend.core.registry import SourceRegistry
+from backend.core.models import DigitalFootprintReport, SocialMediaHits, SourceResult, VulnerabilityHit, WebSearchHit
+
+pytestmark = pytest.mark.asyncio
+
+def _report(target):
+    return DigitalFootprintReport(target=target, target_type="domain", timestamp="2026-01-01T00:00:00", summary="s")
+
+async def test_history_batches_writes_and_diffs_scans(tmp_path):
+    store = HistoryStore(path=str(tmp_path / "history.sqlite3"), flush_seconds=0.01)
+    first = {
+        "sources.social_media": SourceResult(social_media_hits=[
+            SocialMediaHits(platform="GitHub", url_found="https://github.com/acme", status="FOUND"),
+            SocialMediaHits(platform="Reddit", url_found="https://reddit.com/u/acme", status="FOUND"),
+        ]),
+        "sources.vulnerability_db": SourceResult(vulnerability_hits=[
+            VulnerabilityHit(source="NVD", cve_id="CVE-2025-0001", severity="HIGH", description="Example"),
+        ]),
+    }
+    second = {
+        "sources.social_media": SourceResult(social_media_hits=[
+            SocialMediaHits(platform="GitHub", url_found="https://github.com/acme", status="FOUND"),
+        ]),
+        "sources.search_engine": SourceResult(web_search_data=[
+            WebSearchHit(source="Bing", result_type="WebPage", data={"url": "https://acme.example/about"}),
+        ]),
+    }
+    store.record(_report("acme.example"), first)
+    store.record(_report("acme.example"), second)
+    store.record(_report("other.example"), first)
+    await store.flush()
+
+    scans = await store.scans("acme.example")
+    assert [s["hit_count"] for s in scans] == [2, 3]
+
+    diff = await store.diff("acme.example")
+    assert diff["from_scan"] == scans[1]["scan_id"] and diff["to_scan"] == scans[0]["scan_id"]
+    assert diff["unchanged"] == 1
+    assert [h["hit"]["data"]["url"] for h in diff["added"]] == ["https://acme.example/about"]
+    assert sorted(h["source"] for h in diff["removed"]) == ["sources.social_media", "sources.vulnerability_db"]
+
+    by_cve = await store.hits(cve_id="CVE-2025-0001")
+    assert sorted(h["target"] for h in by_cve) == ["acme.example", "other.example"]
+    assert len(await store.hits(platform="GitHub", target="acme.example")) == 2
+    assert len(await store.hits(url="https://acme.example/about")) == 1
+    with pytest.raises(ValueError):
+        await store.hits()
+    await store.aclose()
+
+async def test_history_reads_before_first_write(tmp_path):
+    store = HistoryStore(path=str(tmp_path / "missing.sqlite3"))
+    assert await store.scans("nobody") == []
+    assert await store.diff("nobody") is None
+
+async def test_analysis_records_live_scans_only(monkeypatch, tmp_path):
+    monkeypatch.setattr(network_utils, "get_redis", lambda: None)
+    monkeypatch.setattr(network_utils, "get_redis_bytes", lambda: None)
+    monkeypatch.setattr(gatherer, "SOURCE_CACHE", TieredCache(LocalTTLCache()))
+    store = HistoryStore(path=str(tmp_path / "history.sqlite3"), flush_seconds=0.01)
+    monkeypatch.setattr(gatherer, "HISTORY", store)
+    monkeypatch.setattr(gatherer, "HISTORY_ENABLED", True)
+
+    async def collect(target):
+        return [SocialMediaHits(platform="GitHub", url_found=f"https://github.com/{target}", status="FOUND")]
+
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables({'sources.social_media': collect}))
+    await gatherer.run_osint_analysis("someone")
+    cached = await gatherer.run_osint_analysis("someone")
+    assert cached.is_cached is True
+    await store.flush()
+
+    scans = await store.scans("someone")
+    assert len(scans) == 1 and scans[0]["hit_count"] == 1
+    await store.aclose()
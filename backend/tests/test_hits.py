@@ -0,0 +1,28 @@
+import sys
+from backend.core.hits import SocialHit, WebHit, compact, compact_result
+from backend.core.models import DomainInfo, SocialMediaHits, SourceResult, VulnerabilityHit, WebSearchHit
+
+def test_compact_rows_match_model_rows():
+    domain = DomainInfo(is_registered=True, owner_simulated="Example Org")
+    social = SocialMediaHits(platform="GitHub", url_found="https://github.com/a", status="FOUND")
+    vuln = VulnerabilityHit(source="NVD", cve_id="CVE-2024-1", severity="HIGH", description="x")
+    web = WebSearchHit(source="Bing", result_type="WebPage", data={"html_url": "https://x/1", "tags": {1}})
+    part = SourceResult(domain_results=domain, social_media_hits=[social], vulnerability_hits=[vuln], web_search_data=[web])
+
+    assert [hit.row() for hit in compact_result(part)] == [
+        ("domain", None, None, None, None, domain.model_dump(mode="json")),
+        ("social", None, "GitHub", None, "https://github.com/a", social.model_dump(mode="json")),
+        ("vulnerability", "NVD", None, "CVE-2024-1", None, vuln.model_dump(mode="json")),
+        ("web", "Bing", None, None, "https://x/1", web.model_dump(mode="json")),
+    ]
+    assert compact({"platform": "GitHub"}) is None
+
+def test_compact_hits_are_slotted_and_share_interned_strings():
+    platform = "".join(["Git", "Hub"])
+    first = compact(SocialMediaHits(platform=platform, status="FOUND"))
+    second = compact(SocialMediaHits(platform="GitHub", status="FOUND"))
+    assert isinstance(first, SocialHit) and first.platform is second.platform
+    assert not hasattr(first, "__dict__")
+    key = "".join(["ur", "l"])
+    hit = compact(WebSearchHit(source="Bing", result_type="WebPage", data={key: "https://x/1"}))
+    assert isinstance(hit, WebHit) and next(iter(hit.data)) is sys.intern("url")
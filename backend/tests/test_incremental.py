@@ -0,0 +1,78 @@
+import pytest
+from backend.core import connectors, gatherer, network_utils
+from backend.core.breaker import CircuitBreakers
+from backend.core.cache import LocalTTLCache, TieredCache
+from backend.core.incremental import IncrementalStore
+from backend.core.models import SocialMediaHits, VulnerabilityHit
+from backend.core.rate_limit import BucketConfig, ProviderRateLimiter
+from backend.core.refresh import BackgroundRefresher, HotTargetTracker
+from backend.core.registry import SourceRegistry
+from benchmarks.stub_providers import StubConfig, start_stub_server
+from sources import deep_search
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    monkeypatch.setattr(network_utils, "get_redis", lambda: None)
+    monkeypatch.setattr(network_utils, "get_redis_bytes", lambda: None)
+    monkeypatch.setattr(gatherer, "REFRESHER", BackgroundRefresher())
+    monkeypatch.setattr(gatherer, "HOT_TARGETS", HotTargetTracker())
+    monkeypatch.setattr(gatherer, "HISTORY_ENABLED", False)
+    store = IncrementalStore(namespace="test:incr")
+    monkeypatch.setattr(gatherer, "INCREMENTAL", store)
+    monkeypatch.setattr(connectors, "INCREMENTAL", store)
+
+def _expire_cache(monkeypatch):
+    monkeypatch.setattr(gatherer, "SOURCE_CACHE", TieredCache(LocalTTLCache()))
+
+async def test_unchanged_github_results_are_revalidated_with_304s(monkeypatch):
+    stub = start_stub_server(StubConfig(latency_ms=1))
+    monkeypatch.setattr(deep_search, "GITHUB_TOKEN", "stub")
+    monkeypatch.setattr(deep_search, "BING_API_KEY", None)
+    monkeypatch.setattr(deep_search, "GITHUB_API_URL", stub.base_url)
+    monkeypatch.setattr(connectors, "PROVIDER_LIMITER", ProviderRateLimiter({
+        "github_users": BucketConfig(rate=100.0, capacity=100), "github_code": BucketConfig(rate=100.0, capacity=100)}))
+    monkeypatch.setattr(connectors, "PROVIDER_BREAKERS", CircuitBreakers())
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables({"sources.deep_search": deep_search.collect_data}))
+    try:
+        _expire_cache(monkeypatch)
+        full = await gatherer.run_osint_analysis("octocat")
+        _expire_cache(monkeypatch)
+        first = await gatherer.run_osint_analysis("octocat", incremental=True)
+        _expire_cache(monkeypatch)
+        second = await gatherer.run_osint_analysis("octocat", incremental=True)
+    finally:
+        stub.shutdown()
+        stub.server_close()
+
+    # A full scan leaves no incremental state behind, so the first incremental scan starts from scratch.
+    assert not full.is_incremental
+    assert first.refreshed_sections == ["social_media_hits", "web_search_data"] and not first.sources[0].unchanged
+    assert second.is_incremental and second.refreshed_sections == []
+    assert second.sources[0].status == "completed" and second.sources[0].unchanged
+    assert second.social_media_hits == first.social_media_hits
+    assert second.web_search_data == first.web_search_data
+    assert stub.stats["/search/users 200"] == 2 and stub.stats["/search/users 304"] == 1
+    assert stub.stats["/search/code 200"] == 2 and stub.stats["/search/code 304"] == 1
+
+async def test_only_changed_sections_are_marked_refreshed(monkeypatch):
+    outputs = [
+        [SocialMediaHits(platform="GitHub", status="FOUND"), VulnerabilityHit(source="NVD", severity="LOW", description="x")],
+        [SocialMediaHits(platform="GitHub", status="FOUND"), VulnerabilityHit(source="NVD", severity="LOW", description="x")],
+        [SocialMediaHits(platform="GitLab", status="FOUND"), VulnerabilityHit(source="NVD", severity="LOW", description="x")],
+    ]
+
+    async def collect(target):
+        return outputs.pop(0)
+
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables({"sources.social_media": collect}))
+    reports = []
+    for _ in range(3):
+        _expire_cache(monkeypatch)
+        reports.append(await gatherer.run_osint_analysis("someone", incremental=True))
+
+    assert reports[0].refreshed_sections == ["social_media_hits", "vulnerability_hits"]
+    assert reports[1].refreshed_sections == [] and reports[1].sources[0].unchanged
+    assert reports[2].refreshed_sections == ["social_media_hits"]
+    assert reports[2].sources[0].refreshed == ["social_media_hits"] and not reports[2].sources[0].unchanged
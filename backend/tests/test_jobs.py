@@ -0,0 +1,105 @@
+import asyncio
+import pytest
+from backend.core import gatherer, jobs, network_utils
+from backend.core.cache import LocalTTLCache, TieredCache
+from backend.core.jobs import JobQueue
+from backend.core.registry import SourceRegistry
+from backend.core.models import SocialMediaHits
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture(autouse=True)
+def isolated_gatherer(monkeypatch):
+    monkeypatch.setattr(network_utils, "get_redis_bytes", lambda: None)
+    monkeypatch.setattr(gatherer, "SOURCE_CACHE", TieredCache(LocalTTLCache()))
+    monkeypatch.setattr(gatherer, "HISTORY_ENABLED", False)
+
+    async def collect(target):
+        await asyncio.sleep(0.01)
+        return [SocialMediaHits(platform="GitHub", url_found=f"https://github.com/{target}", status="FOUND")]
+
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables({'sources.social_media': collect}))
+
+async def test_jobs_run_in_process_without_redis(monkeypatch):
+    monkeypatch.setattr(network_utils, "get_redis", lambda: None)
+    queue = JobQueue()
+    job = await queue.submit("someone")
+    assert job["status"] == "queued"
+
+    events = [e async for e in queue.events(job["job_id"], wait_seconds=5)]
+    assert [e["event"] for e in events] == ["source", "report"]
+    done = await queue.get(job["job_id"])
+    assert done["status"] == "done"
+    assert done["report"]["social_media_hits"][0]["url_found"] == "https://github.com/someone"
+    assert await queue.get("missing") is None
+    await queue.aclose()
+
+async def test_workers_share_jobs_through_redis_stream(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(network_utils, "get_redis", lambda: client)
+    queue = JobQueue(stream="test:jobs", namespace="test:job")
+
+    jobs = [await queue.submit(f"user{i}") for i in range(6)]
+    stop = asyncio.Event()
+    workers = [asyncio.create_task(queue.work(f"w{i}", concurrency=2, stop=stop)) for i in range(2)]
+
+    streamed = [e async for e in queue.events(jobs[0]["job_id"], wait_seconds=5)]
+    assert streamed[-1]["event"] == "report"
+    for job in jobs:
+        for _ in range(200):
+            record = await queue.get(job["job_id"])
+            if record["status"] == "done":
+                break
+            await asyncio.sleep(0.01)
+        assert record["status"] == "done"
+        assert record["report"]["target"] == job["target"]
+
+    stop.set()
+    await asyncio.gather(*workers)
+    pending = await client.xpending("test:jobs", "osint-workers")
+    assert pending["pending"] == 0
+
+@pytest.mark.parametrize("shared", [True, False])
+async def test_queued_jobs_keep_the_incremental_flag(monkeypatch, shared):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(network_utils, "get_redis", lambda: client if shared else None)
+    queue = JobQueue(stream="test:jobs:incr", namespace="test:job:incr")
+    full, incremental = await queue.submit("someone"), await queue.submit("someone", incremental=True)
+    stop = asyncio.Event()
+    worker = asyncio.create_task(queue.work("w0", concurrency=2, stop=stop)) if shared else None
+
+    for job, expected in ((full, False), (incremental, True)):
+        events = [e async for e in queue.events(job["job_id"], wait_seconds=5)]
+        assert events[-1]["event"] == "report" and events[-1]["report"]["is_incremental"] is expected
+        assert (await queue.get(job["job_id"]))["incremental"] is expected
+
+    if worker is not None:
+        stop.set()
+        await worker
+    await queue.aclose()
+
+async def test_running_job_is_not_reclaimed_by_another_worker(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(network_utils, "get_redis", lambda: client)
+    monkeypatch.setattr(jobs, "JOB_CLAIM_IDLE_SECONDS", 0.2)
+    runs = []
+
+    async def slow(target):
+        runs.append(target)
+        await asyncio.sleep(1.0)
+        return [SocialMediaHits(platform="GitHub", status="FOUND")]
+
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables({'sources.social_media': slow}))
+    queue = JobQueue(stream="test:jobs:slow", namespace="test:job:slow")
+    job = await queue.submit("someone", timeout=5)
+    stop = asyncio.Event()
+    workers = [asyncio.create_task(queue.work(f"w{i}", concurrency=1, stop=stop)) for i in range(2)]
+
+    events = [e async for e in queue.events(job["job_id"], wait_seconds=5)]
+    assert events[-1]["event"] == "report"
+    stop.set()
+    await asyncio.gather(*workers)
+    assert runs == ["someone"]
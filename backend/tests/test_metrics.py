@@ -0,0 +1,73 @@
+import asyncio
+import httpx
+import pytest
+from backend import api
+from backend.core import gatherer, network_utils
+from backend.core.cache import LocalTTLCache, TieredCache
+from backend.core.metrics import CACHE_LOOKUPS, SOURCE_DURATION, SOURCE_RESULTS, MetricsRegistry
+from backend.core.registry import SourceRegistry, SourceSpec
+from backend.core.models import SocialMediaHits
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture(autouse=True)
+def isolated_gatherer(monkeypatch):
+    monkeypatch.setattr(network_utils, "get_redis", lambda: None)
+    monkeypatch.setattr(network_utils, "get_redis_bytes", lambda: None)
+    monkeypatch.setattr(gatherer, "SOURCE_CACHE", TieredCache(LocalTTLCache()))
+    monkeypatch.setattr(gatherer, "HISTORY_ENABLED", False)
+
+    async def fast(target):
+        return [SocialMediaHits(platform="GitHub", status="FOUND")]
+
+    async def slow(target):
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry([
+        SourceSpec.from_meta("sources.metrics_fast", {}, collect=fast),
+        SourceSpec.from_meta("sources.metrics_slow", {"timeout": 0.05}, collect=slow),
+    ]))
+
+async def test_registry_renders_prometheus_text():
+    registry = MetricsRegistry()
+    hits = registry.counter("demo_total", "Demo counter.", ("source",))
+    latency = registry.histogram("demo_seconds", "Demo histogram.", buckets=(0.1, 1.0))
+    registry.gauge("demo_live", "Demo gauge.", fn=lambda: 3)
+    hits.inc(source='a"b')
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    text = registry.render()
+    assert '# TYPE demo_total counter\ndemo_total{source="a\\"b"} 1\n' in text
+    assert 'demo_seconds_bucket{le="0.1"} 1\ndemo_seconds_bucket{le="1"} 2\ndemo_seconds_bucket{le="+Inf"} 2\n' in text
+    assert "demo_seconds_count 2\n" in text
+    assert "demo_live 3\n" in text
+
+async def test_analysis_records_source_outcomes_and_cache_lookups():
+    before = {
+        "timeout": SOURCE_RESULTS.value(source="sources.metrics_slow", status="timeout"),
+        "miss": CACHE_LOOKUPS.value(source="sources.metrics_fast", result="miss"),
+        "hit": CACHE_LOOKUPS.value(source="sources.metrics_fast", result="hit"),
+        "observed": SOURCE_DURATION.count(source="sources.metrics_fast", status="completed"),
+    }
+    await gatherer.run_osint_analysis("metrics-user")
+    await gatherer.run_osint_analysis("metrics-user")
+
+    assert SOURCE_RESULTS.value(source="sources.metrics_slow", status="timeout") == before["timeout"] + 2
+    assert CACHE_LOOKUPS.value(source="sources.metrics_fast", result="miss") == before["miss"] + 1
+    assert CACHE_LOOKUPS.value(source="sources.metrics_fast", result="hit") == before["hit"] + 1
+    assert SOURCE_DURATION.count(source="sources.metrics_fast", status="completed") == before["observed"] + 1
+
+async def test_api_exposes_metrics_and_server_timing():
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://engine") as client:
+        resp = await client.get("/analyze", params={"target": "timing-user"})
+        assert resp.status_code == 200
+        timing = resp.headers["Server-Timing"]
+        assert 'metrics_fast;desc="completed";dur=' in timing
+        assert 'metrics_slow;desc="timeout";dur=' in timing
+        assert ", app;dur=" in timing
+
+        text = (await client.get("/metrics")).text
+    assert 'osint_http_requests_total{route="/analyze",method="GET",code="200"}' in text
+    assert "osint_analyses_in_flight 0" in text
+    assert 'osint_source_duration_seconds_bucket{source="sources.metrics_fast",status="completed",le="0.005"}' in text
@@ -0,0 +1,28 @@
+import pytest
+from backend.core import network_utils
+
+pytestmark = pytest.mark.asyncio
+
+async def test_redis_backoff_then_reconnect(monkeypatch):
+    connector = network_utils.RedisConnector("redis://127.0.0.1:1/0")
+    now = [100.0]
+    monkeypatch.setattr(network_utils.time, "monotonic", lambda: now[0])
+
+    assert connector.client() is not None
+    connector.mark_failed(ConnectionError("down"))
+    assert connector.client() is None
+
+    now[0] += network_utils.REDIS_RETRY_BASE_SECONDS + 0.01
+    assert connector.client() is not None
+
+    connector.mark_failed(ConnectionError("still down"))
+    now[0] += network_utils.REDIS_RETRY_BASE_SECONDS + 0.01
+    assert connector.client() is None  # second failure doubles the window
+    await connector.aclose()
+
+async def test_cache_helpers_degrade_without_redis(monkeypatch):
+    monkeypatch.setattr(network_utils, "get_redis", lambda: None)
+    monkeypatch.setattr(network_utils, "get_redis_bytes", lambda: None)
+    assert await network_utils.get_from_cache("k") is None
+    assert await network_utils.get_many_from_cache(["a", "b"]) == [None, None]
+    assert await network_utils.get_random_user_agent() in network_utils.FALLBACK_USER_AGENTS
@@ -0,0 +1,22 @@
+from backend.core.models import DomainInfo, SocialMediaHits, SourceResult, WebSearchHit
+from backend.core.normalize import normalize_result
+
+def test_mixed_list_is_routed_per_item():
+    result = normalize_result([
+        WebSearchHit(source="Bing", result_type="WebPage", data={}),
+        SocialMediaHits(platform="GitHub", status="FOUND"),
+        {"platform": "Reddit", "status": "FOUND"},
+        {"source": "NVD", "severity": "HIGH", "description": "x"},
+        {"source": "GitHub", "result_type": "Code", "data": []},
+        {"severity": "LOW"},
+        "garbage",
+    ])
+    assert [h.platform for h in result.social_media_hits] == ["GitHub", "Reddit"]
+    assert [h.source for h in result.web_search_data] == ["Bing", "GitHub"]
+    assert len(result.vulnerability_hits) == 1
+
+def test_envelope_and_single_model_pass_through():
+    envelope = SourceResult(domain_results=DomainInfo(is_registered=True))
+    assert normalize_result(envelope) is envelope
+    assert normalize_result(DomainInfo(is_registered=False)).domain_results.is_registered is False
+    assert normalize_result(None) == SourceResult()
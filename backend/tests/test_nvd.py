@@ -0,0 +1,69 @@
+import asyncio
+import gzip
+import json
+from backend.core.nvd import NvdStore, parse_feed
+from sources import vulnerability_db
+
+def v2_item(cve_id, modified, score, severity, cpes, description="", status="Analyzed"):
+    return {"cve": {
+        "id": cve_id, "published": "2024-01-01T00:00:00.000", "lastModified": modified, "vulnStatus": status,
+        "descriptions": [{"lang": "es", "value": "otro"}, {"lang": "en", "value": description or f"Flaw in {cve_id}"}],
+        "metrics": {"cvssMetricV31": [{"cvssData": {"baseScore": score, "baseSeverity": severity}}]},
+        "configurations": [{"nodes": [{"cpeMatch": [{"vulnerable": True, "criteria": c} for c in cpes]}]}],
+    }}
+
+def write_feed(path, items):
+    path.write_bytes(gzip.compress(json.dumps({"format": "NVD_CVE", "vulnerabilities": items}).encode()))
+    return str(path)
+
+def test_import_lookup_and_incremental_update(tmp_path):
+    store = NvdStore(str(tmp_path / "nvd.sqlite3"))
+    year = write_feed(tmp_path / "nvdcve-2.0-2024.json.gz", [
+        v2_item("CVE-2024-0001", "2024-02-01T00:00:00.000", 9.8, "CRITICAL", ["cpe:2.3:a:acme:portal:1.0:*:*:*:*:*:*:*"],
+                "Remote code execution in the Acme portal login form"),
+        v2_item("CVE-2024-0002", "2024-02-01T00:00:00.000", 5.3, "MEDIUM", ["cpe:2.3:a:acme:mailer:*:*:*:*:*:*:*:*"]),
+        v2_item("CVE-2024-0003", "2024-02-01T00:00:00.000", 7.5, "HIGH", ["cpe:2.3:o:globex:router_os:2:*:*:*:*:*:*:*"]),
+    ])
+    assert store.import_feed(year)["inserted"] == 3
+    assert store.import_feed(year) == {"feed": "nvdcve-2.0-2024.json.gz", "skipped": True}
+
+    assert [r["cve_id"] for r in store.for_keys(["acme"])] == ["CVE-2024-0001", "CVE-2024-0002"]
+    assert [r["cve_id"] for r in store.for_keys(["router_os"])] == ["CVE-2024-0003"]
+    assert [r["cve_id"] for r in store.search("login form")] == ["CVE-2024-0001"]
+
+    modified = write_feed(tmp_path / "nvdcve-2.0-modified.json.gz", [
+        v2_item("CVE-2024-0001", "2024-01-15T00:00:00.000", 1.0, "LOW", []),           # older copy: ignored
+        v2_item("CVE-2024-0002", "2024-03-01T00:00:00.000", 10.0, "CRITICAL", ["cpe:2.3:a:acme:mailer:*:*:*:*:*:*:*:*"],
+                "Mailer header injection"),
+        v2_item("CVE-2024-0003", "2024-03-01T00:00:00.000", 7.5, "HIGH", [], status="Rejected"),
+        v2_item("CVE-2024-0004", "2024-03-01T00:00:00.000", 4.0, "MEDIUM", ["cpe:2.3:a:globex:cloud:*:*:*:*:*:*:*:*"]),
+    ])
+    stats = store.import_feed(modified)
+    assert (stats["inserted"], stats["updated"], stats["unchanged"], stats["removed"]) == (1, 1, 1, 1)
+
+    assert [(r["cve_id"], r["score"]) for r in store.for_keys(["acme"])] == [("CVE-2024-0002", 10.0), ("CVE-2024-0001", 9.8)]
+    assert store.for_keys(["router_os"]) == []
+    assert store.search("header injection")[0]["cve_id"] == "CVE-2024-0002"
+    assert store.search("Flaw in CVE-2024-0002") == []
+    store.close()
+
+def test_legacy_feed_and_source_lookup(tmp_path, monkeypatch):
+    legacy = {"CVE_Items": [{
+        "cve": {"CVE_data_meta": {"ID": "CVE-2019-1000"}, "description": {"description_data": [{"lang": "en", "value": "Old bug"}]}},
+        "configurations": {"nodes": [{"children": [{"cpe_match": [{"vulnerable": True, "cpe23Uri": "cpe:2.3:a:initech:tps:*:*:*:*:*:*:*:*"}]}]}]},
+        "impact": {"baseMetricV2": {"cvssV2": {"baseScore": 6.8}, "severity": "MEDIUM"}},
+        "publishedDate": "2019-05-01T00:00Z", "lastModifiedDate": "2019-06-01T00:00Z",
+    }]}
+    [record] = parse_feed(legacy)
+    assert (record.cve_id, record.score, record.keys) == ("CVE-2019-1000", 6.8, ("initech", "tps"))
+
+    store = NvdStore(str(tmp_path / "nvd.sqlite3"))
+    store.import_records([record])
+    monkeypatch.setattr(vulnerability_db, "NVD", store)
+    assert vulnerability_db.target_keys("https://www.initech.co.uk/login") == ["initech"]
+    [hit] = vulnerability_db.nvd_hits("initech.com")
+    assert (hit.cve_id, hit.severity, hit.description) == ("CVE-2019-1000", "MEDIUM", "Old bug (CVSS 6.8)")
+    assert vulnerability_db.nvd_hits("10.0.0.1") == []
+    # The source answers from the store off the event loop.
+    assert [h.cve_id for h in asyncio.run(vulnerability_db.collect_vulnerability_data("initech.com"))] == ["CVE-2019-1000"]
+    store.close()
@@ -0,0 +1,101 @@
+import itertools
+import random
+import fakeredis.aioredis
+import pytest
+from backend.core import connectors, network_utils, permutations
+from backend.core.breaker import CircuitBreakers
+from backend.core.permutations import (
+    CheckedFilter, candidates, domain_typosquats, unchecked_batches, username_permutations,
+)
+from backend.core.rate_limit import BucketConfig, ProviderRateLimiter
+from backend.core.targets import _LABEL
+from benchmarks.stub_providers import StubConfig, start_stub_server
+from sources import deep_search, social_media
+
+pytestmark = pytest.mark.asyncio
+
+async def test_username_and_domain_variants():
+    variants = list(username_permutations("john.doe"))
+    assert "john.doe" not in variants
+    assert {"johndoe", "john_doe", "johndoe123", "j0hn.doe", "realjohn.doe"} <= set(variants)
+    # Generators are lazy: taking a few does not build the rest.
+    assert len(list(itertools.islice(username_permutations("a" * 500), 5))) == 5
+
+    squats = list(domain_typosquats("example.com"))
+    assert {"example.net", "exmaple.com", "examp1e.com", "exampl.com", "ex-ample.com"} <= set(squats)
+    assert all(_LABEL.match(d.split(".")[0]) for d in squats)
+    assert next(candidates("someone@example.com")).startswith("someone")
+    assert list(candidates("10.0.0.1")) == []
+
+@pytest.mark.parametrize("shared", [True, False])
+async def test_checked_pairs_are_skipped_on_later_scans(monkeypatch, shared):
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(network_utils, "get_redis", lambda: redis if shared else None)
+    checked = CheckedFilter(namespace="test:checked", capacity=1000)
+
+    first = [b async for b in unchecked_batches(username_permutations("alice"), "site", 10, batch_size=4, checked=checked)]
+    assert [len(b) for b in first] == [4, 4, 2]
+    await checked.add([(v, "site") for b in first for v in b])
+
+    second = [v async for b in unchecked_batches(username_permutations("alice"), "site", 10, batch_size=4, checked=checked) for v in b]
+    assert len(second) == 10 and not set(second) & {v for b in first for v in b}
+    # Pairs are per platform.
+    assert await checked.seen([(first[0][0], "site"), (first[0][0], "other")]) == [True, False]
+    if shared:
+        assert await redis.exists(checked._key())
+
+@pytest.fixture
+def bing_stub(monkeypatch):
+    monkeypatch.setattr(network_utils, "get_redis", lambda: None)
+    checked = CheckedFilter(namespace="test:checked", capacity=1000)
+    monkeypatch.setattr(permutations, "CHECKED", checked)
+    monkeypatch.setattr(deep_search, "CHECKED", checked)
+    monkeypatch.setattr(connectors, "PROVIDER_BREAKERS", CircuitBreakers())
+    monkeypatch.setattr(connectors, "PROVIDER_LIMITER", ProviderRateLimiter({"bing": BucketConfig(rate=100.0, capacity=100)}))
+    server = start_stub_server(StubConfig(latency_ms=1))
+    monkeypatch.setattr(deep_search, "BING_API_KEY", "stub")
+    monkeypatch.setattr(deep_search, "BING_ENDPOINT", f"{server.base_url}/v7.0/search")
+    yield server, checked
+    server.shutdown()
+    server.server_close()
+
+@pytest.mark.parametrize("outage", ["breaker_open", "shed"])
+async def test_unanswered_variant_searches_stay_unchecked(monkeypatch, bing_stub, outage):
+    server, checked = bing_stub
+    if outage == "breaker_open":
+        breakers = CircuitBreakers(min_calls=1, open_seconds=60)
+        await breakers.record("bing", False, 0.01)
+        monkeypatch.setattr(connectors, "PROVIDER_BREAKERS", breakers)
+    else:
+        monkeypatch.setattr(connectors, "PROVIDER_LIMITER", ProviderRateLimiter({"bing": BucketConfig(rate=0.001, capacity=0)}))
+
+    assert await deep_search._bing_variant_search("alice", "ua") == []
+    assert server.stats == {}
+    variants = list(itertools.islice(username_permutations("alice"), deep_search.DEEP_SEARCH_PERMUTATIONS))
+    assert not any(await checked.seen([(v, "bing") for v in variants]))
+
+async def test_hits_for_already_checked_variants_are_carried_forward(bing_stub):
+    server, checked = bing_stub
+    first = await deep_search._bing_variant_search("alice", "ua")
+    assert first and server.stats["/v7.0/search 200"] == 1
+
+    second = await deep_search._bing_variant_search("alice", "ua")
+    # Only the next variants were searched; the earlier ones were reported from the filter's store.
+    assert server.stats["/v7.0/search 200"] == 2
+    assert all(hit in second for hit in first)
+    assert {hit.data["permutation"] for hit in second} > {hit.data["permutation"] for hit in first}
+
+async def test_variant_profiles_are_carried_forward_on_rescans(monkeypatch):
+    monkeypatch.setattr(network_utils, "get_redis", lambda: None)
+    checked = CheckedFilter(namespace="test:checked", capacity=1000)
+    monkeypatch.setattr(social_media, "CHECKED", checked)
+    random.seed(7)
+    first = await social_media._probe_variants("alice", "", social_media.CATALOG, None, None, False, 3)
+    assert first and all(hit.status == "FOUND (VARIANT)" for hit in first)
+
+    probes = []
+    monkeypatch.setattr(social_media, "_simulated_probe", lambda *args: probes.append(args))
+    second = await social_media._probe_variants("alice", "", social_media.CATALOG, None, None, False, 3)
+    # Nothing was probed again, and every profile found before is still reported.
+    assert probes == []
+    assert sorted(h.model_dump_json() for h in second) == sorted(h.model_dump_json() for h in first)
@@ -0,0 +1,61 @@
+import time
+import pytest
+from backend.core import network_utils, rate_limit
+from backend.core.rate_limit import BucketConfig, ProviderRateLimiter
+
+pytestmark = pytest.mark.asyncio
+
+@pytest.fixture(autouse=True)
+def no_redis(monkeypatch):
+    monkeypatch.setattr(network_utils, "get_redis", lambda: None)
+
+async def test_bucket_queues_then_sheds():
+    limiter = ProviderRateLimiter({"bing": BucketConfig(rate=20.0, capacity=2)})
+    started = time.monotonic()
+    assert await limiter.acquire("bing")
+    assert await limiter.acquire("bing")
+    assert await limiter.acquire("bing")  # waits ~50ms for a refill
+    assert time.monotonic() - started >= 0.04
+
+    # Ten more tokens need ~0.5s; a 0.1s deadline forces the rest to be shed.
+    deadline = time.monotonic() + 0.1
+    outcomes = [await limiter.acquire("bing", deadline) for _ in range(10)]
+    assert outcomes.count(False) > 0
+
+async def test_exhausted_quota_pauses_provider():
+    limiter = ProviderRateLimiter({"github_code": BucketConfig(rate=100.0, capacity=10)})
+    reset_at = time.time() + 60
+    await limiter.observe("github_code", {"x-ratelimit-remaining": "0", "x-ratelimit-reset": str(reset_at)}, 200)
+    assert await limiter.acquire("github_code") is False
+
+async def test_retry_after_and_draining_quota():
+    limiter = ProviderRateLimiter({"bing": BucketConfig(rate=100.0, capacity=1), "github_users": BucketConfig(rate=100.0, capacity=1)})
+    await limiter.observe("bing", {"retry-after": "0.05"}, 429)
+    started = time.monotonic()
+    assert await limiter.acquire("bing")
+    assert time.monotonic() - started >= 0.03
+
+    await limiter.observe("github_users", {"x-ratelimit-remaining": "2", "x-ratelimit-reset": str(time.time() + 100)}, 200)
+    assert limiter._bucket("github_users").adj_rate == pytest.approx(0.02, rel=0.1)
+
+async def test_parse_provider_limits():
+    limits = rate_limit._parse_provider_limits("bing=3:6,github_code=0.2,bad")
+    assert limits["bing"].capacity == 6 and limits["github_code"].capacity == 1.0
+    assert "bad" not in limits
+
+async def test_redis_failure_backs_off_to_local_buckets(monkeypatch):
+    connector = network_utils.RedisConnector("redis://127.0.0.1:1/0")
+    attempts = []
+
+    def get_redis():
+        client = connector.client()
+        attempts.append(client is not None)
+        return client
+
+    monkeypatch.setattr(network_utils, "REDIS", connector)
+    monkeypatch.setattr(network_utils, "get_redis", get_redis)
+    limiter = ProviderRateLimiter({"bing": BucketConfig(rate=100.0, capacity=10)})
+    assert all([await limiter.acquire("bing") for _ in range(3)])
+    # Only the first call tried Redis; the rest used the local bucket during the backoff.
+    assert attempts == [True, False, False]
+    await connector.aclose()
@@ -0,0 +1,40 @@
+import asyncio
+import pytest
+from backend.core import network_utils
+from backend.core.refresh import BackgroundRefresher, HotTargetTracker
+
+pytestmark = pytest.mark.asyncio
+
+async def test_refresher_caps_concurrency_and_drops_duplicates(monkeypatch):
+    monkeypatch.setattr(network_utils, "get_redis", lambda: None)
+    refresher = BackgroundRefresher(concurrency=2, max_pending=5)
+    running = {"now": 0, "peak": 0}
+
+    async def refresh():
+        running["now"] += 1
+        running["peak"] = max(running["peak"], running["now"])
+        await asyncio.sleep(0.02)
+        running["now"] -= 1
+
+    queued = [refresher.schedule(f"t{i}", refresh) for i in range(8)]
+    assert queued == [True] * 5 + [False] * 3
+    assert refresher.schedule("t0", refresh) is False
+
+    await asyncio.gather(*refresher._tasks.values())
+    assert running["peak"] == 2
+    assert refresher.in_flight() == 0
+
+async def test_hot_targets_shared_through_redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(network_utils, "get_redis", lambda: client)
+
+    worker_a, worker_b = HotTargetTracker(), HotTargetTracker()
+    for _ in range(3):
+        worker_a.touch("popular.com")
+    worker_b.touch("popular.com")
+    worker_b.touch("rare.com")
+    await worker_b.flush()
+
+    assert await worker_a.top(1) == ["popular.com"]
+    assert await client.zscore("osint:hot", "popular.com") == 2.0
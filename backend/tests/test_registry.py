@@ -0,0 +1,35 @@
+import sys
+from backend.core.registry import SourceRegistry
+
+def test_discovery_reads_metadata_without_importing(tmp_path, monkeypatch):
+    pkg = tmp_path / "fake_sources"
+    pkg.mkdir()
+    (pkg / "__init__.py").write_text("")
+    (pkg / "heavy.py").write_text(
+        'SOURCE_META = {"target_types": ["domain"], "cost": 5, "timeout": 2.5, "lazy": True}\n'
+        'IMPORTED = True\n'
+        'async def collect_data(target, deadline=None):\n'
+        '    return []\n'
+    )
+    (pkg / "plain.py").write_text("def collect_data(target):\n    return []\n")
+    (pkg / "helpers.py").write_text("def not_a_source():\n    pass\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    registry = SourceRegistry.discover("fake_sources", entry_point_group=None)
+
+    assert registry.names() == ["fake_sources.heavy", "fake_sources.plain"]
+    heavy = registry.get("fake_sources.heavy")
+    assert heavy.target_types == ("domain",) and heavy.cost == 5 and heavy.timeout == 2.5 and heavy.lazy
+    assert registry.get("fake_sources.plain").target_types == ("any",)
+
+    registry.load_eager()
+    assert "fake_sources.plain" in sys.modules
+    assert "fake_sources.heavy" not in sys.modules
+
+    heavy.load()
+    assert heavy.loaded and heavy.accepts == frozenset({"target", "deadline"})
+
+def test_project_sources_are_discovered():
+    names = SourceRegistry.discover(entry_point_group=None).names()
+    assert {"sources.domain_checker", "sources.social_media", "sources.vulnerability_db",
+            "sources.search_engine", "sources.deep_search"} <= set(names)
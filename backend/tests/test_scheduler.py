@@ -0,0 +1,80 @@
+import asyncio
+import time
+import pytest
+from backend.core import batch, gatherer, network_utils
+from backend.core.cache import LocalTTLCache, TieredCache
+from backend.core.models import SocialMediaHits
+from backend.core.registry import SourceRegistry
+from backend.core.scheduler import BULK, INTERACTIVE, QUEUE_WAIT, FairScheduler
+
+pytestmark = pytest.mark.asyncio
+
+async def _admission_order(scheduler, queued):
+    """Holds the only slot, queues `queued` (name, priority) calls, then releases it and records who gets in."""
+    order = []
+
+    async def call(name, priority):
+        async with scheduler.slot("sources.deep_search", priority):
+            order.append(name)
+            await asyncio.sleep(0)
+
+    await scheduler.acquire("sources.deep_search", BULK)
+    tasks = []
+    for name, priority in queued:
+        tasks.append(asyncio.create_task(call(name, priority)))
+        await asyncio.sleep(0)
+    scheduler.release("sources.deep_search")
+    await asyncio.gather(*tasks)
+    return order
+
+async def test_interactive_calls_overtake_queued_bulk_work():
+    scheduler = FairScheduler(lambda name: 1)
+    order = await _admission_order(scheduler, [(f"b{i}", BULK) for i in range(8)] + [("i0", INTERACTIVE), ("i1", INTERACTIVE)])
+    assert order[:2] == ["i0", "i1"]
+    assert order[2:] == [f"b{i}" for i in range(8)]
+
+async def test_bulk_keeps_a_weighted_share():
+    scheduler = FairScheduler(lambda name: 1, weights={INTERACTIVE: 4.0, BULK: 1.0})
+    order = await _admission_order(scheduler, [(f"b{i}", BULK) for i in range(10)] + [(f"i{i}", INTERACTIVE) for i in range(20)])
+    # Bulk is not starved while interactive calls are queued: about one slot in every five.
+    first_ten = order[:10]
+    assert 1 <= sum(name.startswith("b") for name in first_ten) <= 3
+
+async def test_cancelled_waiter_does_not_leak_its_slot():
+    scheduler = FairScheduler(lambda name: 1)
+    await scheduler.acquire("sources.search_engine")
+    waiter = asyncio.create_task(scheduler.acquire("sources.search_engine", BULK))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    scheduler.release("sources.search_engine")
+    await asyncio.wait_for(scheduler.acquire("sources.search_engine"), timeout=0.5)
+
+async def test_interactive_analysis_is_not_stuck_behind_a_batch(monkeypatch):
+    monkeypatch.setattr(network_utils, "get_redis", lambda: None)
+    monkeypatch.setattr(network_utils, "get_redis_bytes", lambda: None)
+    monkeypatch.setattr(gatherer, "SOURCE_CACHE", TieredCache(LocalTTLCache()))
+    monkeypatch.setattr(gatherer, "HISTORY_ENABLED", False)
+    monkeypatch.setattr(gatherer, "SCHEDULER", FairScheduler(lambda name: 2))
+
+    async def collect(target):
+        await asyncio.sleep(0.02)
+        return [SocialMediaHits(platform="GitHub", status="FOUND")]
+
+    monkeypatch.setattr(gatherer, "SOURCE_REGISTRY", SourceRegistry.from_callables({'sources.social_media': collect}))
+    bulk_waits = QUEUE_WAIT.count(priority=BULK)
+
+    async def drain():
+        return [e async for e in batch.run_batch([f"bulk{i}" for i in range(40)], concurrency=16)]
+
+    running = asyncio.create_task(drain())
+    await asyncio.sleep(0.05)
+    started = time.monotonic()
+    report = await gatherer.run_osint_analysis("analyst")
+    interactive_seconds = time.monotonic() - started
+    events = await running
+
+    assert report.social_media_hits
+    # Serving the ~14 bulk calls already queued first would take about 0.14s.
+    assert interactive_seconds < 0.08
+    assert events[-1]["completed"] == 40
+    assert QUEUE_WAIT.count(priority=BULK) - bulk_waits == 40
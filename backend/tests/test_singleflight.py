@@ -0,0 +1,40 @@
+import asyncio
+import pytest
+from backend.core.singleflight import SingleFlight
+
+pytestmark = pytest.mark.asyncio
+
+async def test_singleflight_across_workers():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    calls = {"count": 0}
+
+    async def analysis():
+        calls["count"] += 1
+        await asyncio.sleep(0.2)
+        return "report"
+
+    # Two SingleFlight instances with separate clients stand in for two uvicorn workers.
+    workers = []
+    for _ in range(2):
+        client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+        workers.append(SingleFlight(namespace="test", redis_getter=lambda c=client: c))
+
+    results = await asyncio.gather(*(
+        workers[i % 2].do("target", analysis, encode=str, decode=str) for i in range(10)
+    ))
+
+    assert results == ["report"] * 10
+    assert calls["count"] == 1
+
+async def test_singleflight_propagates_errors_and_recovers():
+    flight = SingleFlight(redis_getter=lambda: None)
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    results = await asyncio.gather(*(flight.do("k", boom) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.in_flight() == 0
+    assert await flight.do("k", lambda: asyncio.sleep(0, result="ok")) == "ok"
@@ -0,0 +1,105 @@
+import asyncio
+import time
+import httpx
+import pytest
+from backend.core import network_utils
+from backend.core.http_client import HttpClientRegistry
+from backend.core.permutations import CheckedFilter
+from sources import social_media
+from sources.social_media import PlatformCatalog
+
+pytestmark = pytest.mark.asyncio
+
+CATALOG = PlatformCatalog.from_dict({
+    "rate_classes": {"strict": 1},
+    "platforms": [
+        {"name": "Head", "url": "https://head.test/{username}", "check": {"type": "status"}},
+        {"name": "Gone", "url": "https://gone.test/{username}", "check": {"type": "status"}},
+        {"name": "Page", "url": "https://page.test/u/{username}", "rate_class": "strict",
+         "check": {"type": "body", "missing_text": ["No such user"], "bytes": 64}},
+        {"name": "Picky", "url": "https://picky.test/{username}", "pattern": "^[a-z]{1,4}$"},
+        {"name": "Slow", "url": "https://slow.test/{username}"},
+    ],
+})
+
+class MockRegistry(HttpClientRegistry):
+    def __init__(self, handler):
+        super().__init__(http2=False)
+        self.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    def client_for(self, url):
+        return self.client
+
+@pytest.fixture(autouse=True)
+def offline_user_agent(monkeypatch):
+    async def ua():
+        return "test-agent"
+    monkeypatch.setattr(social_media, "get_random_user_agent", ua)
+
+async def test_live_probes_use_head_and_ranged_get():
+    seen = []
+
+    async def handler(request):
+        seen.append((request.method, request.url.host, request.headers.get("range")))
+        if request.url.host == "slow.test":
+            await asyncio.sleep(0.01)
+        if request.url.host == "gone.test":
+            return httpx.Response(404)
+        if request.url.host == "page.test":
+            return httpx.Response(206, text="<html>No such user</html>")
+        return httpx.Response(200)
+
+    http = MockRegistry(handler)
+    hits = await social_media.collect_social_data("alice_x", http=http, catalog=CATALOG, live=True)
+    await http.client.aclose()
+
+    assert [(h.platform, h.status) for h in hits] == [
+        ("Head", "FOUND"), ("Gone", "NOT_FOUND_OR_PRIVATE"), ("Page", "NOT_FOUND_OR_PRIVATE"),
+        ("Picky", "NOT_FOUND_OR_PRIVATE"), ("Slow", "FOUND"),
+    ]
+    assert hits[0].url_found == "https://head.test/alice_x"
+    assert ("GET", "page.test", "bytes=0-63") in seen
+    assert ("HEAD", "head.test", None) in seen
+    # The pattern rejects the name, so no request is made.
+    assert not any(host == "picky.test" for _, host, _ in seen)
+
+async def test_probes_past_the_deadline_are_cancelled():
+    async def handler(request):
+        if request.url.host == "slow.test":
+            await asyncio.sleep(5)
+        return httpx.Response(200)
+
+    http = MockRegistry(handler)
+    started = time.monotonic()
+    hits = await social_media.collect_social_data("bob", http=http, catalog=CATALOG, live=True,
+                                                  deadline=started + social_media.SOCIAL_DEADLINE_MARGIN + 0.2)
+    await http.client.aclose()
+
+    assert time.monotonic() - started < 1
+    statuses = {h.platform: h.status for h in hits}
+    assert statuses["Slow"] == "TIMEOUT"
+    assert statuses["Head"] == "FOUND"
+
+async def test_variants_are_probed_once_across_scans(monkeypatch):
+    monkeypatch.setattr(social_media, "CHECKED", CheckedFilter(namespace="test:social", capacity=1000))
+    monkeypatch.setattr(network_utils, "get_redis", lambda: None)
+    requested = []
+
+    async def handler(request):
+        requested.append(str(request.url))
+        return httpx.Response(200 if request.url.path == "/carol_dev" else 404)
+
+    http = MockRegistry(handler)
+    catalog = PlatformCatalog.from_dict({"platforms": [{"name": "Head", "url": "https://head.test/{username}"}]})
+    first = await social_media.collect_social_data("carol", http=http, catalog=catalog, live=True, variants=20)
+    probes = len(requested)
+    second = await social_media.collect_social_data("carol", http=http, catalog=catalog, live=True, variants=20)
+    await http.client.aclose()
+
+    assert ("Head", "https://head.test/carol_dev", "FOUND (VARIANT)") in [(h.platform, h.url_found, h.status) for h in first]
+    assert probes == 21
+    # Only the target itself is probed again.
+    assert len(requested) - probes == 1
+    # The variant profile found in the first scan is still reported.
+    assert [(h.url_found, h.status) for h in second] == [(None, "NOT_FOUND_OR_PRIVATE"),
+                                                         ("https://head.test/carol_dev", "FOUND (VARIANT)")]
@@ -0,0 +1,19 @@
+import pytest
+from backend.core.targets import classify_target
+
+@pytest.mark.parametrize("raw, kind, value", [
+    ("  Example.COM. ", "domain", "example.com"),
+    ("Bücher.de", "domain", "xn--bcher-kva.de"),
+    ("10.0.0.1", "ip", "10.0.0.1"),
+    ("[2001:DB8::1]", "ip", "2001:db8::1"),
+    ("John.Doe@Example.com", "email", "john.doe@example.com"),
+    ("@JohnDoe", "username", "johndoe"),
+    ("john_doe", "username", "john_doe"),
+    ("HTTPS://Example.com:8443/Path?q=1#frag", "url", "https://example.com:8443/Path?q=1"),
+    ("http://münchen.de", "url", "http://xn--mnchen-3ya.de/"),
+    ("not a domain.", "username", "not a domain."),
+])
+def test_classify_target(raw, kind, value):
+    target = classify_target(raw)
+    assert (target.kind, target.value) == (kind, value)
+    assert target.raw == raw
@@ -0,0 +1,68 @@
+"""
+Job worker pool: consumes analysis jobs queued through /analyze?enqueue=true or POST /jobs.
+Starts one process per core (or --processes) and each process runs up to --concurrency
+jobs at once. Every process joins the same Redis consumer group, so more workers (on
+this node or any other node sharing REDIS_URL) simply add capacity.
+
+Usage:
+    python -m backend.worker --processes 4 --concurrency 16
+"""
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+from backend.core.gatherer import REFRESHER, SOURCE_REGISTRY
+from backend.core.history import HISTORY
+from backend.core.http_client import close_http_clients
+from backend.core.jobs import JOB_WORKER_CONCURRENCY, JOBS
+from backend.core.network_utils import close_redis
+
+logger = logging.getLogger(__name__)
+
+
+async def serve(consumer: str, concurrency: int):
+    SOURCE_REGISTRY.load_eager()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+    logger.info("Worker %s consuming jobs (concurrency %d).", consumer, concurrency)
+    try:
+        await JOBS.work(consumer, concurrency, stop)
+    finally:
+        await REFRESHER.aclose()
+        await HISTORY.aclose()
+        await close_http_clients()
+        await close_redis()
+
+
+def _run_process(concurrency: int):
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    asyncio.run(serve(consumer, concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY, help="Jobs each process runs at once.")
+    args = parser.parse_args()
+
+    if args.processes <= 1:
+        _run_process(args.concurrency)
+        return
+    # Children handle SIGINT/SIGTERM themselves and finish their running jobs.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_run_process, args=(args.concurrency,)) for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    signal.signal(signal.SIGTERM, lambda *_: [p.terminate() for p in processes if p.is_alive()])
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: cache payload encode/decode cost and size per cached source result.
+
+Compares the previous format (model_dump_json text, rebuilt with a full
+model_validate_json pass on every hit) with backend.core.codec over each
+available serializer, with and without zstd. Also shows the two ways of
+skipping revalidation: a deep model_construct rebuild in Python, and a hit in
+the in-process tier, which keeps decoded models. With `--redis-url`, every
+payload is also written to Redis and its footprint read back with MEMORY USAGE.
+
+Usage (from the project root):
+    PYTHONPATH=. python benchmarks/bench_cache_codec.py --hits 200
+    PYTHONPATH=. python benchmarks/bench_cache_codec.py --redis-url redis://localhost:6379/0
+"""
+import argparse
+import json
+import time
+from typing import Callable, Optional
+
+from backend.core.cache import LocalTTLCache
+from backend.core.codec import SERIALIZERS, CacheCodec, zstandard
+from backend.core.models import DomainInfo, SocialMediaHits, SourceResult, VulnerabilityHit, WebSearchHit
+
+
+def sample_result(hits: int) -> SourceResult:
+    return SourceResult(
+        domain_results=DomainInfo(is_registered=True, owner_simulated="Simulated Entity for example.com", expiration_date="2027-01-01"),
+        social_media_hits=[SocialMediaHits(platform=f"Platform{i}", url_found=f"https://platform{i}.example/user", status="FOUND") for i in range(hits)],
+        vulnerability_hits=[VulnerabilityHit(source="NVD/CVE", cve_id=f"CVE-2024-{i:04d}", severity="HIGH", description="Known weakness in a dependency.") for i in range(hits // 4)],
+        web_search_data=[WebSearchHit(source="Bing Web Search", result_type="WebPage", data={"name": f"Result {i}", "url": f"https://example.com/{i}", "snippet": "Lorem ipsum dolor sit amet " * 4}) for i in range(hits)],
+    )
+
+
+def construct_result(data: dict) -> SourceResult:
+    """Rebuilds the nested models from trusted data without validating it."""
+    return SourceResult.model_construct(
+        domain_results=DomainInfo.model_construct(**data["domain_results"]),
+        social_media_hits=[SocialMediaHits.model_construct(**h) for h in data["social_media_hits"]],
+        vulnerability_hits=[VulnerabilityHit.model_construct(**h) for h in data["vulnerability_hits"]],
+        web_search_data=[WebSearchHit.model_construct(**h) for h in data["web_search_data"]],
+    )
+
+
+def best_us(fn: Callable[[], object], repeat: int, number: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - started) / number)
+    return round(best * 1e6, 1)
+
+
+def redis_memory(url: Optional[str], key: str, payload: bytes) -> Optional[int]:
+    if not url:
+        return None
+    import redis
+    client = redis.Redis.from_url(url)
+    client.set(key, payload, ex=60)
+    usage = client.memory_usage(key)
+    client.delete(key)
+    return usage
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hits", type=int, default=200, help="Social and web hits per cached result.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--redis-url", default=None)
+    args = parser.parse_args()
+
+    result = sample_result(args.hits)
+    rows = []
+
+    legacy = result.model_dump_json().encode("utf-8")
+    rows.append({
+        "format": "model_dump_json (previous)",
+        "bytes": len(legacy),
+        "encode_us": best_us(result.model_dump_json, args.repeat, args.number),
+        "decode_us": best_us(lambda: SourceResult.model_validate_json(legacy), args.repeat, args.number),
+        "redis_bytes": redis_memory(args.redis_url, "bench:codec:legacy", legacy),
+    })
+
+    thresholds = [None] + ([1024] if zstandard is not None else [])
+    for name in sorted(SERIALIZERS):
+        for threshold in thresholds:
+            codec = CacheCodec(serializer=name, compress_min_bytes=threshold)
+            payload = codec.encode(result)
+            label = f"{name}{'+zstd' if threshold is not None else ''}"
+            rows.append({
+                "format": label,
+                "bytes": len(payload),
+                "encode_us": best_us(lambda: codec.encode(result), args.repeat, args.number),
+                "decode_us": best_us(lambda: codec.decode(payload, SourceResult), args.repeat, args.number),
+                "redis_bytes": redis_memory(args.redis_url, f"bench:codec:{label}", payload),
+            })
+
+    data = result.model_dump(mode="json")
+    rows.append({
+        "format": "model_construct, no validation",
+        "decode_us": best_us(lambda: construct_result(data), args.repeat, args.number),
+    })
+    local = LocalTTLCache()
+    local.set("k", result, ttl_seconds=60)
+    rows.append({"format": "local tier hit (decoded model)", "decode_us": best_us(lambda: local.get("k"), args.repeat, args.number)})
+
+    print(json.dumps({"hits": args.hits, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
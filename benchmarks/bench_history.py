@@ -0,0 +1,117 @@
+"""
+Benchmark: scan history write throughput and query latency at scale.
+
+Fills a fresh SQLite history database (backend.core.history) with `--hits` hits
+spread over scans of `--targets` targets, written in the same batched
+transactions the background writer uses. It then reports p50/p95 latency for
+each query the /history endpoints serve: a target's scan list, a diff of its two
+latest scans, and hit lookups by platform, CVE id and URL.
+
+Usage (from the project root):
+    PYTHONPATH=. python benchmarks/bench_history.py --hits 1000000
+    PYTHONPATH=. python benchmarks/bench_history.py --hits 100000 --db /tmp/history.sqlite3
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from backend.core.history import HistoryStore, queued_scan
+from backend.core.models import DigitalFootprintReport, SocialMediaHits, SourceResult, VulnerabilityHit, WebSearchHit
+
+HITS_PER_SCAN = 50
+PLATFORMS = [f"Platform{i}" for i in range(300)]
+
+
+def scan_parts(target: str, rng: random.Random) -> dict:
+    social = [SocialMediaHits(platform=p, url_found=f"https://{p.lower()}.example/{target}", status="FOUND")
+              for p in rng.sample(PLATFORMS, 30)]
+    vulns = [VulnerabilityHit(source="NVD", cve_id=f"CVE-2024-{rng.randrange(20000):05d}", severity="HIGH", description="Known weakness.")
+             for _ in range(5)]
+    web = [WebSearchHit(source="Bing Web Search", result_type="WebPage", data={"name": f"Result {i}", "url": f"https://{target}/{rng.randrange(50)}"})
+           for i in range(HITS_PER_SCAN - len(social) - len(vulns))]
+    return {
+        "sources.social_media": SourceResult(social_media_hits=social),
+        "sources.vulnerability_db": SourceResult(vulnerability_hits=vulns),
+        "sources.search_engine": SourceResult(web_search_data=web),
+    }
+
+
+def fill(store: HistoryStore, hits: int, targets: int, batch_size: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    scans = max(1, hits // HITS_PER_SCAN)
+    names = [f"target{i}.example" for i in range(targets)]
+    started = time.perf_counter()
+    batch = []
+    for i in range(scans):
+        target = names[i % targets]
+        report = DigitalFootprintReport(target=target, target_type="domain", timestamp="2026-01-01T00:00:00", summary="bench")
+        batch.append(queued_scan(time.time(), report, scan_parts(target, rng)))
+        if len(batch) >= batch_size:
+            store.write_batch(batch)
+            batch = []
+    if batch:
+        store.write_batch(batch)
+    elapsed = time.perf_counter() - started
+    return {"scans": scans, "hits": scans * HITS_PER_SCAN, "seconds": round(elapsed, 1),
+            "hits_per_second": round(scans * HITS_PER_SCAN / elapsed)}
+
+
+async def latency(fn, samples: int) -> dict:
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        await fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {"p50_ms": round(statistics.median(timings), 2), "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 2)}
+
+
+async def measure(store: HistoryStore, targets: int, samples: int, seed: int) -> dict:
+    rng = random.Random(seed + 1)
+
+    def target():
+        return f"target{rng.randrange(targets)}.example"
+
+    return {
+        "scans(target)": await latency(lambda: store.scans(target()), samples),
+        "diff(target)": await latency(lambda: store.diff(target()), samples),
+        "hits(platform)": await latency(lambda: store.hits(platform=rng.choice(PLATFORMS)), samples),
+        "hits(cve_id)": await latency(lambda: store.hits(cve_id=f"CVE-2024-{rng.randrange(20000):05d}"), samples),
+        "hits(url)": await latency(lambda: store.hits(url=f"https://{target()}/{rng.randrange(50)}"), samples),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hits", type=int, default=1_000_000, help="Total hits to store.")
+    parser.add_argument("--targets", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=200, help="Scans per write transaction.")
+    parser.add_argument("--samples", type=int, default=200, help="Queries timed per query type.")
+    parser.add_argument("--db", default=None, help="Database path; a temporary file is used (and removed) by default.")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    tmpdir = None
+    path = args.db
+    if path is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        path = os.path.join(tmpdir.name, "history.sqlite3")
+    store = HistoryStore(path=path)
+    try:
+        written = fill(store, args.hits, args.targets, args.batch_size, args.seed)
+        queries = asyncio.run(measure(store, args.targets, args.samples, args.seed))
+        size_mb = round(os.path.getsize(path) / 1e6, 1)
+    finally:
+        asyncio.run(store.aclose())
+        if tmpdir is not None:
+            tmpdir.cleanup()
+    print(json.dumps({"write": written, "db_mb": size_mb, "queries": queries}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark: a large backlog of scans waiting in the history writer's queue.
+Covers queueing and row serialization only; compact hits are not used for dedup.
+
+Builds `--hits` hits as the sources return them: pydantic models validated from JSON,
+so every string is a fresh object. They are grouped into scans of 50 hits and queued
+in two forms:
+- pydantic: (scanned_at, report, parts), the form the queue held before.
+- compact: backend.core.history.queued_scan, which holds backend.core.hits objects.
+The benchmark reports the memory the queued backlog holds (tracemalloc, measured in
+a separate pass), the time to compact the scans, and the writer thread's time to turn
+the queue into hits-table rows (fingerprint and JSON payload included).
+
+Usage (from the project root):
+    PYTHONPATH=. python benchmarks/bench_history_queue.py --hits 1000000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from typing import Any, Dict, Iterator, List, Tuple
+
+from backend.core.history import _fingerprint, queued_scan
+from backend.core.models import DigitalFootprintReport, SocialMediaHits, SourceResult, VulnerabilityHit, WebSearchHit
+
+PLATFORMS = ["GitHub", "GitLab", "Reddit", "Twitter", "Instagram", "Keybase", "Medium", "Mastodon"]
+SEVERITIES = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+HITS_PER_SCAN = 50
+
+
+def _hit(i: int) -> Dict[str, Any]:
+    kind = i % 3
+    if kind == 0:
+        platform = PLATFORMS[i % len(PLATFORMS)]
+        return {"platform": platform, "url_found": f"https://{platform.lower()}.example/user{i}", "status": "FOUND"}
+    if kind == 1:
+        return {"source": "NVD", "cve_id": f"CVE-2024-{i:07d}", "severity": SEVERITIES[i % len(SEVERITIES)],
+                "description": f"Issue {i} in example component"}
+    return {"source": "GitHub Code", "result_type": "code",
+            "data": {"name": f"file{i}.py", "path": f"src/file{i}.py", "repository": "example/repo",
+                     "html_url": f"https://github.com/example/repo/blob/main/src/file{i}.py"}}
+
+
+def scans(hits: int) -> Iterator[Tuple[float, DigitalFootprintReport, Dict[str, SourceResult]]]:
+    """Scans as the gatherer hands them to the history: report plus per-source results."""
+    for start in range(0, hits, HITS_PER_SCAN):
+        items = json.loads(json.dumps([_hit(i) for i in range(start, min(hits, start + HITS_PER_SCAN))]))
+        social = [SocialMediaHits.model_validate(d) for d in items if "platform" in d]
+        vulns = [VulnerabilityHit.model_validate(d) for d in items if "severity" in d]
+        web = [WebSearchHit.model_validate(d) for d in items if "result_type" in d]
+        report = DigitalFootprintReport(target=f"target{start}.example", target_type="domain",
+                                        timestamp="2026-01-01T00:00:00", summary="bench", social_media_hits=social,
+                                        vulnerability_hits=vulns, web_search_data=web)
+        yield time.time(), report, {
+            "sources.social_media": SourceResult(social_media_hits=social),
+            "sources.vulnerability_db": SourceResult(vulnerability_hits=vulns),
+            "sources.deep_search": SourceResult(web_search_data=web),
+        }
+
+
+def pydantic_queue(hits: int) -> List:
+    return list(scans(hits))
+
+
+def compact_queue(hits: int) -> List:
+    return [queued_scan(*scan) for scan in scans(hits)]
+
+
+def pydantic_rows(queue) -> int:
+    """The writer's row building before the queue held compact hits."""
+    count = 0
+    for _, _, parts in queue:
+        for part in parts.values():
+            for kind, section in (("social", part.social_media_hits), ("vulnerability", part.vulnerability_hits),
+                                  ("web", part.web_search_data)):
+                for hit in section:
+                    data = hit.model_dump(mode="json")
+                    _fingerprint(kind, data), json.dumps(data, default=str)
+                    count += 1
+    return count
+
+
+def compact_rows(queue) -> int:
+    count = 0
+    for *_, hits in queue:
+        for module_hits in hits.values():
+            for kind, _, _, _, _, data in (hit.row() for hit in module_hits):
+                _fingerprint(kind, data), json.dumps(data, default=str)
+                count += 1
+    return count
+
+
+def retained_mb(build, hits: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    queue = build(hits)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del queue
+    return round(current / 2**20, 1)
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    value = fn(*args)
+    return value, round(time.perf_counter() - started, 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hits", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    # Both queue timings include building the scans; this is that share.
+    _, build_s = timed(lambda: sum(1 for _ in scans(args.hits)))
+    results = {"hits": args.hits, "scan_build_seconds": build_s}
+    for name, build, rows in (("pydantic", pydantic_queue, pydantic_rows), ("compact", compact_queue, compact_rows)):
+        queue, queue_s = timed(build, args.hits)
+        written, rows_s = timed(rows, queue)
+        results[name] = {"rows": written, "queue_seconds": queue_s, "row_build_seconds": rows_s}
+        del queue
+        results[name]["retained_mb"] = retained_mb(build, args.hits)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
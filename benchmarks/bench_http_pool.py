@@ -0,0 +1,128 @@
+"""
+Benchmark: repeated /analyze calls with a fresh httpx client per upstream call
+versus the shared, pooled client registry.
+
+A local stub HTTP server stands in for the Bing endpoint. Every new TCP connection
+pays an artificial `--handshake-ms` delay to model the TCP+TLS setup cost of a real
+provider, so the difference between the two modes is the handshake cost that
+connection reuse removes.
+
+Usage (from the project root):
+    PYTHONPATH=. python benchmarks/bench_http_pool.py --requests 200 --handshake-ms 40
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BING_PAYLOAD = json.dumps({
+    "webPages": {"value": [
+        {"name": f"Result {i}", "url": f"https://example.org/{i}", "snippet": "stub"} for i in range(6)
+    ]}
+}).encode()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    handshake_seconds = 0.0
+
+    def setup(self):
+        super().setup()
+        time.sleep(self.handshake_seconds)
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BING_PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(BING_PAYLOAD)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(handshake_ms: float):
+    StubHandler.handshake_seconds = handshake_ms / 1000.0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_mode(mode: str, requests: int):
+    import httpx
+    from backend import api
+    from backend.core import gatherer
+    from backend.core.http_client import HttpClientRegistry
+    from backend.core.registry import SourceRegistry
+
+    class FreshClientRegistry(HttpClientRegistry):
+        """Reproduces the old behaviour: a new client (and connection) per upstream call."""
+
+        def __init__(self):
+            super().__init__()
+            self.opened = []
+
+        def client_for(self, url):
+            client = self._new_client()
+            self.opened.append(client)
+            return client
+
+    registry = FreshClientRegistry() if mode == "fresh" else HttpClientRegistry()
+    gatherer.HTTP_CLIENTS = registry
+    deep_search = gatherer.SOURCE_REGISTRY.get("sources.deep_search")
+    gatherer.SOURCE_REGISTRY = SourceRegistry([deep_search])
+
+    latencies = []
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://engine") as client:
+        for i in range(requests):
+            started = time.perf_counter()
+            resp = await client.get("/analyze", params={"target": f"bench-{mode}-{i}"})
+            resp.raise_for_status()
+            latencies.append((time.perf_counter() - started) * 1000.0)
+
+    if isinstance(registry, FreshClientRegistry):
+        for c in registry.opened:
+            await c.aclose()
+    await registry.aclose()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--handshake-ms", type=float, default=40.0)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    server = start_stub_server(args.handshake_ms)
+    os.environ["BING_API_KEY"] = "benchmark"
+    os.environ["BING_ENDPOINT"] = f"http://127.0.0.1:{server.server_address[1]}/v7.0/search"
+    os.environ.pop("GITHUB_TOKEN", None)
+
+    results = {}
+    for mode in ("fresh", "pooled"):
+        latencies = asyncio.run(run_mode(mode, args.requests))
+        results[mode] = {
+            "p50_ms": round(statistics.median(latencies), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "mean_ms": round(statistics.mean(latencies), 2),
+        }
+    server.shutdown()
+    print(json.dumps({"requests": args.requests, "handshake_ms": args.handshake_ms, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: normalizing large source results.
+
+Compares the previous normalizer, which picked one section for a whole list
+from its first element and validated dicts one model_validate call at a time,
+with backend.core.normalize, which routes each item through a dispatch table
+and validates dicts per section with a single TypeAdapter call.
+
+Usage (from the project root):
+    PYTHONPATH=. python benchmarks/bench_normalize.py --hits 10000
+"""
+import argparse
+import json
+import logging
+import time
+from typing import Any
+
+from backend.core.models import DomainInfo, SocialMediaHits, SourceResult, VulnerabilityHit, WebSearchHit
+from backend.core.normalize import normalize_result
+
+logger = logging.getLogger(__name__)
+
+
+def legacy_normalize(result: Any) -> SourceResult:
+    """The normalizer this benchmark replaces, kept verbatim for comparison."""
+    normalized = SourceResult()
+
+    if isinstance(result, DomainInfo):
+        normalized.domain_results = result
+        return normalized
+
+    if isinstance(result, list):
+        if len(result) > 0 and (isinstance(result[0], SocialMediaHits) or (isinstance(result[0], dict) and 'platform' in result[0])):
+            for item in result:
+                if isinstance(item, SocialMediaHits):
+                    normalized.social_media_hits.append(item)
+                else:
+                    try:
+                        normalized.social_media_hits.append(SocialMediaHits.model_validate(item))
+                    except Exception:
+                        logger.debug("Skipping invalid social media item: %s", item)
+            return normalized
+
+        if len(result) > 0 and (isinstance(result[0], VulnerabilityHit) or (isinstance(result[0], dict) and 'source' in result[0] and 'severity' in result[0])):
+            for item in result:
+                if isinstance(item, VulnerabilityHit):
+                    normalized.vulnerability_hits.append(item)
+                else:
+                    try:
+                        normalized.vulnerability_hits.append(VulnerabilityHit.model_validate(item))
+                    except Exception:
+                        logger.debug("Skipping invalid vulnerability item: %s", item)
+            return normalized
+
+        if len(result) > 0 and (isinstance(result[0], WebSearchHit) or (isinstance(result[0], dict) and 'source' in result[0] and 'result_type' in result[0])):
+            for item in result:
+                if isinstance(item, WebSearchHit):
+                    normalized.web_search_data.append(item)
+                else:
+                    try:
+                        normalized.web_search_data.append(WebSearchHit.model_validate(item))
+                    except Exception:
+                        logger.debug("Skipping invalid web search item: %s", item)
+            return normalized
+
+    return normalized
+
+
+def make_payloads(hits: int):
+    social = [{"platform": f"Site{i}", "url_found": f"https://site{i}.example/u", "status": "FOUND"} for i in range(hits)]
+    web = [{"source": "Bing", "result_type": "WebPage", "data": {"url": f"https://x/{i}", "name": str(i)}} for i in range(hits)]
+    models = [SocialMediaHits(platform=f"Site{i}", status="FOUND") for i in range(hits)]
+    return {"social_dicts": social, "web_dicts": web, "social_models": models}
+
+
+def per_item_us(fn, payload, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(payload)
+        best = min(best, time.perf_counter() - started)
+    return round(best / len(payload) * 1e6, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hits", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = {"hits": args.hits, "per_item_us": {}}
+    for name, payload in make_payloads(args.hits).items():
+        results["per_item_us"][name] = {
+            "legacy": per_item_us(legacy_normalize, payload, args.repeat),
+            "dispatch_table": per_item_us(normalize_result, payload, args.repeat),
+        }
+
+    mixed = [WebSearchHit(source="Bing", result_type="WebPage", data={}), SocialMediaHits(platform="GitHub", status="FOUND")]
+    legacy, current = legacy_normalize(mixed), normalize_result(mixed)
+    results["mixed_list_hits_kept"] = {
+        "legacy": len(legacy.web_search_data) + len(legacy.social_media_hits),
+        "dispatch_table": len(current.web_search_data) + len(current.social_media_hits),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark: offline NVD store import throughput and lookup latency.
+
+Imports a full set of NVD JSON 2.0 feeds into a fresh store (backend.core.nvd).
+Pass real feed files with --feeds. Otherwise one file per year is generated with
+`--cves` CVEs in total, about the size of the full NVD. Vendors are Zipf-distributed,
+so a few have thousands of CVEs, as in the real data. The benchmark then:
+    - applies a `modified` feed rewriting --modified-share of the CVEs (incremental update)
+    - re-imports an unchanged feed (skipped by hash)
+    - measures p50/p95 lookup latency by vendor/product key, for a hot vendor,
+      through the source's nvd_hits(), and for full-text search by phrase and by one word
+Latencies are in microseconds.
+
+Usage (from the project root):
+    PYTHONPATH=. python benchmarks/bench_nvd.py --cves 250000
+    PYTHONPATH=. python benchmarks/bench_nvd.py --feeds data/nvd-feeds/nvdcve-2.0-*.json.gz
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from backend.core.nvd import NvdStore
+
+WORDS = ("remote attacker buffer overflow crafted request allows execute arbitrary code via the component improper "
+         "validation input authentication bypass denial service memory corruption cross site scripting sql injection "
+         "privilege escalation path traversal deserialization untrusted data null pointer dereference").split()
+SEVERITIES = ((9.0, "CRITICAL"), (7.0, "HIGH"), (4.0, "MEDIUM"), (0.1, "LOW"))
+
+
+def synthetic_item(cve_id: str, modified: str, vendors: list, weights: list, rng: random.Random) -> dict:
+    score = round(rng.uniform(2.0, 10.0), 1)
+    severity = next(name for floor, name in SEVERITIES if score >= floor)
+    cpes = []
+    for vendor in rng.choices(vendors, weights, k=rng.randint(1, 4)):
+        cpes.append({"vulnerable": True, "criteria": f"cpe:2.3:a:{vendor}:{vendor}_product{rng.randrange(20)}:{rng.randrange(10)}.{rng.randrange(10)}:*:*:*:*:*:*:*"})
+    return {"cve": {
+        "id": cve_id, "published": "2020-01-01T00:00:00.000", "lastModified": modified, "vulnStatus": "Analyzed",
+        "descriptions": [{"lang": "en", "value": " ".join(rng.choices(WORDS, k=40))}],
+        "metrics": {"cvssMetricV31": [{"cvssData": {"baseScore": score, "baseSeverity": severity}}]},
+        "configurations": [{"nodes": [{"operator": "OR", "cpeMatch": cpes}]}],
+    }}
+
+
+def write_feed(path: str, items: list):
+    with open(path, "wb") as f:
+        f.write(gzip.compress(json.dumps({"format": "NVD_CVE", "version": "2.0", "vulnerabilities": items}).encode(), 6))
+
+
+def generate(directory: str, cves: int, vendor_count: int, seed: int) -> tuple:
+    rng = random.Random(seed)
+    vendors = [f"vendor{i}" for i in range(vendor_count)]
+    weights = [1.0 / (i + 1) for i in range(vendor_count)]
+    years = list(range(2002, 2026))
+    paths, ids = [], []
+    per_year = cves // len(years)
+    for year in years:
+        items = []
+        for n in range(per_year):
+            cve_id = f"CVE-{year}-{n:05d}"
+            ids.append(cve_id)
+            items.append(synthetic_item(cve_id, f"{year}-06-01T00:00:00.000", vendors, weights, rng))
+        path = os.path.join(directory, f"nvdcve-2.0-{year}.json.gz")
+        write_feed(path, items)
+        paths.append(path)
+    return paths, ids, vendors, weights
+
+
+def pct(samples, p):
+    ordered = sorted(samples)
+    return round(ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))], 1)
+
+
+def timed_us(fn, args_list):
+    samples = []
+    for args in args_list:
+        started = time.perf_counter()
+        fn(*args)
+        samples.append((time.perf_counter() - started) * 1e6)
+    return {"p50_us": pct(samples, 50), "p95_us": pct(samples, 95), "mean_us": round(statistics.mean(samples), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--feeds", nargs="*", default=None, help="Real NVD feed files to import instead of generated ones.")
+    parser.add_argument("--cves", type=int, default=250000)
+    parser.add_argument("--vendors", type=int, default=20000)
+    parser.add_argument("--modified-share", type=float, default=0.02)
+    parser.add_argument("--lookups", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--db", default=None, help="Database path (default: a temporary file).")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-nvd-")
+    db = args.db or os.path.join(workdir, "nvd.sqlite3")
+    store = NvdStore(db)
+    rng = random.Random(args.seed)
+    result = {}
+
+    if args.feeds:
+        paths, ids, keys = args.feeds, [], []
+    else:
+        started = time.perf_counter()
+        paths, ids, vendors, weights = generate(workdir, args.cves, args.vendors, args.seed)
+        result["generate_seconds"] = round(time.perf_counter() - started, 1)
+
+    started = time.perf_counter()
+    imported = [store.import_feed(path) for path in paths]
+    elapsed = time.perf_counter() - started
+    total = sum(r.get("inserted", 0) + r.get("updated", 0) for r in imported)
+    result["full_import"] = {"feeds": len(paths), "cves": total, "seconds": round(elapsed, 1), "cves_per_second": round(total / elapsed)}
+
+    if not args.feeds:
+        changed = rng.sample(ids, int(len(ids) * args.modified_share))
+        items = [synthetic_item(cve_id, "2026-01-01T00:00:00.000", vendors, weights, rng) for cve_id in changed]
+        modified = os.path.join(workdir, "nvdcve-2.0-modified.json.gz")
+        write_feed(modified, items)
+        stats = store.import_feed(modified)
+        result["incremental_update"] = {"cves": len(items), "seconds": stats["seconds"], "updated": stats["updated"]}
+        started = time.perf_counter()
+        store.import_feed(paths[0])
+        result["unchanged_feed_seconds"] = round(time.perf_counter() - started, 3)
+        keys = [f"vendor{min(int(rng.paretovariate(1.0)) - 1, args.vendors - 1)}" for _ in range(args.lookups)]
+        hot = "vendor0"
+    conn = store._read()
+    if args.feeds:
+        keys = [row[0] for row in conn.execute("SELECT key FROM cve_keys ORDER BY random() LIMIT ?", (args.lookups,))]
+        hot = conn.execute("SELECT key FROM cve_keys GROUP BY key ORDER BY count(*) DESC LIMIT 1").fetchone()[0]
+    result["cves_in_store"] = conn.execute("SELECT count(*) FROM cves").fetchone()[0]
+    result["db_megabytes"] = round(os.path.getsize(db) / 1e6, 1)
+
+    # Imported here so the source's module-level store is not opened on the default path.
+    from sources import vulnerability_db
+    vulnerability_db.NVD = store
+    store.for_keys([hot])
+    result["lookup"] = {
+        "by_key": timed_us(store.for_keys, [([k],) for k in keys]),
+        "hot_vendor": {"key": hot, **timed_us(store.for_keys, [([hot],)] * args.lookups)},
+        "source_nvd_hits": timed_us(vulnerability_db.nvd_hits, [(f"{k}.com",) for k in keys]),
+        "full_text": timed_us(store.search, [(rng.choice(WORDS) + " " + rng.choice(WORDS),) for _ in range(min(args.lookups, 500))]),
+        # The source's fallback searches one bare name, which can match a large share of descriptions.
+        "full_text_one_word": timed_us(store.search, [(rng.choice(WORDS),) for _ in range(min(args.lookups, 500))]),
+    }
+    store.close()
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Load test: event-loop stall caused by cache calls on the analysis path.
+
+Compares the old blocking redis-py client (called directly from coroutines) with the
+pooled asyncio client in backend.core.network_utils. While `--concurrency` workers
+hammer the cache with the same get / set / user-agent calls an analysis makes, a
+monitor coroutine wakes every millisecond and records how late it was scheduled.
+Blocking calls show up as large loop lag; non-blocking calls keep it near zero.
+
+An optional TCP proxy adds `--latency-ms` of round-trip delay in front of Redis to
+model a Redis that lives in another container or host.
+
+Usage (from the project root):
+    PYTHONPATH=. python benchmarks/bench_redis_stall.py --redis-url redis://localhost:6379/0
+    PYTHONPATH=. python benchmarks/bench_redis_stall.py --fake   # in-process fakeredis server
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlparse
+
+
+def start_latency_proxy(upstream_host: str, upstream_port: int, latency_ms: float) -> int:
+    """Runs a delaying TCP proxy on its own thread/loop and returns its port."""
+    ready = threading.Event()
+    port_holder = {}
+    delay = latency_ms / 2000.0
+
+    async def pipe(reader, writer):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                await asyncio.sleep(delay)
+                writer.write(data)
+                await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+
+    async def handle(client_reader, client_writer):
+        up_reader, up_writer = await asyncio.open_connection(upstream_host, upstream_port)
+        await asyncio.gather(pipe(client_reader, up_writer), pipe(up_reader, client_writer))
+
+    async def serve():
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port_holder["port"] = server.sockets[0].getsockname()[1]
+        ready.set()
+        async with server:
+            await server.serve_forever()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return port_holder["port"]
+
+
+async def monitor_loop_lag(stop: asyncio.Event, samples: list, interval: float = 0.001):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, (time.perf_counter() - started - interval) * 1000.0))
+
+
+async def run_sync(url: str, concurrency: int, ops: int):
+    import redis
+    client = redis.Redis.from_url(url, decode_responses=True)
+
+    async def worker(n):
+        for i in range(ops):
+            client.srandmember("osint:user_agents")
+            client.get(f"bench:report:{n}:{i}")
+            client.set(f"bench:report:{n}:{i}", "x" * 512, ex=60)
+            await asyncio.sleep(0)
+
+    return await measure(worker, concurrency)
+
+
+async def run_async(url: str, concurrency: int, ops: int):
+    from backend.core import network_utils
+    network_utils.REDIS = network_utils.RedisConnector(url)
+
+    async def worker(n):
+        for i in range(ops):
+            await network_utils.get_random_user_agent()
+            await network_utils.get_from_cache(f"bench:report:{n}:{i}")
+            await network_utils.set_to_cache(f"bench:report:{n}:{i}", "x" * 512, ttl_seconds=60)
+
+    try:
+        return await measure(worker, concurrency)
+    finally:
+        await network_utils.close_redis()
+
+
+async def measure(worker, concurrency: int):
+    stop = asyncio.Event()
+    lag = []
+    monitor = asyncio.create_task(monitor_loop_lag(stop, lag))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await monitor
+    lag.sort()
+    return {
+        "wall_s": round(elapsed, 3),
+        "loop_lag_p50_ms": round(statistics.median(lag), 3) if lag else None,
+        "loop_lag_p99_ms": round(lag[int(0.99 * (len(lag) - 1))], 3) if lag else None,
+        "loop_lag_max_ms": round(lag[-1], 3) if lag else None,
+        "loop_stall_total_ms": round(sum(lag), 1),
+        "loop_ticks": len(lag),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", default="redis://localhost:6379/0")
+    parser.add_argument("--fake", action="store_true", help="Start an in-process fakeredis TCP server.")
+    parser.add_argument("--latency-ms", type=float, default=1.0)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--ops", type=int, default=20)
+    args = parser.parse_args()
+
+    url = args.redis_url
+    if args.fake:
+        from fakeredis import TcpFakeServer
+        fake = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+        fake.daemon_threads = True
+        threading.Thread(target=fake.serve_forever, daemon=True).start()
+        url = f"redis://127.0.0.1:{fake.server_address[1]}/0"
+    if args.latency_ms > 0:
+        parsed = urlparse(url)
+        port = start_latency_proxy(parsed.hostname, parsed.port or 6379, args.latency_ms)
+        url = f"redis://127.0.0.1:{port}{parsed.path or '/0'}"
+
+    results = {
+        "blocking_redis_py": asyncio.run(run_sync(url, args.concurrency, args.ops)),
+        "asyncio_pool": asyncio.run(run_async(url, args.concurrency, args.ops)),
+    }
+    print(json.dumps({"concurrency": args.concurrency, "ops_per_worker": args.ops,
+                      "latency_ms": args.latency_ms, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
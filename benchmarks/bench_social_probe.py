@@ -0,0 +1,151 @@
+"""
+Benchmark: live social-media probing of a large platform catalog, one platform at a
+time (the old loop) versus the concurrent, catalog-driven prober.
+
+A generated catalog of `--platforms` entries points at a local stub server. Every
+platform gets its own loopback address (127.0.x.y), so, as with real sites, each
+one has its own connection pool. Each platform answers after a fixed delay drawn
+from [--min-ms, --max-ms]. One platform in every --body-every uses a ranged-GET
+body check; the rest use HEAD. The concurrent run should take about as long as the
+slowest single probe.
+
+Usage (from the project root):
+    PYTHONPATH=. python benchmarks/bench_social_probe.py --platforms 320 --max-ms 400
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+PAGE = b"<html><head><title>profile</title></head><body>" + b"x" * 200_000 + b"</body></html>"
+
+
+class ProbeStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    delays = {}
+
+    def _answer(self, with_body: bool):
+        name = urlparse(self.path).path.strip("/").split("/")[0]
+        time.sleep(self.delays.get(name, 0.0))
+        found = not self.path.rstrip("/").endswith("missing")
+        status = 200 if found else 404
+        body = PAGE
+        byte_range = self.headers.get("Range")
+        if found and byte_range:
+            end = int(byte_range.split("-")[1])
+            body, status = PAGE[:end + 1], 206
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if with_body:
+            self.wfile.write(body)
+
+    def do_HEAD(self):
+        self._answer(with_body=False)
+
+    def do_GET(self):
+        self._answer(with_body=True)
+
+    def log_message(self, *args):
+        pass
+
+
+class ProbeStubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Hundreds of probes connect at once; the default backlog of 5 drops SYNs.
+    request_queue_size = 1024
+
+
+def serve(delays: dict, ports):
+    ProbeStubHandler.delays = delays
+    server = ProbeStubServer(("0.0.0.0", 0), ProbeStubHandler)
+    ports.put(server.server_address[1])
+    server.serve_forever()
+
+
+def build_catalog(count: int, port: int, body_every: int) -> dict:
+    platforms = []
+    for i in range(count):
+        host = f"127.0.{i // 250}.{i % 250 + 1}"
+        check = {"type": "body", "missing_text": ["No such user"]} if body_every and i % body_every == 0 else {"type": "status"}
+        platforms.append({"name": f"p{i}", "url": f"http://{host}:{port}/p{i}/{{username}}", "check": check})
+    return {"rate_classes": {"default": 4}, "platforms": platforms}
+
+
+async def sequential(social_media, catalog, http, username: str):
+    """The pre-catalog shape: one platform after another."""
+    return [await social_media._live_probe(platform, username, "bench", http, None) for platform in catalog.platforms]
+
+
+async def timed(coro):
+    started = time.perf_counter()
+    result = await coro
+    return time.perf_counter() - started, result
+
+
+async def run(args, port: int, delays: dict) -> dict:
+    from backend.core import network_utils
+    from backend.core.http_client import HttpClientRegistry
+    from sources import social_media
+
+    network_utils.REDIS_AVAILABLE = False
+
+    catalog = social_media.PlatformCatalog.from_dict(build_catalog(args.platforms, port, args.body_every))
+    http = HttpClientRegistry(http2=False)
+    slowest = max(delays.values())
+    results = {"platforms": args.platforms, "slowest_probe_seconds": round(slowest, 3)}
+
+    for label in ("cold", "warm"):
+        # "cold" includes creating one pooled client and connection per platform host.
+        seconds, hits = await timed(social_media.collect_social_data("someone", http=http, catalog=catalog, live=True))
+        results[f"concurrent_{label}"] = {
+            "seconds": round(seconds, 3),
+            "vs_slowest_probe": round(seconds / slowest, 2),
+            "found": sum(h.status == "FOUND" for h in hits),
+            "unknown": sum(h.status in ("UNKNOWN", "TIMEOUT") for h in hits),
+        }
+    if not args.skip_sequential:
+        seconds, _ = await timed(sequential(social_media, catalog, http, "someone"))
+        results["sequential"] = {"seconds": round(seconds, 3)}
+        results["speedup"] = round(seconds / results["concurrent_warm"]["seconds"], 1)
+    await http.aclose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--platforms", type=int, default=320)
+    parser.add_argument("--min-ms", type=float, default=20.0)
+    parser.add_argument("--max-ms", type=float, default=400.0)
+    parser.add_argument("--body-every", type=int, default=5, help="Every Nth platform uses a ranged-GET body check.")
+    parser.add_argument("--concurrency", type=int, default=512, help="SOCIAL_PROBE_CONCURRENCY for the run.")
+    parser.add_argument("--skip-sequential", action="store_true", help="Skip the slow one-at-a-time baseline.")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # Read by sources.social_media at import time.
+    os.environ["SOCIAL_PROBE_CONCURRENCY"] = str(args.concurrency)
+    rng = random.Random(args.seed)
+    delays = {f"p{i}": rng.uniform(args.min_ms, args.max_ms) / 1000.0 for i in range(args.platforms)}
+    delays[f"p{args.platforms - 1}"] = args.max_ms / 1000.0
+
+    # The stub runs in its own process so its threads do not compete with the prober for the GIL.
+    ports = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(delays, ports), daemon=True)
+    server.start()
+    try:
+        results = asyncio.run(run(args, ports.get(timeout=10), delays))
+    finally:
+        server.terminate()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
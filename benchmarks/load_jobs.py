@@ -0,0 +1,95 @@
+"""
+Load generator: job throughput of the worker pool as worker processes are added.
+
+For each worker count in --workers, starts `python -m backend.worker` with that
+many processes on a fresh job stream, queues --jobs analyses of distinct targets
+(so nothing is served from cache) and waits for all of them to finish. Reports
+jobs per second and queue-to-done latency percentiles for every step. Needs a
+Redis server that the script and the workers share.
+
+Usage (from the project root):
+    PYTHONPATH=. python benchmarks/load_jobs.py --redis-url redis://localhost:6379/0 --workers 1,2,4 --jobs 400
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+
+
+async def bounded(calls, limit: int = 32) -> list:
+    """Runs the coroutines at most `limit` at a time, staying inside the Redis pool."""
+    slots = asyncio.Semaphore(limit)
+
+    async def one(call):
+        async with slots:
+            return await call
+
+    return await asyncio.gather(*(one(call) for call in calls))
+
+
+async def run_step(processes: int, jobs: int, concurrency: int, redis_url: str, timeout: float) -> dict:
+    from backend.core.jobs import JobQueue
+    from backend.core.network_utils import close_redis
+
+    run = uuid.uuid4().hex[:8]
+    stream = f"osint:load:{run}:jobs"
+    env = {**os.environ, "REDIS_URL": redis_url, "JOB_STREAM": stream, "PYTHONPATH": os.getcwd()}
+    workers = subprocess.Popen(
+        [sys.executable, "-m", "backend.worker", "--processes", str(processes), "--concurrency", str(concurrency)],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    queue = JobQueue(stream=stream)
+    try:
+        # Let every process join the consumer group before the clock starts.
+        await asyncio.sleep(2.0 + 0.2 * processes)
+        started = time.perf_counter()
+        submitted = await bounded(queue.submit(f"load{run}user{i}") for i in range(jobs))
+        pending = {job["job_id"] for job in submitted}
+        latencies = []
+        while pending and time.perf_counter() - started < timeout:
+            await asyncio.sleep(0.1)
+            records = await bounded(queue.get(job_id) for job_id in pending)
+            for record in records:
+                if record and record["status"] in ("done", "failed"):
+                    pending.discard(record["job_id"])
+                    latencies.append(record["finished_at"] - record["created_at"])
+        elapsed = time.perf_counter() - started
+    finally:
+        workers.terminate()
+        workers.wait(timeout=30)
+        await close_redis()
+    latencies.sort()
+    return {
+        "processes": processes,
+        "completed": len(latencies),
+        "unfinished": len(pending),
+        "seconds": round(elapsed, 2),
+        "jobs_per_second": round(len(latencies) / elapsed, 1),
+        "p50_s": round(latencies[len(latencies) // 2], 2) if latencies else None,
+        "p95_s": round(latencies[int(len(latencies) * 0.95) - 1], 2) if latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker process counts to measure.")
+    parser.add_argument("--jobs", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16, help="Jobs each worker process runs at once.")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Give up on a step after this many seconds.")
+    args = parser.parse_args()
+
+    # Read by backend.core.network_utils at import time.
+    os.environ["REDIS_URL"] = args.redis_url
+    steps = []
+    for processes in (int(n) for n in args.workers.split(",")):
+        steps.append(asyncio.run(run_step(processes, args.jobs, args.concurrency, args.redis_url, args.timeout)))
+    print(json.dumps({"jobs": args.jobs, "concurrency": args.concurrency, "steps": steps}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Reproducible engine benchmark suite against local stub providers.
+
+Starts benchmarks/stub_providers.py in-process and points BING_ENDPOINT and
+GITHUB_API_URL at it. It then drives the FastAPI app in-process (httpx
+ASGITransport) through four scenarios:
+    single_target     sequential /analyze calls for distinct targets (cold path)
+    batch             one /analyze/batch of distinct targets (throughput)
+    cache_hit         repeated /analyze calls for one warmed target
+    gateway_overhead  the same cached target through the Go gateway and straight to
+                      the engine; needs --gateway-url and --engine-url (running services)
+By default only stub-backed sources run (`--sources deep_search`); the simulated sources
+sleep for random times and would make runs incomparable. Provider token buckets are
+opened wide so the engine is measured, not the quotas; pass `--rate-limits ""` to keep
+the real ones. Results are printed (or written with --out) as JSON. Pass a previous
+run as --baseline to flag regressions beyond --threshold.
+
+Usage (from the project root):
+    PYTHONPATH=. python benchmarks/run_suite.py --out bench.json
+    PYTHONPATH=. python benchmarks/run_suite.py --latency-ms 120 --error-rate 0.05 --rate-limit-every 50
+    PYTHONPATH=. python benchmarks/run_suite.py --baseline bench.json --threshold 0.1
+    PYTHONPATH=. python benchmarks/run_suite.py --gateway-url http://localhost:8080 --engine-url http://localhost:8001
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+from benchmarks.stub_providers import StubConfig, start_stub_server
+
+OPEN_RATE_LIMITS = "bing=10000:10000,github_users=10000:10000,github_code=10000:10000"
+# Metrics where a higher value is better; every other number is a latency.
+THROUGHPUT_KEYS = ("targets_per_second", "requests_per_second")
+
+
+def latency_summary(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+
+    def pct(p):
+        return round(ordered[min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))], 2)
+
+    return {"p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99), "mean_ms": round(statistics.mean(ordered), 2)}
+
+
+async def timed_get(client, path: str, params: dict, headers: Optional[dict] = None) -> float:
+    started = time.perf_counter()
+    resp = await client.get(path, params=params, headers=headers)
+    resp.raise_for_status()
+    return (time.perf_counter() - started) * 1000.0
+
+
+async def single_target(client, requests: int, run: str) -> dict:
+    samples = [await timed_get(client, "/analyze", {"target": f"{run}-single-{i}"}) for i in range(requests)]
+    return {"requests": requests, **latency_summary(samples)}
+
+
+async def batch(client, targets: int, concurrency: int, run: str) -> dict:
+    body = {"targets": [f"{run}-batch-{i}" for i in range(targets)], "concurrency": concurrency}
+    started = time.perf_counter()
+    summary = {}
+    async with client.stream("POST", "/analyze/batch", json=body) as resp:
+        resp.raise_for_status()
+        async for line in resp.aiter_lines():
+            if line:
+                event = json.loads(line)
+                if event["event"] == "summary":
+                    summary = event
+    elapsed = time.perf_counter() - started
+    return {
+        "targets": targets,
+        "concurrency": concurrency,
+        "completed": summary.get("completed"),
+        "failed": summary.get("failed"),
+        "seconds": round(elapsed, 3),
+        "targets_per_second": round(targets / elapsed, 2),
+    }
+
+
+async def cache_hit(client, requests: int, run: str) -> dict:
+    target = f"{run}-cached"
+    await timed_get(client, "/analyze", {"target": target})
+    samples = [await timed_get(client, "/analyze", {"target": target}) for _ in range(requests)]
+    return {"requests": requests, **latency_summary(samples)}
+
+
+async def gateway_overhead(gateway_url: Optional[str], engine_url: Optional[str], requests: int, run: str) -> dict:
+    if not gateway_url or not engine_url:
+        return {"skipped": "pass --gateway-url and --engine-url to measure the gateway"}
+    import httpx
+    target = f"{run}-gateway"
+    async with httpx.AsyncClient(timeout=60) as client:
+        await timed_get(client, f"{engine_url}/analyze", {"target": target})
+        direct = [await timed_get(client, f"{engine_url}/analyze", {"target": target}) for _ in range(requests)]
+        # The gateway rate-limits per X-Forwarded-For address; give every call its own.
+        proxied = [
+            await timed_get(client, f"{gateway_url}/analyze", {"target": target}, {"X-Forwarded-For": f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}"})
+            for i in range(requests)
+        ]
+    direct_summary, proxied_summary = latency_summary(direct), latency_summary(proxied)
+    return {
+        "requests": requests,
+        "direct": direct_summary,
+        "gateway": proxied_summary,
+        "overhead_p50_ms": round(proxied_summary["p50_ms"] - direct_summary["p50_ms"], 2),
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[dict]:
+    """One row per numeric metric present in both runs; flags changes past `threshold`."""
+    rows = []
+
+    def walk(path, now, before):
+        if isinstance(now, dict) and isinstance(before, dict):
+            for key in now:
+                if key in before:
+                    walk(f"{path}.{key}" if path else key, now[key], before[key])
+        elif isinstance(now, (int, float)) and isinstance(before, (int, float)) and not isinstance(now, bool) and before:
+            ratio = now / before
+            higher_is_better = path.rsplit(".", 1)[-1] in THROUGHPUT_KEYS
+            worse = ratio < 1 - threshold if higher_is_better else ratio > 1 + threshold
+            if path.rsplit(".", 1)[-1].endswith("_ms") or higher_is_better:
+                rows.append({"metric": path, "baseline": before, "current": now, "ratio": round(ratio, 3), "regression": worse})
+
+    walk("", current["scenarios"], baseline.get("scenarios", {}))
+    return rows
+
+
+async def run_scenarios(args, run: str) -> dict:
+    import httpx
+    from backend import api
+    from backend.core import gatherer, network_utils
+    from backend.core.registry import SourceRegistry
+
+    if not args.redis_url:
+        # Only the in-process cache tier; keeps runs independent of any Redis state.
+        network_utils.REDIS_AVAILABLE = False
+    if args.sources != "all":
+        wanted = [f"sources.{name.strip()}" for name in args.sources.split(",")]
+        gatherer.SOURCE_REGISTRY = SourceRegistry([gatherer.SOURCE_REGISTRY.get(name) for name in wanted])
+
+    results = {}
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://engine", timeout=120) as client:
+        results["single_target"] = await single_target(client, args.requests, run)
+        results["batch"] = await batch(client, args.batch_targets, args.batch_concurrency, run)
+        results["cache_hit"] = await cache_hit(client, args.requests, run)
+    results["gateway_overhead"] = await gateway_overhead(args.gateway_url, args.engine_url, args.requests, run)
+    await gatherer.HTTP_CLIENTS.aclose()
+    await network_utils.close_redis()
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="Calls per latency scenario.")
+    parser.add_argument("--batch-targets", type=int, default=200)
+    parser.add_argument("--batch-concurrency", type=int, default=16)
+    parser.add_argument("--sources", default="deep_search", help='Comma-separated source modules to run, or "all".')
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Stub provider response time.")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of stub responses that are 500s.")
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every Nth stub request with 429.")
+    parser.add_argument("--rate-limits", default=OPEN_RATE_LIMITS, help="RATE_LIMITS for the engine's provider buckets.")
+    parser.add_argument("--redis-url", default=None, help="Use this Redis; by default the run uses no Redis.")
+    parser.add_argument("--gateway-url", default=None)
+    parser.add_argument("--engine-url", default=None)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", default=None, help="Write the JSON result here as well.")
+    parser.add_argument("--baseline", default=None, help="Earlier result to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative change counted as a regression.")
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit_every, seed=args.seed)
+    stub = start_stub_server(config)
+    # Read by the engine modules at import time, so set before importing them.
+    os.environ.update({
+        "BING_API_KEY": "stub",
+        "GITHUB_TOKEN": "stub",
+        "BING_ENDPOINT": f"{stub.base_url}/v7.0/search",
+        "GITHUB_API_URL": stub.base_url,
+        "RATE_LIMITS": args.rate_limits,
+        "HISTORY_ENABLED": "0",
+    })
+    if args.redis_url:
+        os.environ["REDIS_URL"] = args.redis_url
+    logging.disable(logging.WARNING)
+
+    run = f"r{int(time.time())}"
+    started = time.perf_counter()
+    scenarios = asyncio.run(run_scenarios(args, run))
+    stub.shutdown()
+
+    result = {
+        "meta": {
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "seconds": round(time.perf_counter() - started, 1),
+            "config": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+        },
+        "stub_requests": dict(stub.stats),
+        "scenarios": scenarios,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            rows = compare(result, json.load(f), args.threshold)
+        result["comparison"] = {"threshold": args.threshold, "regressions": sum(r["regression"] for r in rows), "metrics": rows}
+
+    text = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+    if result.get("comparison", {}).get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
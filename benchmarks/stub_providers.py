@@ -0,0 +1,206 @@
+"""
+Local stand-in for the Bing Web Search and GitHub search APIs.
+
+Serves the three endpoints deep_search calls, with the same response shapes:
+    GET /v7.0/search     (Bing; point BING_ENDPOINT here)
+    GET /search/users    (GitHub; point GITHUB_API_URL at the server root)
+    GET /search/code
+Every response waits `latency_ms` (± `jitter_ms`). A share of requests (`tail_rate`)
+waits `tail_ms` instead, and a share (`error_rate`) fails with 500. Every `rate_limit_every`-th request gets a 429 with Retry-After and
+X-RateLimit-* headers, like the real providers send. The GitHub endpoints send an ETag
+and answer a matching If-None-Match with 304, as GitHub does. Randomness is seeded, so a run
+replays the same sequence of outcomes. Counts per path and status are kept in
+`stats` and served on GET /_stats. The server's `config` can be changed while it runs,
+to inject an outage or a latency spike and later lift it.
+
+Usage:
+    python benchmarks/stub_providers.py --port 9100 --latency-ms 80 --error-rate 0.02
+    BING_ENDPOINT=http://127.0.0.1:9100/v7.0/search GITHUB_API_URL=http://127.0.0.1:9100 \\
+        BING_API_KEY=stub GITHUB_TOKEN=stub uvicorn backend.api:app --port 8001
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 50.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    # 0 disables rate limiting.
+    rate_limit_every: int = 0
+    retry_after_seconds: int = 1
+    seed: int = 1
+    tail_rate: float = 0.0
+    tail_ms: float = 0.0
+
+
+def _bing_payload(query: str, count: int) -> dict:
+    return {"webPages": {"value": [
+        {"name": f"{query} result {i}", "url": f"https://example.org/{query}/{i}", "snippet": f"Stub page {i} mentioning {query}."}
+        for i in range(count)
+    ]}}
+
+
+def _github_users_payload(query: str, count: int) -> dict:
+    login = query.split(" ")[0]
+    return {"total_count": count, "items": [
+        {"login": f"{login}{i or ''}", "html_url": f"https://github.com/{login}{i or ''}"} for i in range(count)
+    ]}
+
+
+def _github_code_payload(query: str, count: int) -> dict:
+    term = query.split(" ")[0]
+    return {"total_count": count, "items": [
+        {"path": f"config/{term}_{i}.yml", "html_url": f"https://github.com/org{i}/repo/blob/main/config/{term}_{i}.yml",
+         "repository": {"full_name": f"org{i}/repo"}}
+        for i in range(count)
+    ]}
+
+
+# path -> (query param, count param, payload builder, sends ETag)
+ROUTES = {
+    "/v7.0/search": ("q", "count", _bing_payload, False),
+    "/search/users": ("q", "per_page", _github_users_payload, True),
+    "/search/code": ("q", "per_page", _github_code_payload, True),
+}
+
+
+class StubProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config: StubConfig):
+        super().__init__(address, _StubHandler)
+        self.config = config
+        self.stats: Counter = Counter()
+        self._lock = threading.Lock()
+        self._rng = random.Random(config.seed)
+        self._served = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def next_outcome(self) -> tuple:
+        """(status, delay seconds) for the next request; drawn in arrival order."""
+        with self._lock:
+            self._served += 1
+            config = self.config
+            delay = max(0.0, config.latency_ms + self._rng.uniform(-config.jitter_ms, config.jitter_ms)) / 1000.0
+            if config.tail_rate and self._rng.random() < config.tail_rate:
+                delay = config.tail_ms / 1000.0
+            if config.rate_limit_every and self._served % config.rate_limit_every == 0:
+                return 429, delay
+            if self._rng.random() < config.error_rate:
+                return 500, delay
+            return 200, delay
+
+    def record(self, path: str, status: int):
+        with self._lock:
+            self.stats[f"{path} {status}"] += 1
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, Nagle plus delayed ACKs add ~40ms.
+    disable_nagle_algorithm = True
+    server: StubProviderServer
+
+    def _send(self, status: int, body: dict, headers: dict = None, payload: bytes = None):
+        if payload is None:
+            payload = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/_stats":
+            self._send(200, dict(self.server.stats))
+            return
+        route = ROUTES.get(url.path)
+        if route is None:
+            self.server.record(url.path, 404)
+            self._send(404, {"message": "Not Found"})
+            return
+
+        status, delay = self.server.next_outcome()
+        time.sleep(delay)
+        if status != 200:
+            self.server.record(url.path, status)
+        if status == 429:
+            retry_after = self.server.config.retry_after_seconds
+            self._send(429, {"message": "API rate limit exceeded"}, {
+                "Retry-After": str(retry_after),
+                "X-RateLimit-Remaining": "0",
+                "X-RateLimit-Reset": str(int(time.time()) + retry_after),
+            })
+            return
+        if status != 200:
+            self._send(status, {"message": "Stub failure"})
+            return
+
+        query_param, count_param, build, sends_etag = route
+        params = parse_qs(url.query)
+        query = params.get(query_param, ["target"])[0]
+        count = int(params.get(count_param, ["5"])[0])
+        payload = json.dumps(build(query, count)).encode()
+        headers = {"X-RateLimit-Remaining": "1000"}
+        if sends_etag:
+            headers["ETag"] = '"%s"' % hashlib.blake2b(payload, digest_size=8).hexdigest()
+            if self.headers.get("If-None-Match") == headers["ETag"]:
+                self.server.record(url.path, 304)
+                self._send(304, None, headers)
+                return
+        self.server.record(url.path, status)
+        self._send(200, None, headers, payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> StubProviderServer:
+    """Starts the stub on a background thread; `port=0` picks a free port."""
+    server = StubProviderServer((host, port), config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0, help="Share of requests that take --tail-ms.")
+    parser.add_argument("--tail-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every Nth request with 429.")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    config = StubConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.rate_limit_every, seed=args.seed,
+                        tail_rate=args.tail_rate, tail_ms=args.tail_ms)
+    server = StubProviderServer((args.host, args.port), config)
+    print(f"Stub providers on {server.base_url} (Bing: {server.base_url}/v7.0/search, GitHub: {server.base_url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,18 @@
+const fs = require('fs');
 const { performance } = require('perf_hooks');
 
-const GO_GATEWAY_URL = 'http://localhost:8080/analyze?target=';
+const GO_GATEWAY_BASE = 'http://localhost:8080';
+const GO_GATEWAY_URL = `${GO_GATEWAY_BASE}/analyze`;
+const GO_GATEWAY_STREAM_URL = `${GO_GATEWAY_BASE}/analyze/stream`;
+const GO_GATEWAY_BATCH_URL = `${GO_GATEWAY_BASE}/analyze/batch`;
 
-function formatReportForCLI(reportData) {
-    const check = '\x1b[32m✔\x1b[0m'; // Green
-    const xMark = '\x1b[31m✖\x1b[0m'; // Red
-    const warning = '\x1b[33m▲\x1b[0m'; // Yellow
-    const info = '\x1b[36m▶\x1b[0m'; // Cyan
-    const target = reportData.target || 'N/A';
-    
-    const cacheStatus = reportData.is_cached ? `\x1b[43m\x1b[30m CACHED \x1b[0m` : `\x1b[42m\x1b[30m LIVE SCAN \x1b[0m`;
+const check = '\x1b[32m✔\x1b[0m'; // Green
+const xMark = '\x1b[31m✖\x1b[0m'; // Red
+const warning = '\x1b[33m▲\x1b[0m'; // Yellow
+const info = '\x1b[36m▶\x1b[0m'; // Cyan
 
-    let output = `\n\n--- 🕵️ OSINT Report: ${target} ${cacheStatus} ---\n`;
-    output += `SUMMARY: ${reportData.summary || 'No summary.'}\n`;
-    output += `Timestamp: ${reportData.timestamp}\n\n`;
-
-    output += `--- [ 🌐 Domain Info ] ---\n`;
-    const domainInfo = reportData.domain_results;
+function formatDomainSection(domainInfo) {
+    let output = `--- [ 🌐 Domain Info ] ---\n`;
     if (domainInfo) {
         const regStatus = domainInfo.is_registered ? `${check} Registered` : `${xMark} NOT Registered`;
         output += `  Status: ${regStatus}\n`;
@@ -25,17 +21,22 @@ function formatReportForCLI(reportData) {
     } else {
         output += `  ${info} Domain check skipped or target is username.\n\n`;
     }
+    return output;
+}
 
-    output += `--- [ 📸 Social Media & Profiles ] ---\n`;
-    const socialHits = reportData.social_media_hits || [];
-    socialHits.forEach(hit => {
+function formatSocialSection(socialHits) {
+    let output = `--- [ 📸 Social Media & Profiles ] ---\n`;
+    (socialHits || []).forEach(hit => {
         const statusIcon = hit.status === 'FOUND' ? check : xMark;
         output += `  ${statusIcon} ${hit.platform}: ${hit.url_found || 'Not Found / Private'}\n`;
     });
     output += "\n";
+    return output;
+}
 
-    output += `--- [ ⚠️ Vulnerabilities & Risks ] ---\n`;
-    const vulnHits = reportData.vulnerability_hits || [];
+function formatVulnerabilitySection(vulnHits) {
+    let output = `--- [ ⚠️ Vulnerabilities & Risks ] ---\n`;
+    vulnHits = vulnHits || [];
     if (vulnHits.length > 0) {
         vulnHits.forEach(hit => {
             const icon = hit.severity === 'CRITICAL' ? xMark : warning;
@@ -45,10 +46,12 @@ function formatReportForCLI(reportData) {
         output += `  ${check} No significant vulnerabilities found.\n`;
     }
     output += "\n";
+    return output;
+}
 
-    output += `--- [ 🔎 Web Search & Dorking ] ---\n`;
-    const searchData = reportData.web_search_data || [];
-    searchData.forEach(hit => {
+function formatWebSearchSection(searchData) {
+    let output = `--- [ 🔎 Web Search & Dorking ] ---\n`;
+    (searchData || []).forEach(hit => {
         if (hit.result_type === "Sensitive File Exposure") {
              output += `  ${warning} Dork Hit (${hit.source}): ${(Array.isArray(hit.data) ? hit.data.join(', ') : JSON.stringify(hit.data))}\n`;
         } else if (hit.result_type === "Page Count") {
@@ -58,17 +61,242 @@ function formatReportForCLI(reportData) {
              output += `  ${info} ${hit.source}: ${JSON.stringify(hit.data)}\n`;
         }
     });
+    return output;
+}
 
-    output += `\n----------------------------------------\n`;
+function formatSourcesSection(sources) {
+    if (!sources || sources.length === 0) return '';
+    let output = `--- [ ⏱ Sources ] ---\n`;
+    sources.forEach(source => {
+        const icon = ['completed', 'cached', 'stale'].includes(source.status) ? check : xMark;
+        const took = source.duration_ms != null ? ` in ${source.duration_ms}ms` : '';
+        output += `  ${icon} ${source.source}: ${source.status}${took}\n`;
+    });
+    return output + "\n";
+}
+
+function formatReportHeader(reportData) {
+    const target = reportData.target || 'N/A';
+    let cacheStatus = reportData.is_cached ? `\x1b[43m\x1b[30m CACHED \x1b[0m` : `\x1b[42m\x1b[30m LIVE SCAN \x1b[0m`;
+    if (reportData.is_stale) {
+        cacheStatus += ` \x1b[41m\x1b[37m STALE (refreshing) \x1b[0m`;
+    }
+
+    let output = `\n\n--- 🕵️ OSINT Report: ${target} ${cacheStatus} ---\n`;
+    output += `SUMMARY: ${reportData.summary || 'No summary.'}\n`;
+    output += `Timestamp: ${reportData.timestamp}\n\n`;
+    return output;
+}
+
+function formatReportForCLI(reportData) {
+    let output = formatReportHeader(reportData);
+    output += formatDomainSection(reportData.domain_results);
+    output += formatSocialSection(reportData.social_media_hits);
+    output += formatVulnerabilitySection(reportData.vulnerability_hits);
+    output += formatWebSearchSection(reportData.web_search_data);
+    output += "\n" + formatSourcesSection(reportData.sources);
+    output += `----------------------------------------\n`;
     return output;
 }
 
+// Renders only the sections a single source contributed (streaming mode).
+function formatSourceEvent(event) {
+    const origin = event.status === 'stale' ? 'stale cache, refreshing' : event.cached ? 'cache' : `live, ${event.duration_ms}ms`;
+    let output = `\n\x1b[36m[${event.source}]\x1b[0m (${origin})\n`;
+    if (!event.result) {
+        const reason = event.status === 'timeout' ? 'Source timed out.' : 'Source failed.';
+        return output + `  ${xMark} ${reason}\n`;
+    }
+    const result = event.result;
+    if (result.domain_results) output += formatDomainSection(result.domain_results);
+    if ((result.social_media_hits || []).length > 0) output += formatSocialSection(result.social_media_hits);
+    if ((result.vulnerability_hits || []).length > 0) output += formatVulnerabilitySection(result.vulnerability_hits);
+    if ((result.web_search_data || []).length > 0) output += formatWebSearchSection(result.web_search_data);
+    return output;
+}
+
+// Reads an NDJSON response body and hands each parsed line to onEvent as it arrives.
+async function readNdjson(response, onEvent) {
+    const decoder = new TextDecoder();
+    let buffered = '';
+    const handleLine = (line) => {
+        if (!line.trim()) return;
+        let event;
+        try {
+            event = JSON.parse(line);
+        } catch (err) {
+            console.error(`\n❌ Invalid stream line: ${line}`);
+            return;
+        }
+        onEvent(event);
+    };
+
+    for await (const chunk of response.body) {
+        buffered += decoder.decode(chunk, { stream: true });
+        let newline;
+        while ((newline = buffered.indexOf('\n')) >= 0) {
+            handleLine(buffered.slice(0, newline));
+            buffered = buffered.slice(newline + 1);
+        }
+    }
+    handleLine(buffered);
+}
+
+// Query string for /analyze and /analyze/stream: the target plus the optional flags.
+function analysisQuery(target, options, extra = {}) {
+    const params = new URLSearchParams({ target, ...extra });
+    if (options.incremental) params.set('incremental', 'true');
+    if (options.timeout) params.set('timeout', String(options.timeout));
+    return `?${params}`;
+}
+
+function printStreamEvent(event, startTime) {
+    const elapsed = ((performance.now() - startTime) / 1000).toFixed(2);
+    if (event.event === 'source') {
+        process.stdout.write(formatSourceEvent(event) + `  \x1b[90m+${elapsed}s\x1b[0m\n`);
+    } else if (event.event === 'report') {
+        process.stdout.write(formatReportHeader(event.report));
+    } else if (event.event === 'error') {
+        console.error(`\n❌ Engine error: ${event.detail}`);
+    }
+}
+
+async function runStream(target, options, startTime) {
+    const response = await fetch(GO_GATEWAY_STREAM_URL + analysisQuery(target, options));
+
+    if (response.status === 429) {
+        console.error(`\n❌ Rate Limit Error (429): Too many requests. Wait 3 seconds and try again.`);
+        return;
+    }
+    if (!response.ok) {
+        const text = await response.text().catch(()=>"<unable to read body>");
+        console.error(`\n❌ HTTP Error ${response.status}: ${text}`);
+        return;
+    }
+
+    await readNdjson(response, (event) => printStreamEvent(event, startTime));
+
+    const endTime = performance.now();
+    console.log(`Total analysis time: \x1b[33m${((endTime - startTime) / 1000).toFixed(2)}s\x1b[0m`);
+}
+
+// Queues the analysis on the worker pool, then follows the job's event stream. The
+// request that queues it returns at once, so a slow scan never hits the gateway timeout.
+async function runEnqueued(target, options, startTime) {
+    const response = await fetch(GO_GATEWAY_URL + analysisQuery(target, options, { enqueue: 'true' }));
+
+    if (response.status === 429) {
+        console.error(`\n❌ Rate Limit Error (429): Too many requests. Wait 3 seconds and try again.`);
+        return;
+    }
+    if (!response.ok) {
+        const text = await response.text().catch(()=>"<unable to read body>");
+        console.error(`\n❌ HTTP Error ${response.status}: ${text}`);
+        return;
+    }
+    const job = await response.json();
+    console.log(`${info} Queued as job ${job.job_id} (status: ${GO_GATEWAY_BASE}${job.status_url})`);
+
+    const stream = await fetch(GO_GATEWAY_BASE + job.stream_url);
+    if (!stream.ok) {
+        console.error(`\n❌ HTTP Error ${stream.status} following job ${job.job_id}`);
+        return;
+    }
+    await readNdjson(stream, (event) => printStreamEvent(event, startTime));
+
+    const endTime = performance.now();
+    console.log(`Total analysis time: \x1b[33m${((endTime - startTime) / 1000).toFixed(2)}s\x1b[0m`);
+}
+
+function readTargets(file) {
+    const raw = fs.readFileSync(file === '-' ? 0 : file, 'utf8');
+    return raw.split(/\r?\n/).map(line => line.trim()).filter(line => line && !line.startsWith('#'));
+}
+
+async function runBatch(file, concurrency, startTime) {
+    const targets = readTargets(file);
+    if (targets.length === 0) {
+        console.error('No targets found in input.');
+        return;
+    }
+    console.log(`Submitting ${targets.length} targets...`);
+
+    const body = { targets };
+    if (concurrency) body.concurrency = concurrency;
+    const response = await fetch(GO_GATEWAY_BATCH_URL, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(body),
+    });
+
+    if (response.status === 429) {
+        console.error(`\n❌ Rate Limit Error (429): Too many requests. Wait 3 seconds and try again.`);
+        return;
+    }
+    if (!response.ok) {
+        const text = await response.text().catch(()=>"<unable to read body>");
+        console.error(`\n❌ HTTP Error ${response.status}: ${text}`);
+        return;
+    }
+
+    let done = 0;
+    await readNdjson(response, (event) => {
+        if (event.event === 'result') {
+            done += 1;
+            const report = event.report;
+            const origin = report.is_cached ? 'cached' : 'live';
+            console.log(`${check} [${done}] ${event.target} (${origin}): ${report.summary}`);
+        } else if (event.event === 'error') {
+            done += 1;
+            console.log(`${xMark} [${done}] ${event.target}: ${event.detail}`);
+        } else if (event.event === 'summary') {
+            console.log(`\n--- Batch summary ---`);
+            console.log(`  Unique targets: ${event.unique} (${event.duplicates} duplicates skipped)`);
+            console.log(`  Completed: ${event.completed}, failed: ${event.failed}, cache hits: ${event.cache_hits}`);
+            console.log(`  Throughput: \x1b[33m${event.targets_per_second} targets/sec\x1b[0m over ${event.elapsed_seconds}s`);
+        }
+    });
+
+    const endTime = performance.now();
+    console.log(`Total batch time: \x1b[33m${((endTime - startTime) / 1000).toFixed(2)}s\x1b[0m`);
+}
+
+function optionValue(args, name) {
+    const index = args.indexOf(name);
+    return index >= 0 ? args[index + 1] : undefined;
+}
+
 async function main() {
-    const target = process.argv[2];
+    const args = process.argv.slice(2);
+    const stream = args.includes('--stream');
+    const enqueue = args.includes('--enqueue');
+    const options = {
+        incremental: args.includes('--incremental'),
+        timeout: parseFloat(optionValue(args, '--timeout')) || undefined,
+    };
+    const batchFile = optionValue(args, '--file');
+    const concurrency = parseInt(optionValue(args, '--concurrency'), 10) || undefined;
+    const optionArgs = new Set([batchFile, optionValue(args, '--concurrency'), optionValue(args, '--timeout')]);
+    const target = args.find(arg => !arg.startsWith('--') && !optionArgs.has(arg));
+
+    if (batchFile) {
+        const startTime = performance.now();
+        try {
+            await runBatch(batchFile, concurrency, startTime);
+        } catch (error) {
+            console.error(`\n❌ Connection Error. Ensure the Go Gateway is running on port 8080 and reachable.`);
+            console.error(`Detail: ${error.message}`);
+        }
+        return;
+    }
 
     if (!target) {
-        console.error('Usage: node analyze_cli.js <target_domain_or_username>');
+        console.error('Usage: node analyze_cli.js [--stream | --enqueue] [--incremental] [--timeout SECONDS] <target_domain_or_username>');
+        console.error('       node analyze_cli.js --file <targets.txt | -> [--concurrency N]');
         console.error('\nExample: node analyze_cli.js secure-company-dev');
+        console.error('         node analyze_cli.js --stream secure-company-dev   (print each source as it finishes)');
+        console.error('         node analyze_cli.js --enqueue secure-company-dev  (queue on the worker pool and follow the job)');
+        console.error('         cat targets.txt | node analyze_cli.js --file -    (one target per line)');
         process.exit(1);
     }
 
@@ -76,7 +304,16 @@ async function main() {
     const startTime = performance.now();
     
     try {
-        const response = await fetch(GO_GATEWAY_URL + encodeURIComponent(target));
+        if (enqueue) {
+            await runEnqueued(target, options, startTime);
+            return;
+        }
+        if (stream) {
+            await runStream(target, options, startTime);
+            return;
+        }
+
+        const response = await fetch(GO_GATEWAY_URL + analysisQuery(target, options));
         let reportData = null;
         try {
             reportData = await response.json();
@@ -1,62 +1,238 @@
 package main
 
 import (
+	"io"
 	"log"
+	"math"
+	"net"
 	"net/http"
-	"time"
-	"io"
 	"net/url"
-	"sync"
+	"os"
+	"strconv"
 	"strings"
+	"sync"
+	"time"
 )
 
-const pythonServiceHost = "http://localhost:8001" 
+// pythonServiceHost is the engine the gateway proxies to (PYTHON_SERVICE_URL).
+var pythonServiceHost = envString("PYTHON_SERVICE_URL", "http://localhost:8001")
+
+// Batches of thousands of targets legitimately run for minutes.
+const batchTimeout = 30 * time.Minute
+
+// limiterShards spreads clients over independently locked maps so concurrent
+// requests from different clients rarely contend on the same mutex.
+const limiterShards = 64
 
-type Client struct {
-	lastRequest time.Time
+// engineTransport is shared by every proxied request, so connections to the engine
+// are kept alive and reused instead of being dialed (and left in TIME_WAIT) per call.
+// The default transport keeps only 2 idle connections per host, which forces
+// fresh dials as soon as more than two requests are in flight.
+var engineTransport = &http.Transport{
+	DialContext: (&net.Dialer{
+		Timeout:   5 * time.Second,
+		KeepAlive: 30 * time.Second,
+	}).DialContext,
+	MaxIdleConns:        envInt("GATEWAY_MAX_IDLE_CONNS", 256),
+	MaxIdleConnsPerHost: envInt("GATEWAY_MAX_IDLE_CONNS", 256),
+	MaxConnsPerHost:     envInt("GATEWAY_MAX_CONNS", 0),
+	IdleConnTimeout:     90 * time.Second,
+	// Bodies are relayed as-is; the client negotiates its own encoding.
+	DisableCompression: true,
 }
 
-var clients = make(map[string]*Client)
-var mu sync.Mutex
+func engineClient(timeout time.Duration) *http.Client {
+	return &http.Client{Transport: engineTransport, Timeout: timeout}
+}
 
-const rateLimitDuration = 3 * time.Second 
+type bucket struct {
+	tokens float64
+	last   time.Time
+}
 
-func getClientIP(r *http.Request) string {
+type limiterShard struct {
+	mu      sync.Mutex
+	buckets map[string]*bucket
+}
 
-    if ip := r.Header.Get("X-Forwarded-For"); ip != "" {
+// RateLimiter is a per-client token bucket: `rate` tokens per second up to `burst`.
+// A shard lock is held only to update one bucket, never across the proxied call.
+// Buckets idle for longer than `idle` are evicted by Sweep; a bucket idle that long
+// has refilled completely, so dropping it does not change any decision.
+type RateLimiter struct {
+	rate   float64
+	burst  float64
+	idle   time.Duration
+	shards [limiterShards]limiterShard
+}
 
-        parts := strings.Split(ip, ",")
-        return strings.TrimSpace(parts[0])
-    }
-    return r.RemoteAddr
+func NewRateLimiter(rate float64, burst int, idle time.Duration) *RateLimiter {
+	if burst < 1 {
+		burst = 1
+	}
+	if full := time.Duration(float64(burst) / rate * float64(time.Second)); idle < full {
+		idle = full
+	}
+	l := &RateLimiter{rate: rate, burst: float64(burst), idle: idle}
+	for i := range l.shards {
+		l.shards[i].buckets = make(map[string]*bucket)
+	}
+	return l
 }
 
-func rateLimitMiddleware(next http.HandlerFunc) http.HandlerFunc {
-	return func(w http.ResponseWriter, r *http.Request) {
-		ip := getClientIP(r)
-		mu.Lock()
-		defer mu.Unlock()
+func (l *RateLimiter) shard(key string) *limiterShard {
+	// FNV-1a, inlined to avoid allocating a hash.Hash per request.
+	h := uint32(2166136261)
+	for i := 0; i < len(key); i++ {
+		h ^= uint32(key[i])
+		h *= 16777619
+	}
+	return &l.shards[h%limiterShards]
+}
 
-		client, exists := clients[ip]
-		now := time.Now()
+// Allow takes a token for `key`. When none is left it returns false and how long
+// until the next token.
+func (l *RateLimiter) Allow(key string, now time.Time) (bool, time.Duration) {
+	s := l.shard(key)
+	s.mu.Lock()
+	defer s.mu.Unlock()
 
-		if !exists {
-			clients[ip] = &Client{lastRequest: now}
-			next(w, r)
+	b, ok := s.buckets[key]
+	if !ok {
+		s.buckets[key] = &bucket{tokens: l.burst - 1, last: now}
+		return true, 0
+	}
+	b.tokens = math.Min(l.burst, b.tokens+now.Sub(b.last).Seconds()*l.rate)
+	b.last = now
+	if b.tokens < 1 {
+		return false, time.Duration((1 - b.tokens) / l.rate * float64(time.Second))
+	}
+	b.tokens--
+	return true, 0
+}
+
+// Sweep evicts buckets idle since before now-idle and returns how many it removed.
+func (l *RateLimiter) Sweep(now time.Time) int {
+	removed := 0
+	for i := range l.shards {
+		s := &l.shards[i]
+		s.mu.Lock()
+		for key, b := range s.buckets {
+			if now.Sub(b.last) > l.idle {
+				delete(s.buckets, key)
+				removed++
+			}
+		}
+		s.mu.Unlock()
+	}
+	return removed
+}
+
+// Len is the number of clients currently tracked.
+func (l *RateLimiter) Len() int {
+	n := 0
+	for i := range l.shards {
+		s := &l.shards[i]
+		s.mu.Lock()
+		n += len(s.buckets)
+		s.mu.Unlock()
+	}
+	return n
+}
+
+// SweepEvery runs Sweep on a ticker until stop is closed.
+func (l *RateLimiter) SweepEvery(interval time.Duration, stop <-chan struct{}) {
+	ticker := time.NewTicker(interval)
+	defer ticker.Stop()
+	for {
+		select {
+		case now := <-ticker.C:
+			l.Sweep(now)
+		case <-stop:
 			return
 		}
+	}
+}
 
-		if now.Sub(client.lastRequest) < rateLimitDuration {
-		
+func getClientIP(r *http.Request) string {
+	if ip := r.Header.Get("X-Forwarded-For"); ip != "" {
+		parts := strings.Split(ip, ",")
+		return strings.TrimSpace(parts[0])
+	}
+	// RemoteAddr carries the client port, which changes with every connection.
+	if host, _, err := net.SplitHostPort(r.RemoteAddr); err == nil {
+		return host
+	}
+	return r.RemoteAddr
+}
+
+func rateLimitMiddleware(limiter *RateLimiter, next http.HandlerFunc) http.HandlerFunc {
+	return func(w http.ResponseWriter, r *http.Request) {
+		if ok, wait := limiter.Allow(getClientIP(r), time.Now()); !ok {
+			w.Header().Set("Retry-After", strconv.Itoa(int(math.Ceil(wait.Seconds()))))
 			http.Error(w, "429 Too Many Requests: Rate limit exceeded. Try again later.", http.StatusTooManyRequests)
 			return
 		}
-
-		client.lastRequest = now
 		next(w, r)
 	}
 }
 
+func envString(name, fallback string) string {
+	if v := os.Getenv(name); v != "" {
+		return v
+	}
+	return fallback
+}
+
+func envInt(name string, fallback int) int {
+	if v, err := strconv.Atoi(os.Getenv(name)); err == nil {
+		return v
+	}
+	return fallback
+}
+
+func envFloat(name string, fallback float64) float64 {
+	if v, err := strconv.ParseFloat(os.Getenv(name), 64); err == nil && v > 0 {
+		return v
+	}
+	return fallback
+}
+
+// forwardedParams are the query parameters the engine's /analyze endpoints accept;
+// anything else a client sends is dropped rather than passed through.
+var forwardedParams = []string{"target", "timeout", "enqueue", "incremental"}
+
+// maxAnalysisTimeout is the largest `timeout` the engine accepts.
+const maxAnalysisTimeout = 120 * time.Second
+
+func buildPythonURL(path string, query url.Values) (*url.URL, error) {
+	pythonURL, err := url.Parse(pythonServiceHost + path)
+	if err != nil {
+		return nil, err
+	}
+	q := url.Values{}
+	for _, name := range forwardedParams {
+		if v := query.Get(name); v != "" {
+			q.Set(name, v)
+		}
+	}
+	pythonURL.RawQuery = q.Encode()
+	return pythonURL, nil
+}
+
+// engineTimeout is how long to wait for an analysis: the client's `timeout` (capped
+// at the engine's maximum) plus headroom for building the report, or 40s without one.
+func engineTimeout(query url.Values) time.Duration {
+	seconds, err := strconv.ParseFloat(query.Get("timeout"), 64)
+	if err != nil || seconds <= 0 {
+		return 40 * time.Second
+	}
+	requested := time.Duration(seconds * float64(time.Second))
+	if requested > maxAnalysisTimeout {
+		requested = maxAnalysisTimeout
+	}
+	return requested + 10*time.Second
+}
 
 func handleAnalysis(w http.ResponseWriter, r *http.Request) {
 	if r.Method != http.MethodGet {
@@ -70,22 +246,138 @@ func handleAnalysis(w http.ResponseWriter, r *http.Request) {
 		return
 	}
 
-	pythonURL, err := url.Parse(pythonServiceHost + "/analyze")
+	pythonURL, err := buildPythonURL("/analyze", r.URL.Query())
 	if err != nil {
 		log.Printf("Error parsing URL: %v", err)
 		http.Error(w, "Internal configuration error", http.StatusInternalServerError)
 		return
 	}
 
-	q := pythonURL.Query()
-	q.Set("target", target)
-	pythonURL.RawQuery = q.Encode()
+	req, err := http.NewRequestWithContext(r.Context(), http.MethodGet, pythonURL.String(), nil)
+	if err != nil {
+		http.Error(w, "Internal configuration error", http.StatusInternalServerError)
+		return
+	}
+
+	relayResponse(w, req, engineTimeout(r.URL.Query()))
+}
+
+// handleAnalysisStream relays the NDJSON stream from /analyze/stream, flushing every
+// chunk to the client as soon as it arrives instead of buffering the whole body.
+func handleAnalysisStream(w http.ResponseWriter, r *http.Request) {
+	if r.Method != http.MethodGet {
+		http.Error(w, "Method not allowed", http.StatusMethodNotAllowed)
+		return
+	}
+
+	target := r.URL.Query().Get("target")
+	if target == "" {
+		http.Error(w, "Query parameter 'target' is required.", http.StatusBadRequest)
+		return
+	}
 
-	client := http.Client{
-		Timeout: 40 * time.Second, 
+	pythonURL, err := buildPythonURL("/analyze/stream", r.URL.Query())
+	if err != nil {
+		log.Printf("Error parsing URL: %v", err)
+		http.Error(w, "Internal configuration error", http.StatusInternalServerError)
+		return
+	}
+
+	req, err := http.NewRequestWithContext(r.Context(), http.MethodGet, pythonURL.String(), nil)
+	if err != nil {
+		http.Error(w, "Internal configuration error", http.StatusInternalServerError)
+		return
+	}
+	relayStream(w, req, engineTimeout(r.URL.Query()))
+}
+
+// handleBatchAnalysis forwards a JSON list of targets to /analyze/batch and streams the
+// per-target NDJSON results back. A whole batch counts as one request for rate limiting.
+func handleBatchAnalysis(w http.ResponseWriter, r *http.Request) {
+	if r.Method != http.MethodPost {
+		http.Error(w, "Method not allowed", http.StatusMethodNotAllowed)
+		return
+	}
+
+	req, err := http.NewRequestWithContext(r.Context(), http.MethodPost, pythonServiceHost+"/analyze/batch", r.Body)
+	if err != nil {
+		http.Error(w, "Internal configuration error", http.StatusInternalServerError)
+		return
+	}
+	req.Header.Set("Content-Type", "application/json")
+	relayStream(w, req, batchTimeout)
+}
+
+// handleJobSubmit forwards a JSON list of targets to POST /jobs, which queues one job
+// per target and answers at once with their ids.
+func handleJobSubmit(w http.ResponseWriter, r *http.Request) {
+	if r.Method != http.MethodPost {
+		http.Error(w, "Method not allowed", http.StatusMethodNotAllowed)
+		return
+	}
+	pythonURL, err := buildPythonURL("/jobs", r.URL.Query())
+	if err != nil {
+		log.Printf("Error parsing URL: %v", err)
+		http.Error(w, "Internal configuration error", http.StatusInternalServerError)
+		return
+	}
+	req, err := http.NewRequestWithContext(r.Context(), http.MethodPost, pythonURL.String(), r.Body)
+	if err != nil {
+		http.Error(w, "Internal configuration error", http.StatusInternalServerError)
+		return
+	}
+	req.Header.Set("Content-Type", "application/json")
+	relayResponse(w, req, 40*time.Second)
+}
+
+// handleJob proxies GET /jobs/{id} (status and report) and GET /jobs/{id}/stream (the
+// job's NDJSON events). These only read a job that was already queued, so they are not
+// rate limited: a client polling its own job must not lock itself out of /analyze.
+func handleJob(w http.ResponseWriter, r *http.Request) {
+	if r.Method != http.MethodGet {
+		http.Error(w, "Method not allowed", http.StatusMethodNotAllowed)
+		return
 	}
+	rest := strings.TrimPrefix(r.URL.Path, "/jobs/")
+	jobID, stream := strings.CutSuffix(rest, "/stream")
+	if !validJobID(jobID) {
+		http.Error(w, "Job not found.", http.StatusNotFound)
+		return
+	}
+	path := "/jobs/" + jobID
+	if stream {
+		path += "/stream"
+	}
+	req, err := http.NewRequestWithContext(r.Context(), http.MethodGet, pythonServiceHost+path, nil)
+	if err != nil {
+		http.Error(w, "Internal configuration error", http.StatusInternalServerError)
+		return
+	}
+	if stream {
+		// A queued job may wait behind others before it starts.
+		relayStream(w, req, batchTimeout)
+		return
+	}
+	relayResponse(w, req, 40*time.Second)
+}
 
-	resp, err := client.Get(pythonURL.String())
+// validJobID accepts the engine's hex job ids, so nothing else reaches its URL path.
+func validJobID(id string) bool {
+	if id == "" || len(id) > 64 {
+		return false
+	}
+	for i := 0; i < len(id); i++ {
+		c := id[i]
+		if !('0' <= c && c <= '9' || 'a' <= c && c <= 'f') {
+			return false
+		}
+	}
+	return true
+}
+
+// relayResponse sends `req` to the engine and copies its JSON answer back as-is.
+func relayResponse(w http.ResponseWriter, req *http.Request, timeout time.Duration) {
+	resp, err := engineClient(timeout).Do(req)
 	if err != nil {
 		log.Printf("Error contacting Python service: %v", err)
 		http.Error(w, "503 Service Unavailable (Python backend timeout or error)", http.StatusServiceUnavailable)
@@ -95,17 +387,73 @@ func handleAnalysis(w http.ResponseWriter, r *http.Request) {
 
 	w.Header().Set("Content-Type", "application/json")
 	w.WriteHeader(resp.StatusCode)
-
 	if _, err := io.Copy(w, resp.Body); err != nil {
 		log.Printf("Error writing response to client: %v", err)
 	}
 }
 
+func relayStream(w http.ResponseWriter, req *http.Request, timeout time.Duration) {
+	flusher, ok := w.(http.Flusher)
+	if !ok {
+		http.Error(w, "Streaming unsupported", http.StatusInternalServerError)
+		return
+	}
+
+	resp, err := engineClient(timeout).Do(req)
+	if err != nil {
+		log.Printf("Error contacting Python service: %v", err)
+		http.Error(w, "503 Service Unavailable (Python backend timeout or error)", http.StatusServiceUnavailable)
+		return
+	}
+	defer resp.Body.Close()
+
+	contentType := resp.Header.Get("Content-Type")
+	if contentType == "" {
+		contentType = "application/x-ndjson"
+	}
+	w.Header().Set("Content-Type", contentType)
+	w.Header().Set("Cache-Control", "no-cache")
+	w.Header().Set("X-Accel-Buffering", "no")
+	w.WriteHeader(resp.StatusCode)
+	flusher.Flush()
+
+	buf := make([]byte, 32*1024)
+	for {
+		n, readErr := resp.Body.Read(buf)
+		if n > 0 {
+			if _, err := w.Write(buf[:n]); err != nil {
+				log.Printf("Error writing stream to client: %v", err)
+				return
+			}
+			flusher.Flush()
+		}
+		if readErr == io.EOF {
+			return
+		}
+		if readErr != nil {
+			log.Printf("Error reading stream from Python service: %v", readErr)
+			return
+		}
+	}
+}
+
 func main() {
-	http.HandleFunc("/analyze", rateLimitMiddleware(handleAnalysis))
+	// Defaults keep the original policy: one request per client every 3 seconds.
+	limiter := NewRateLimiter(
+		envFloat("GATEWAY_RATE_PER_SECOND", 1.0/3),
+		envInt("GATEWAY_BURST", 1),
+		time.Duration(envInt("GATEWAY_IDLE_SECONDS", 600))*time.Second,
+	)
+	go limiter.SweepEvery(time.Minute, nil)
 
-	log.Println("Go API Gateway (Rate Limited) listening on :8080. Proxying requests to Python on :8001")
+	http.HandleFunc("/analyze", rateLimitMiddleware(limiter, handleAnalysis))
+	http.HandleFunc("/analyze/stream", rateLimitMiddleware(limiter, handleAnalysisStream))
+	http.HandleFunc("/analyze/batch", rateLimitMiddleware(limiter, handleBatchAnalysis))
+	http.HandleFunc("/jobs", rateLimitMiddleware(limiter, handleJobSubmit))
+	http.HandleFunc("/jobs/", handleJob)
+
+	log.Printf("Go API Gateway (Rate Limited) listening on :8080. Proxying requests to Python at %s", pythonServiceHost)
 	if err := http.ListenAndServe(":8080", nil); err != nil {
 		log.Fatal("ListenAndServe failed: ", err)
 	}
-}
\ No newline at end of file
+}
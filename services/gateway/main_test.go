@@ -0,0 +1,229 @@
+package main
+
+import (
+	"fmt"
+	"io"
+	"net/http"
+	"net/http/httptest"
+	"net/url"
+	"strings"
+	"sync"
+	"sync/atomic"
+	"testing"
+	"time"
+)
+
+func TestRateLimiterBurstAndRefill(t *testing.T) {
+	l := NewRateLimiter(2, 3, time.Minute)
+	now := time.Unix(1000, 0)
+	for i := 0; i < 3; i++ {
+		if ok, _ := l.Allow("1.2.3.4", now); !ok {
+			t.Fatalf("request %d within burst was rejected", i)
+		}
+	}
+	ok, wait := l.Allow("1.2.3.4", now)
+	if ok || wait != 500*time.Millisecond {
+		t.Fatalf("expected rejection with 500ms wait, got ok=%v wait=%v", ok, wait)
+	}
+	if ok, _ := l.Allow("5.6.7.8", now); !ok {
+		t.Fatal("another client shares the first client's bucket")
+	}
+	if ok, _ := l.Allow("1.2.3.4", now.Add(500*time.Millisecond)); !ok {
+		t.Fatal("token was not refilled after 500ms")
+	}
+}
+
+func TestRateLimiterSweepsIdleClients(t *testing.T) {
+	l := NewRateLimiter(1, 1, 10*time.Second)
+	now := time.Unix(1000, 0)
+	for i := 0; i < 1000; i++ {
+		l.Allow(fmt.Sprintf("10.0.%d.%d", i/256, i%256), now)
+	}
+	l.Allow("busy", now.Add(9*time.Second))
+	if removed := l.Sweep(now.Add(11 * time.Second)); removed != 1000 {
+		t.Fatalf("expected 1000 idle clients evicted, got %d", removed)
+	}
+	if l.Len() != 1 {
+		t.Fatalf("expected only the recent client to remain, got %d", l.Len())
+	}
+}
+
+func TestClientIPIgnoresPort(t *testing.T) {
+	r := httptest.NewRequest(http.MethodGet, "/analyze", nil)
+	r.RemoteAddr = "192.0.2.7:51234"
+	if ip := getClientIP(r); ip != "192.0.2.7" {
+		t.Fatalf("got %q", ip)
+	}
+	r.Header.Set("X-Forwarded-For", "198.51.100.1, 10.0.0.1")
+	if ip := getClientIP(r); ip != "198.51.100.1" {
+		t.Fatalf("got %q", ip)
+	}
+}
+
+// The limiter used to hold one global mutex across the proxied call, so concurrent
+// requests from different clients were served one at a time.
+func TestConcurrentRequestsAreNotSerialized(t *testing.T) {
+	var inFlight, peak int32
+	engine := httptest.NewServer(http.HandlerFunc(func(w http.ResponseWriter, r *http.Request) {
+		n := atomic.AddInt32(&inFlight, 1)
+		for {
+			p := atomic.LoadInt32(&peak)
+			if n <= p || atomic.CompareAndSwapInt32(&peak, p, n) {
+				break
+			}
+		}
+		time.Sleep(100 * time.Millisecond)
+		atomic.AddInt32(&inFlight, -1)
+		io.WriteString(w, `{"target":"x"}`)
+	}))
+	defer engine.Close()
+	defer func(host string) { pythonServiceHost = host }(pythonServiceHost)
+	pythonServiceHost = engine.URL
+
+	gateway := httptest.NewServer(rateLimitMiddleware(NewRateLimiter(1, 1, time.Minute), handleAnalysis))
+	defer gateway.Close()
+
+	started := time.Now()
+	var wg sync.WaitGroup
+	for i := 0; i < 20; i++ {
+		wg.Add(1)
+		go func(i int) {
+			defer wg.Done()
+			req, _ := http.NewRequest(http.MethodGet, gateway.URL+"/analyze?target=x", nil)
+			req.Header.Set("X-Forwarded-For", fmt.Sprintf("10.1.0.%d", i))
+			resp, err := http.DefaultClient.Do(req)
+			if err != nil {
+				t.Error(err)
+				return
+			}
+			io.Copy(io.Discard, resp.Body)
+			resp.Body.Close()
+			if resp.StatusCode != http.StatusOK {
+				t.Errorf("client %d: status %d", i, resp.StatusCode)
+			}
+		}(i)
+	}
+	wg.Wait()
+	if elapsed := time.Since(started); elapsed > time.Second {
+		t.Fatalf("20 concurrent 100ms requests took %v", elapsed)
+	}
+	if peak < 10 {
+		t.Fatalf("only %d requests reached the engine concurrently", peak)
+	}
+}
+
+func TestRejectedRequestCarriesRetryAfter(t *testing.T) {
+	handler := rateLimitMiddleware(NewRateLimiter(0.25, 1, time.Minute), func(w http.ResponseWriter, r *http.Request) {})
+	for i, want := range []int{http.StatusOK, http.StatusTooManyRequests} {
+		rec := httptest.NewRecorder()
+		req := httptest.NewRequest(http.MethodGet, "/analyze?target=x", nil)
+		handler(rec, req)
+		if rec.Code != want {
+			t.Fatalf("request %d: status %d, want %d", i, rec.Code, want)
+		}
+		if want == http.StatusTooManyRequests && rec.Header().Get("Retry-After") != "4" {
+			t.Fatalf("Retry-After = %q", rec.Header().Get("Retry-After"))
+		}
+	}
+}
+
+// go test -bench . -cpu 1,2,4,8 main.go main_test.go
+func BenchmarkRateLimiterParallel(b *testing.B) {
+	l := NewRateLimiter(1e9, 1e6, time.Minute)
+	var seq int64
+	b.RunParallel(func(pb *testing.PB) {
+		key := fmt.Sprintf("10.2.0.%d", atomic.AddInt64(&seq, 1))
+		now := time.Now()
+		for pb.Next() {
+			l.Allow(key, now)
+		}
+	})
+}
+
+func TestAnalysisParamsAndJobRoutesReachTheEngine(t *testing.T) {
+	var mu sync.Mutex
+	var seen []string
+	engine := httptest.NewServer(http.HandlerFunc(func(w http.ResponseWriter, r *http.Request) {
+		mu.Lock()
+		seen = append(seen, r.Method+" "+r.URL.RequestURI())
+		mu.Unlock()
+		if strings.HasSuffix(r.URL.Path, "/stream") {
+			w.Header().Set("Content-Type", "application/x-ndjson")
+			io.WriteString(w, "{\"event\":\"report\"}\n")
+			return
+		}
+		w.Header().Set("Content-Type", "application/json")
+		w.WriteHeader(http.StatusAccepted)
+		io.WriteString(w, `{"job_id":"ab12"}`)
+	}))
+	defer engine.Close()
+	defer func(host string) { pythonServiceHost = host }(pythonServiceHost)
+	pythonServiceHost = engine.URL
+
+	mux := http.NewServeMux()
+	mux.HandleFunc("/analyze", handleAnalysis)
+	mux.HandleFunc("/jobs", handleJobSubmit)
+	mux.HandleFunc("/jobs/", handleJob)
+	gateway := httptest.NewServer(mux)
+	defer gateway.Close()
+
+	for _, call := range []struct{ method, path, body string }{
+		{http.MethodGet, "/analyze?target=acme.com&enqueue=true&incremental=true&timeout=90&debug=1", ""},
+		{http.MethodPost, "/jobs?timeout=30", `{"targets":["a.com"]}`},
+		{http.MethodGet, "/jobs/ab12", ""},
+		{http.MethodGet, "/jobs/ab12/stream", ""},
+		{http.MethodGet, "/jobs/..%2Fadmin", ""},
+	} {
+		req, _ := http.NewRequest(call.method, gateway.URL+call.path, strings.NewReader(call.body))
+		resp, err := http.DefaultClient.Do(req)
+		if err != nil {
+			t.Fatal(err)
+		}
+		io.Copy(io.Discard, resp.Body)
+		resp.Body.Close()
+	}
+
+	want := []string{
+		"GET /analyze?enqueue=true&incremental=true&target=acme.com&timeout=90",
+		"POST /jobs?timeout=30",
+		"GET /jobs/ab12",
+		"GET /jobs/ab12/stream",
+	}
+	if strings.Join(seen, "\n") != strings.Join(want, "\n") {
+		t.Fatalf("engine saw %q, want %q", seen, want)
+	}
+	if got := engineTimeout(url.Values{"timeout": {"90"}}); got != 100*time.Second {
+		t.Fatalf("engine timeout for a 90s analysis is %v", got)
+	}
+}
+
+// Full path through the gateway (limiter, shared transport, relay) to a stub engine.
+func BenchmarkGatewayParallel(b *testing.B) {
+	engine := httptest.NewServer(http.HandlerFunc(func(w http.ResponseWriter, r *http.Request) {
+		w.Header().Set("Content-Type", "application/json")
+		io.WriteString(w, `{"target":"bench","summary":"ok","social_media_hits":[]}`)
+	}))
+	defer engine.Close()
+	defer func(host string) { pythonServiceHost = host }(pythonServiceHost)
+	pythonServiceHost = engine.URL
+
+	gateway := httptest.NewServer(rateLimitMiddleware(NewRateLimiter(1e9, 1e6, time.Minute), handleAnalysis))
+	defer gateway.Close()
+	client := &http.Client{Transport: &http.Transport{MaxIdleConnsPerHost: 256}}
+
+	var seq int64
+	b.ResetTimer()
+	b.RunParallel(func(pb *testing.PB) {
+		ip := fmt.Sprintf("10.3.0.%d", atomic.AddInt64(&seq, 1))
+		for pb.Next() {
+			req, _ := http.NewRequest(http.MethodGet, gateway.URL+"/analyze?target=bench", nil)
+			req.Header.Set("X-Forwarded-For", ip)
+			resp, err := client.Do(req)
+			if err != nil {
+				b.Fatal(err)
+			}
+			io.Copy(io.Discard, resp.Body)
+			resp.Body.Close()
+		}
+	})
+}
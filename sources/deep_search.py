@@ -1,21 +1,37 @@
 import os
 import asyncio
+import logging
 import random
-from typing import List, Dict, Any
-import httpx
-from backend.core.models import WebSearchHit, SocialMediaHits
+from typing import List, Dict, Any, Optional
+from backend.core.models import WebSearchHit, SocialMediaHits, SourceResult
+from backend.core.normalize import normalize_result
 from backend.core.network_utils import get_random_user_agent
+from backend.core.connectors import provider_get
+from backend.core.http_client import HttpClientRegistry, deadline_timeout
+from backend.core.metrics import PROVIDER_ERRORS
+from backend.core.permutations import CHECKED, batched, candidates, unchecked_batches
+
+logger = logging.getLogger(__name__)
+
+SOURCE_META = {"target_types": ["any"], "cost": 4, "timeout": 15.0, "lazy": True}
 
 BING_API_KEY = os.getenv("BING_API_KEY")          
 BING_ENDPOINT = os.getenv("BING_ENDPOINT", "https://api.bing.microsoft.com/v7.0/search")
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")         
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
 MAX_BING_RESULTS = int(os.getenv("MAX_BING_RESULTS", "6"))
 MAX_GITHUB_USERS = int(os.getenv("MAX_GITHUB_USERS", "5"))
+# Target variants (backend.core.permutations) searched per scan; ones searched in earlier scans are skipped.
+DEEP_SEARCH_PERMUTATIONS = int(os.getenv("DEEP_SEARCH_PERMUTATIONS", "6"))
+# Variants OR-ed into one Bing query.
+BING_VARIANTS_PER_QUERY = 8
 
-async def _bing_search(query: str, ua: str) -> List[WebSearchHit]:
+async def _bing_search(query: str, ua: str, http: Optional[HttpClientRegistry] = None,
+                       deadline: Optional[float] = None, conditional: bool = False) -> Optional[List[WebSearchHit]]:
+    """Bing results for `query`; None when Bing did not answer (no key, breaker open, shed or failed)."""
     results: List[WebSearchHit] = []
     if not BING_API_KEY:
-        return results
+        return None
 
     headers = {
         "Ocp-Apim-Subscription-Key": BING_API_KEY,
@@ -24,27 +40,29 @@ async def _bing_search(query: str, ua: str) -> List[WebSearchHit]:
     }
     params = {"q": query, "count": str(MAX_BING_RESULTS), "textDecorations": "false", "textFormat": "Raw"}
 
-    timeout = httpx.Timeout(15.0, connect=10.0)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        try:
-            resp = await client.get(BING_ENDPOINT, headers=headers, params=params)
-            resp.raise_for_status()
-            data = resp.json()
-            webpages = data.get("webPages", {}).get("value", [])
-            for item in webpages[:MAX_BING_RESULTS]:
-                results.append(WebSearchHit(
-                    source="Bing Web Search",
-                    result_type="WebPage",
-                    data={"name": item.get("name"), "url": item.get("url"), "snippet": item.get("snippet")}
-                ))
-        except Exception as e:
-
-            print("Bing search error:", e)
-
-    await asyncio.sleep(0.15)
+    timeout = deadline_timeout(deadline, 15.0, connect=10.0)
+    try:
+        resp = await provider_get("bing", BING_ENDPOINT, headers, params, timeout, http, deadline, conditional)
+        if resp is None:
+            return None
+        resp.raise_for_status()
+        data = resp.json()
+        webpages = data.get("webPages", {}).get("value", [])
+        for item in webpages[:MAX_BING_RESULTS]:
+            results.append(WebSearchHit(
+                source="Bing Web Search",
+                result_type="WebPage",
+                data={"name": item.get("name"), "url": item.get("url"), "snippet": item.get("snippet")}
+            ))
+    except Exception as e:
+        logger.warning("Bing search error: %s", e)
+        PROVIDER_ERRORS.inc(provider="bing")
+        return None
+
     return results
 
-async def _github_user_search(query: str, ua: str) -> List[SocialMediaHits]:
+async def _github_user_search(query: str, ua: str, http: Optional[HttpClientRegistry] = None,
+                              deadline: Optional[float] = None, conditional: bool = False) -> List[SocialMediaHits]:
     results: List[SocialMediaHits] = []
     if not GITHUB_TOKEN:
         return results
@@ -55,27 +73,29 @@ async def _github_user_search(query: str, ua: str) -> List[SocialMediaHits]:
         "Accept": "application/vnd.github+json",
     }
     params = {"q": f"{query} in:login", "per_page": str(MAX_GITHUB_USERS)}
-    url = "https://api.github.com/search/users"
-
-    timeout = httpx.Timeout(12.0, connect=8.0)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        try:
-            resp = await client.get(url, headers=headers, params=params)
-            resp.raise_for_status()
-            data = resp.json()
-            items = data.get("items", [])[:MAX_GITHUB_USERS]
-            for u in items:
-                results.append(SocialMediaHits(
-                    platform="GitHub",
-                    url_found=u.get("html_url"),
-                    status="FOUND"
-                ))
-        except Exception as e:
-            print("GitHub user search error:", e)
-    await asyncio.sleep(0.12)
+    url = f"{GITHUB_API_URL}/search/users"
+
+    timeout = deadline_timeout(deadline, 12.0, connect=8.0)
+    try:
+        resp = await provider_get("github_users", url, headers, params, timeout, http, deadline, conditional)
+        if resp is None:
+            return results
+        resp.raise_for_status()
+        data = resp.json()
+        items = data.get("items", [])[:MAX_GITHUB_USERS]
+        for u in items:
+            results.append(SocialMediaHits(
+                platform="GitHub",
+                url_found=u.get("html_url"),
+                status="FOUND"
+            ))
+    except Exception as e:
+        logger.warning("GitHub user search error: %s", e)
+        PROVIDER_ERRORS.inc(provider="github_users")
     return results
 
-async def _github_code_search(query: str, ua: str) -> List[WebSearchHit]:
+async def _github_code_search(query: str, ua: str, http: Optional[HttpClientRegistry] = None,
+                              deadline: Optional[float] = None, conditional: bool = False) -> List[WebSearchHit]:
     hits: List[WebSearchHit] = []
     if not GITHUB_TOKEN:
         return hits
@@ -87,23 +107,55 @@ async def _github_code_search(query: str, ua: str) -> List[WebSearchHit]:
     }
 
     params = {"q": f"{query} in:file", "per_page": "5"}
-    url = "https://api.github.com/search/code"
-
-    timeout = httpx.Timeout(12.0, connect=8.0)
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        try:
-            resp = await client.get(url, headers=headers, params=params)
-            resp.raise_for_status()
-            data = resp.json()
-            for item in data.get("items", [])[:5]:
-                hits.append(WebSearchHit(
-                    source="GitHub Code Search",
-                    result_type="CodeMatch",
-                    data={"repository": item.get("repository", {}).get("full_name"), "path": item.get("path"), "html_url": item.get("html_url")}
-                ))
-        except Exception as e:
-            print("GitHub code search error:", e)
-    await asyncio.sleep(0.12)
+    url = f"{GITHUB_API_URL}/search/code"
+
+    timeout = deadline_timeout(deadline, 12.0, connect=8.0)
+    try:
+        resp = await provider_get("github_code", url, headers, params, timeout, http, deadline, conditional)
+        if resp is None:
+            return hits
+        resp.raise_for_status()
+        data = resp.json()
+        for item in data.get("items", [])[:5]:
+            hits.append(WebSearchHit(
+                source="GitHub Code Search",
+                result_type="CodeMatch",
+                data={"repository": item.get("repository", {}).get("full_name"), "path": item.get("path"), "html_url": item.get("html_url")}
+            ))
+    except Exception as e:
+        logger.warning("GitHub code search error: %s", e)
+        PROVIDER_ERRORS.inc(provider="github_code")
+    return hits
+
+async def _bing_variant_search(target: str, ua: str, http: Optional[HttpClientRegistry] = None,
+                               deadline: Optional[float] = None, conditional: bool = False) -> List[WebSearchHit]:
+    """
+    Searches target variants in batches, one Bing query per batch of OR-ed variants.
+    Variants checked in earlier scans are not searched again; the hits stored for them are returned instead.
+    """
+    hits: List[WebSearchHit] = []
+    skipped: List[str] = []
+    async for batch in unchecked_batches(candidates(target), "bing", DEEP_SEARCH_PERMUTATIONS, skipped=skipped):
+        answered: List[str] = []
+        found: Dict[str, List[WebSearchHit]] = {}
+        for group in batched(batch, BING_VARIANTS_PER_QUERY):
+            query = " OR ".join(f'"{variant}"' for variant in group)
+            pages = await _bing_search(query, ua, http, deadline, conditional)
+            if pages is None:
+                continue
+            answered.extend(group)
+            for page in pages:
+                text = " ".join(str(page.data.get(k) or "") for k in ("name", "url", "snippet")).lower()
+                matched = next((v for v in group if v in text), None)
+                if matched:
+                    found.setdefault(matched, []).append(WebSearchHit(
+                        source="Bing Web Search", result_type="Variant Mention", data={**page.data, "permutation": matched}))
+        # Groups Bing did not answer stay unchecked so a later scan searches them.
+        await CHECKED.add([(variant, "bing") for variant in answered],
+                          {(variant, "bing"): [hit.model_dump(mode="json") for hit in found[variant]] for variant in found})
+        for variant_hits in found.values():
+            hits.extend(variant_hits)
+    hits.extend(WebSearchHit.model_validate(item) for item in await CHECKED.found([(v, "bing") for v in skipped]))
     return hits
 
 async def _simulated_deep_hits(target: str, ua: str) -> List[Any]:
@@ -113,15 +165,26 @@ async def _simulated_deep_hits(target: str, ua: str) -> List[Any]:
     """
     results: List[Any] = []
 
-    suffixes = ["", "01", "_dev", "_admin"]
-    perms = [target + s for s in suffixes][:6]
-    for p in perms:
+    def mention(p: str) -> Optional[WebSearchHit]:
         if random.random() < 0.20:
-            results.append(WebSearchHit(
+            return WebSearchHit(
                 source="Simulated Deep Crawl",
                 result_type="Paste Mention",
                 data={"permutation": p, "snippet": f"Simulated mention of {p}", "confidence": 0.45}
-            ))
+            )
+        return None
+
+    hit = mention(target)
+    if hit:
+        results.append(hit)
+    skipped: List[str] = []
+    async for batch in unchecked_batches(candidates(target), "deep_search:simulated", DEEP_SEARCH_PERMUTATIONS, skipped=skipped):
+        found = {p: hit for p, hit in ((p, mention(p)) for p in batch) if hit}
+        await CHECKED.add([(p, "deep_search:simulated") for p in batch],
+                          {(p, "deep_search:simulated"): [hit.model_dump(mode="json")] for p, hit in found.items()})
+        results.extend(found.values())
+    stored = await CHECKED.found([(p, "deep_search:simulated") for p in skipped])
+    results.extend(WebSearchHit.model_validate(item) for item in stored)
 
     if random.random() < 0.3:
         results.append(SocialMediaHits(
@@ -132,25 +195,37 @@ async def _simulated_deep_hits(target: str, ua: str) -> List[Any]:
     await asyncio.sleep(0.1)
     return results
 
-async def collect_deep_search_data(target: str) -> List:
+async def collect_deep_search_data(target: str, http: Optional[HttpClientRegistry] = None,
+                                   deadline: Optional[float] = None, incremental: bool = False) -> List:
     """
     Law‑respecting deep search source.
     - Uses Bing Web Search API (when BING_API_KEY provided) for broad web discovery.
     - Uses GitHub Search API (when GITHUB_TOKEN provided) to find users or code references.
+    - Searches up to DEEP_SEARCH_PERMUTATIONS target variants (leetspeak, separators, typosquats),
+      several per Bing query; variants searched in earlier scans are not searched again, and
+      the hits recorded for them then are reported instead.
     - Falls back to a conservative simulated mode if no keys are available.
     Notes:
       * Do not enable unauthorized scraping. Use official APIs and respect rate limits / TOS.
+        Provider calls are paced by the shared token buckets in backend.core.rate_limit, and
+        fail fast while a provider's circuit breaker (backend.core.breaker) is open.
       * Configure BING_API_KEY and/or GITHUB_TOKEN in your environment to enable real discovery.
+      * `http` is the shared client registry injected by the gatherer; connections are reused across analyses.
+      * `deadline` (time.monotonic()) is the request deadline; provider timeouts are clamped to it.
+      * `incremental` sends provider requests conditionally (If-None-Match), replaying the
+        stored response on a 304.
     """
-    ua = get_random_user_agent()
+    ua = await get_random_user_agent()
     combined: List = []
 
     tasks = []
     if BING_API_KEY:
-        tasks.append(asyncio.create_task(_bing_search(target, ua)))
+        tasks.append(asyncio.create_task(_bing_search(target, ua, http, deadline, incremental)))
+        if DEEP_SEARCH_PERMUTATIONS > 0:
+            tasks.append(asyncio.create_task(_bing_variant_search(target, ua, http, deadline, incremental)))
     if GITHUB_TOKEN:
-        tasks.append(asyncio.create_task(_github_user_search(target, ua)))
-        tasks.append(asyncio.create_task(_github_code_search(target, ua)))
+        tasks.append(asyncio.create_task(_github_user_search(target, ua, http, deadline, incremental)))
+        tasks.append(asyncio.create_task(_github_code_search(target, ua, http, deadline, incremental)))
 
     if not tasks:
         simulated = await _simulated_deep_hits(target, ua)
@@ -160,34 +235,30 @@ async def collect_deep_search_data(target: str) -> List:
     responses = await asyncio.gather(*tasks, return_exceptions=True)
     for resp in responses:
         if isinstance(resp, Exception):
-            print("Deep search provider error:", resp)
+            logger.warning("Deep search provider error: %s", resp)
             continue
         if isinstance(resp, list):
             combined.extend(resp)
 
-    seen_urls = set()
+    # First hit per URL (or name) wins; profiles and web hits are keyed separately.
+    seen = set()
     deduped: List = []
     for item in combined:
         if isinstance(item, WebSearchHit):
-            url = None
-            data = getattr(item, "data", {}) or {}
-            url = data.get("url") or data.get("html_url")
-            key = f"web:{url}" if url else f"web:{data.get('name', '')}"
-            if key in seen_urls:
-                continue
-            seen_urls.add(key)
-            deduped.append(item)
-            
+            data = item.data if isinstance(item.data, dict) else {}
+            key = ("web", data.get("url") or data.get("html_url") or data.get("name", ""))
         elif isinstance(item, SocialMediaHits):
-            key = f"profile:{item.url_found}"
-            if key in seen_urls:
-                continue
-            seen_urls.add(key)
-            deduped.append(item)
+            key = ("profile", item.platform, item.url_found or item.status)
         else:
             deduped.append(item)
+            continue
+        if key not in seen:
+            seen.add(key)
+            deduped.append(item)
 
     return deduped
 
-async def collect_data(target: str):
-    return await collect_deep_search_data(target)
\ No newline at end of file
+async def collect_data(target: str, http: Optional[HttpClientRegistry] = None, deadline: Optional[float] = None,
+                       incremental: bool = False) -> SourceResult:
+    # Web and profile hits come back in one list; the envelope files each under its own section.
+    return normalize_result(await collect_deep_search_data(target, http, deadline, incremental))
\ No newline at end of file
@@ -1,6 +1,8 @@
 import asyncio
-from backend.core.models import DomainInfo
-from datetime import datetime
+from backend.core.models import DomainInfo, SourceResult
+from datetime import datetime, timedelta
+
+SOURCE_META = {"target_types": ["domain"], "cost": 1, "timeout": 5.0}
 
 async def collect_domain_data(target_domain: str) -> DomainInfo:
     """Simulates an asynchronous WHOIS lookup."""
@@ -15,8 +17,8 @@ async def collect_domain_data(target_domain: str) -> DomainInfo:
         return DomainInfo(
             is_registered=True,
             owner_simulated=f"Simulated Entity for {target_domain}",
-            expiration_date=(datetime.now().year + 2).strftime("%Y-%m-%d")
+            expiration_date=(datetime.now() + timedelta(days=730)).strftime("%Y-%m-%d")
         )
 
-async def collect_data(target: str):
-    return await collect_domain_data(target)
\ No newline at end of file
+async def collect_data(target: str) -> SourceResult:
+    return SourceResult(domain_results=await collect_domain_data(target))
\ No newline at end of file
@@ -1,12 +1,14 @@
 import asyncio
 import random
-from backend.core.models import WebSearchHit
+from backend.core.models import SourceResult, WebSearchHit
 from backend.core.network_utils import get_random_user_agent
 from typing import List
 
+SOURCE_META = {"target_types": ["any"], "cost": 1, "timeout": 5.0}
+
 async def collect_search_engine_data(target: str) -> List[WebSearchHit]:
     """Simulates advanced Google Dorking and search volume analysis."""
-    user_agent = get_random_user_agent()
+    user_agent = await get_random_user_agent()
 
     await asyncio.sleep(random.uniform(0.8, 1.4)) 
     
@@ -28,5 +30,5 @@ async def collect_search_engine_data(target: str) -> List[WebSearchHit]:
 
     return results
 
-async def collect_data(target: str):
-    return await collect_search_engine_data(target)
\ No newline at end of file
+async def collect_data(target: str) -> SourceResult:
+    return SourceResult(web_search_data=await collect_search_engine_data(target))
\ No newline at end of file
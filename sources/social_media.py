@@ -1,42 +1,273 @@
 import asyncio
+import json
+import logging
+import os
 import random
-from backend.core.models import SocialMediaHits
-from typing import List
-
-PLATFORM_DOMAINS = {
-    "Twitter/X": "twitter.com",
-    "LinkedIn": "linkedin.com/in",
-    "GitHub": "github.com",
-    "Instagram": "instagram.com",
-    "Reddit": "reddit.com/user",
-}
-
-async def collect_social_data(target_username: str) -> List[SocialMediaHits]:
-    """Simulates username checking across various platforms."""
-    
-    platforms = list(PLATFORM_DOMAINS.keys())
-    results: List[SocialMediaHits] = []
+import re
+import time
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+import httpx
+from backend.core.models import SocialMediaHits, SourceResult
+from backend.core.http_client import HttpClientRegistry, deadline_timeout, get_http_client
+from backend.core.metrics import PROVIDER_ERRORS
+from backend.core.network_utils import get_random_user_agent
+from backend.core.permutations import CHECKED, PERMUTATION_BATCH_SIZE, batched, username_permutations
+
+logger = logging.getLogger(__name__)
+
+SOURCE_META = {"target_types": ["username", "email"], "cost": 2, "timeout": 8.0}
+
+PLATFORM_CATALOG_PATH = os.getenv("PLATFORM_CATALOG_PATH", os.path.join(os.path.dirname(__file__), "platforms.json"))
+# Off by default: without it every platform is simulated, as before the catalog existed.
+SOCIAL_LIVE_PROBES = os.getenv("SOCIAL_LIVE_PROBES", "0") == "1"
+# Probes in flight across all analyses in this process; rate classes cap each platform on top of this.
+SOCIAL_PROBE_CONCURRENCY = int(os.getenv("SOCIAL_PROBE_CONCURRENCY", "64"))
+SOCIAL_PROBE_TIMEOUT = float(os.getenv("SOCIAL_PROBE_TIMEOUT", "5.0"))
+# Probes still running this close to the deadline are cancelled so the finished ones make the report.
+SOCIAL_DEADLINE_MARGIN = float(os.getenv("SOCIAL_DEADLINE_MARGIN", "0.25"))
+DEFAULT_BODY_BYTES = 4096
+# Username variants (backend.core.permutations) probed on every platform after the target itself.
+SOCIAL_PERMUTATIONS = int(os.getenv("SOCIAL_PERMUTATIONS", "0"))
+
+
+@dataclass(frozen=True)
+class Platform:
+    """
+    One catalog entry. `check` decides existence from the response:
+      status  a HEAD (or `method`) request; `found` / `missing` status codes decide
+      body    a ranged GET of the first `bytes` bytes; a `missing_text` marker means no profile
+    Anything else (redirects to a login wall, 429s, errors) is reported as UNKNOWN.
+    """
+    name: str
+    url: str
+    rate_class: str = "default"
+    check_type: str = "status"
+    method: str = "HEAD"
+    found: Tuple[int, ...] = (200,)
+    missing: Tuple[int, ...] = (404, 410)
+    missing_text: Tuple[str, ...] = ()
+    body_bytes: int = DEFAULT_BODY_BYTES
+    pattern: Optional[re.Pattern] = None
+
+    @classmethod
+    def from_dict(cls, entry: dict) -> "Platform":
+        check = entry.get("check", {})
+        check_type = check.get("type", "status")
+        if check_type not in ("status", "body"):
+            raise ValueError(f"{entry.get('name')}: unknown check type {check_type!r}")
+        return cls(
+            name=entry["name"],
+            url=entry["url"],
+            rate_class=entry.get("rate_class", "default"),
+            check_type=check_type,
+            method=check.get("method", "HEAD" if check_type == "status" else "GET").upper(),
+            found=tuple(check.get("found", (200,))),
+            missing=tuple(check.get("missing", (404, 410))),
+            missing_text=tuple(check.get("missing_text", ())),
+            body_bytes=int(check.get("bytes", DEFAULT_BODY_BYTES)),
+            pattern=re.compile(entry["pattern"]) if entry.get("pattern") else None,
+        )
+
+    def accepts(self, username: str) -> bool:
+        return self.pattern is None or bool(self.pattern.match(username))
+
+    def profile_url(self, username: str) -> str:
+        return self.url.format(username=quote(username, safe=""))
+
+
+@dataclass
+class PlatformCatalog:
+    platforms: List[Platform]
+    rate_classes: Dict[str, int]
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PlatformCatalog":
+        rate_classes = {"default": 16, **data.get("rate_classes", {})}
+        platforms = [Platform.from_dict(entry) for entry in data.get("platforms", [])]
+        for platform in platforms:
+            if platform.rate_class not in rate_classes:
+                raise ValueError(f"{platform.name}: unknown rate class {platform.rate_class!r}")
+        return cls(platforms, rate_classes)
+
+    @classmethod
+    def load(cls, path: str = PLATFORM_CATALOG_PATH) -> "PlatformCatalog":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+CATALOG = PlatformCatalog.load()
+
+
+class _ProbeLimits:
+    """Process-wide probe slots plus one semaphore per platform sized by its rate class."""
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._total: Optional[asyncio.Semaphore] = None
+        self._platforms: Dict[str, asyncio.Semaphore] = {}
+
+    def slots(self, platform: Platform, catalog: PlatformCatalog) -> Tuple[asyncio.Semaphore, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Semaphores are bound to the loop that first waits on them.
+            self._loop = loop
+            self._total = asyncio.Semaphore(SOCIAL_PROBE_CONCURRENCY)
+            self._platforms = {}
+        sem = self._platforms.get(platform.name)
+        if sem is None:
+            sem = self._platforms[platform.name] = asyncio.Semaphore(catalog.rate_classes[platform.rate_class])
+        return sem, self._total
 
-    for platform in platforms:
-        await asyncio.sleep(random.uniform(0.05, 0.2))
-        
-        is_found = random.choices([True, False], weights=[65, 35])[0]
-        
-        if is_found and len(target_username) > 3:
-            url = f"https://{PLATFORM_DOMAINS[platform]}/{target_username}"
-            results.append(SocialMediaHits(
-                platform=platform,
-                url_found=url,
-                status="FOUND"
-            ))
+
+PROBE_LIMITS = _ProbeLimits()
+
+
+def _verdict(platform: Platform, url: str, status_code: int, body: str = "") -> SocialMediaHits:
+    if status_code == 206:
+        status_code = 200
+    if status_code in platform.missing or (body and any(marker in body for marker in platform.missing_text)):
+        return SocialMediaHits(platform=platform.name, url_found=None, status="NOT_FOUND_OR_PRIVATE")
+    if status_code in platform.found:
+        return SocialMediaHits(platform=platform.name, url_found=url, status="FOUND")
+    return SocialMediaHits(platform=platform.name, url_found=None, status="UNKNOWN")
+
+
+async def _live_probe(platform: Platform, username: str, ua: str, http: Optional[HttpClientRegistry],
+                      deadline: Optional[float]) -> SocialMediaHits:
+    url = platform.profile_url(username)
+    client = get_http_client(url, http)
+    timeout = deadline_timeout(deadline, SOCIAL_PROBE_TIMEOUT, connect=min(3.0, SOCIAL_PROBE_TIMEOUT))
+    headers = {"User-Agent": ua}
+    try:
+        if platform.check_type == "status":
+            resp = await client.request(platform.method, url, headers=headers, timeout=timeout)
+            return _verdict(platform, url, resp.status_code)
+        # Only the head of the page is needed; servers that ignore Range are cut off after `body_bytes`.
+        headers["Range"] = f"bytes=0-{platform.body_bytes - 1}"
+        body = bytearray()
+        async with client.stream(platform.method, url, headers=headers, timeout=timeout) as resp:
+            async for chunk in resp.aiter_bytes():
+                body += chunk
+                # A 206 ends on its own and keeps the connection; a full page is abandoned.
+                if len(body) > platform.body_bytes:
+                    break
+        return _verdict(platform, url, resp.status_code, body[:platform.body_bytes].decode("utf-8", "replace"))
+    except httpx.HTTPError as e:
+        logger.debug("Probe of %s failed: %s", url, e)
+        PROVIDER_ERRORS.inc(provider="social_probe")
+        return SocialMediaHits(platform=platform.name, url_found=None, status="UNKNOWN")
+
+
+async def _simulated_probe(platform: Platform, username: str) -> SocialMediaHits:
+    await asyncio.sleep(random.uniform(0.05, 0.2))
+    is_found = random.choices([True, False], weights=[65, 35])[0]
+    if is_found and len(username) > 3:
+        return SocialMediaHits(platform=platform.name, url_found=platform.profile_url(username), status="FOUND")
+    return SocialMediaHits(platform=platform.name, url_found=None, status="NOT_FOUND_OR_PRIVATE")
+
+
+async def _probe(platform: Platform, username: str, ua: str, catalog: PlatformCatalog,
+                 http: Optional[HttpClientRegistry], deadline: Optional[float], live: bool) -> SocialMediaHits:
+    platform_slot, total_slot = PROBE_LIMITS.slots(platform, catalog)
+    async with platform_slot, total_slot:
+        if live:
+            return await _live_probe(platform, username, ua, http, deadline)
+        return await _simulated_probe(platform, username)
+
+
+async def _probe_all(jobs: List[Tuple[Platform, str]], ua: str, catalog: PlatformCatalog,
+                     http: Optional[HttpClientRegistry], deadline: Optional[float],
+                     live: bool) -> List[Optional[SocialMediaHits]]:
+    """Runs (platform, username) probes concurrently; None marks a probe cancelled at the deadline."""
+    if not jobs:
+        return []
+    tasks = [asyncio.create_task(_probe(platform, username, ua, catalog, http, deadline, live)) for platform, username in jobs]
+    timeout = None if deadline is None else max(0.0, deadline - time.monotonic() - SOCIAL_DEADLINE_MARGIN)
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=timeout)
+    finally:
+        for task in tasks:
+            task.cancel()
+    outcomes: List[Optional[SocialMediaHits]] = []
+    for (platform, _), task in zip(jobs, tasks):
+        if task not in done:
+            outcomes.append(None)
+        elif task.exception() is not None:
+            logger.warning("Probe of %s failed: %s", platform.name, task.exception())
+            outcomes.append(SocialMediaHits(platform=platform.name, url_found=None, status="UNKNOWN"))
         else:
-            results.append(SocialMediaHits(
-                platform=platform,
-                url_found=None,
-                status="NOT_FOUND_OR_PRIVATE"
-            ))
-    
+            outcomes.append(task.result())
+    return outcomes
+
+
+async def _probe_variants(username: str, ua: str, catalog: PlatformCatalog, http: Optional[HttpClientRegistry],
+                          deadline: Optional[float], live: bool, limit: int) -> List[SocialMediaHits]:
+    """
+    Probes up to `limit` username variants, a batch at a time, and returns the profiles found.
+    (variant, platform) pairs checked in earlier scans are not probed again; the profiles
+    they found then are returned instead.
+    """
+    found: List[SocialMediaHits] = []
+    for batch in batched(islice(username_permutations(username), limit), PERMUTATION_BATCH_SIZE):
+        if deadline is not None and time.monotonic() >= deadline - SOCIAL_DEADLINE_MARGIN:
+            break
+        pairs = list(dict.fromkeys((variant, platform.name) for variant in batch for platform in catalog.platforms
+                                   if platform.accepts(variant)))
+        fresh = set(await CHECKED.unseen(pairs))
+        jobs = [(platform, variant) for variant in dict.fromkeys(batch) for platform in catalog.platforms
+                if (variant, platform.name) in fresh]
+        outcomes = await _probe_all(jobs, ua, catalog, http, deadline, live)
+        answered: List[Tuple[str, str]] = []
+        hits: Dict[Tuple[str, str], List[Any]] = {}
+        for (platform, variant), hit in zip(jobs, outcomes):
+            # Unanswered probes stay unchecked so a later scan retries them.
+            if hit is None or hit.status == "UNKNOWN":
+                continue
+            answered.append((variant, platform.name))
+            if hit.status == "FOUND":
+                variant_hit = SocialMediaHits(platform=hit.platform, url_found=hit.url_found, status="FOUND (VARIANT)")
+                hits[(variant, platform.name)] = [variant_hit.model_dump(mode="json")]
+                found.append(variant_hit)
+        await CHECKED.add(answered, hits)
+        stored = await CHECKED.found([pair for pair in pairs if pair not in fresh])
+        found.extend(SocialMediaHits.model_validate(item) for item in stored)
+    return found
+
+
+async def collect_social_data(target_username: str, http: Optional[HttpClientRegistry] = None,
+                              deadline: Optional[float] = None, catalog: Optional[PlatformCatalog] = None,
+                              live: Optional[bool] = None, variants: Optional[int] = None) -> List[SocialMediaHits]:
+    """
+    Checks the username on every catalog platform concurrently.
+    Platforms whose username rules reject the name are answered without a request.
+    Probes still running shortly before `deadline` are cancelled and reported as TIMEOUT.
+    Live probes (SOCIAL_LIVE_PROBES=1) send HEAD or ranged GET requests; otherwise results are simulated.
+    With `variants` (default SOCIAL_PERMUTATIONS) > 0, that many username variants are probed
+    afterwards and the profiles found are appended with status "FOUND (VARIANT)".
+    """
+    catalog = catalog or CATALOG
+    live = SOCIAL_LIVE_PROBES if live is None else live
+    variants = SOCIAL_PERMUTATIONS if variants is None else variants
+    username = target_username.split("@", 1)[0] if "@" in target_username else target_username
+    ua = await get_random_user_agent() if live else ""
+
+    jobs = [(platform, username) for platform in catalog.platforms if platform.accepts(username)]
+    probed = {platform.name: hit for (platform, _), hit in zip(jobs, await _probe_all(jobs, ua, catalog, http, deadline, live))}
+    results: List[SocialMediaHits] = []
+    for platform in catalog.platforms:
+        if platform.name not in probed:
+            results.append(SocialMediaHits(platform=platform.name, url_found=None, status="NOT_FOUND_OR_PRIVATE"))
+        elif probed[platform.name] is None:
+            results.append(SocialMediaHits(platform=platform.name, url_found=None, status="TIMEOUT"))
+        else:
+            results.append(probed[platform.name])
+    if variants > 0:
+        results.extend(await _probe_variants(username, ua, catalog, http, deadline, live, variants))
     return results
 
-async def collect_data(target: str):
-    return await collect_social_data(target)
\ No newline at end of file
+
+async def collect_data(target: str, http: Optional[HttpClientRegistry] = None, deadline: Optional[float] = None) -> SourceResult:
+    return SourceResult(social_media_hits=await collect_social_data(target, http, deadline))
@@ -1,10 +1,55 @@
 import asyncio
+import os
 import random
-from backend.core.models import VulnerabilityHit
+from urllib.parse import urlsplit
+from backend.core.models import SourceResult, VulnerabilityHit
+from backend.core.nvd import NVD
+from backend.core.targets import DOMAIN, URL, classify_target
 from typing import List
 
+SOURCE_META = {"target_types": ["domain", "ip", "url"], "cost": 1, "timeout": 5.0}
+
+NVD_MAX_HITS = int(os.getenv("NVD_MAX_HITS", "10"))
+# Second-level labels that are part of a public suffix (example.co.uk -> example).
+_SUFFIX_LABELS = {"co", "com", "net", "org", "ac", "gov", "edu"}
+
+def target_keys(target: str) -> List[str]:
+    """Vendor/product names a domain or URL target may appear under in CPEs."""
+    parsed = classify_target(target)
+    if parsed.kind == URL:
+        host = urlsplit(parsed.value).hostname or ""
+    elif parsed.kind == DOMAIN:
+        host = parsed.value
+    else:
+        return []
+    labels = [label for label in host.split(".") if label != "www"]
+    if len(labels) >= 3 and labels[-2] in _SUFFIX_LABELS:
+        labels = labels[:-1]
+    return [labels[-2]] if len(labels) >= 2 else []
+
+def nvd_hits(target: str) -> List[VulnerabilityHit]:
+    """Lookups against the local NVD store. Blocking; collect_vulnerability_data runs it in a thread."""
+    keys = target_keys(target)
+    rows = NVD.for_keys(keys, NVD_MAX_HITS) or (NVD.search(keys[0], NVD_MAX_HITS) if keys else [])
+    return [
+        VulnerabilityHit(
+            source="NVD (local)",
+            cve_id=row["cve_id"],
+            severity=row["severity"] or "UNKNOWN",
+            description=f"{row['description']} (CVSS {row['score']})" if row["score"] is not None else row["description"],
+        )
+        for row in rows
+    ]
+
 async def collect_vulnerability_data(target: str) -> List[VulnerabilityHit]:
-    """Simulates checking known public vulnerability databases (e.g., CVE, NVD)."""
+    """
+    Looks the target up in the offline NVD store (backend/core/nvd.py) once a feed has been imported.
+    Without one it simulates checking known public vulnerability databases (e.g., CVE, NVD).
+    """
+    if NVD.available():
+        # Fast once the store's pages are cached, but a cold read blocks on disk.
+        return await asyncio.to_thread(nvd_hits, target)
+
     await asyncio.sleep(random.uniform(0.6, 1.0))
     
     if "company" in target.lower() or "server" in target.lower():
@@ -23,5 +68,5 @@ async def collect_vulnerability_data(target: str) -> List[VulnerabilityHit]:
         ]
     return []
 
-async def collect_data(target: str):
-    return await collect_vulnerability_data(target)
\ No newline at end of file
+async def collect_data(target: str) -> SourceResult:
+    return SourceResult(vulnerability_hits=await collect_vulnerability_data(target))